@@ -0,0 +1,84 @@
+"""
+Detection resolution benchmark.
+
+Runs face detection over a folder of images at full resolution and at each reduced
+long edge, then reports per-image decode/detect time and how often the reduced
+verdict (face / no face) agrees with the full-resolution one.
+
+    python benchmarks/bench_detect_resolution.py <folder> [--long-edges 640 1024 2048] [--limit 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from core.scanner import ScannerEngine
+
+
+def collect_images(folder, limit):
+    exts = {'.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tiff'}
+    files = []
+    for root, _, names in os.walk(folder):
+        for name in sorted(names):
+            if os.path.splitext(name)[1].lower() in exts:
+                files.append(os.path.join(root, name))
+                if limit and len(files) >= limit:
+                    return files
+    return files
+
+
+def run_pass(engine, detector, files, long_edge):
+    verdicts = {}
+    decode_time = 0.0
+    detect_time = 0.0
+    for f in files:
+        t0 = time.perf_counter()
+        image, scale = engine._load_image(f, long_edge)
+        t1 = time.perf_counter()
+        if image is None:
+            continue
+        faces = engine._detect_faces_opencv(detector, image)
+        t2 = time.perf_counter()
+        decode_time += t1 - t0
+        detect_time += t2 - t1
+        verdicts[f] = engine._has_face(faces)
+    return verdicts, decode_time, detect_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare reduced-resolution face detection against full resolution.")
+    parser.add_argument("folder")
+    parser.add_argument("--long-edges", type=int, nargs="+", default=[640, 1024, 2048])
+    parser.add_argument("--limit", type=int, default=0, help="Max images to use (0 = all)")
+    args = parser.parse_args()
+
+    files = collect_images(args.folder, args.limit)
+    if not files:
+        print("No images found.")
+        return 1
+
+    engine = ScannerEngine(logger_callback=lambda x: None)
+    detector = engine._init_opencv_face()
+
+    print(f"{len(files)} images")
+    baseline, base_decode, base_detect = run_pass(engine, detector, files, 0)
+    n = max(len(baseline), 1)
+    print(f"{'long edge':>10} {'decode ms':>10} {'detect ms':>10} {'agreement':>10} {'missed':>7} {'extra':>6}")
+    print(f"{'full':>10} {base_decode / n * 1000:10.1f} {base_detect / n * 1000:10.1f} {'100.0%':>10} {0:7d} {0:6d}")
+
+    for long_edge in args.long_edges:
+        verdicts, decode, detect = run_pass(engine, detector, files, long_edge)
+        common = [f for f in baseline if f in verdicts]
+        agree = sum(1 for f in common if verdicts[f] == baseline[f])
+        missed = sum(1 for f in common if baseline[f] and not verdicts[f])
+        extra = sum(1 for f in common if verdicts[f] and not baseline[f])
+        m = max(len(verdicts), 1)
+        print(f"{long_edge:>10} {decode / m * 1000:10.1f} {detect / m * 1000:10.1f} "
+              f"{agree / max(len(common), 1):10.1%} {missed:7d} {extra:6d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
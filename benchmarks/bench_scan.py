@@ -0,0 +1,290 @@
+"""
+Scanner throughput benchmark on a reproducible synthetic corpus.
+
+Generates (once, deterministically from --seed) a corpus of images in every format the
+scanner reads, at a mix of sizes, with and without drawn face-like content (plus real
+faces pasted from --faces <dir> if given) and a few corrupt files. Then runs the scanner
+once per configuration, each in a fresh process, and reports images/sec, p50/p95
+per-image latency, peak RSS and verdict agreement with a stored golden result.
+
+    python benchmarks/bench_scan.py [--corpus DIR] [--count 120] [--seed 1234] [--faces DIR]
+                                    [--workers 1 4] [--long-edges 1024 0] [--animals off on]
+                                    [--output results.json] [--update-golden]
+
+The golden result (<corpus>/golden.json) is the verdict of a reference run: one process,
+full resolution, no cascade. It is created on first use and refreshed with --update-golden.
+Results are written as JSON (default benchmarks/results/scan_<timestamp>.json).
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(REPO_ROOT, 'src'))
+
+CORPUS_VERSION = 1
+# Must match the image_exts the scanner collects
+FORMATS = ['.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tiff']
+SIZES = [(640, 480), (1280, 960), (1920, 1080), (3000, 2000), (4000, 3000), (1080, 1920)]
+FACE_FRACTION = 0.4
+CORRUPT_FILES = ['corrupt_truncated.jpg', 'corrupt_garbage.png', 'corrupt_empty.jpg']
+REFERENCE = {'workers': 1, 'long_edge': 0}
+
+
+def _background(rng, w, h):
+    # Smooth gradient "sky/ground" plus texture, so files don't compress to nothing
+    top, bottom = rng.integers(0, 256, 3), rng.integers(0, 256, 3)
+    ramp = np.linspace(0, 1, h, dtype=np.float32)[:, None, None]
+    image = (top * (1 - ramp) + bottom * ramp).astype(np.float32)
+    image = np.broadcast_to(image, (h, w, 3)).copy()
+    image += rng.normal(0, 12, (h, w, 3)).astype(np.float32)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def _draw_face(cv2, rng, image, cx, cy, size):
+    """Cartoon face (hair, skin oval, brows, eyes, nose, mouth), softened so edges look photographic."""
+    x0, y0 = max(0, cx - size), max(0, cy - size)
+    patch = image[y0:cy + size, x0:cx + size].copy()
+    px, py = cx - x0, cy - y0
+    t = max(1, size // 25)
+    skin = tuple(int(v) for v in rng.integers([80, 110, 160], [140, 170, 225]))
+    hair = tuple(int(v) for v in rng.integers(10, 70, 3))
+    cv2.ellipse(patch, (px, py - size // 10), (int(size * 0.55), int(size * 0.7)), 0, 180, 360, hair, -1)
+    cv2.ellipse(patch, (px, py), (size // 2, int(size * 0.62)), 0, 0, 360, skin, -1)
+    dark = tuple(max(0, c - 90) for c in skin)
+    eye_dx, eye_y = int(size * 0.19), py - size // 10
+    for ex in (px - eye_dx, px + eye_dx):
+        cv2.line(patch, (ex - size // 10, eye_y - size // 8), (ex + size // 10, eye_y - size // 7), hair, 2 * t)
+        cv2.ellipse(patch, (ex, eye_y), (size // 10, size // 20), 0, 0, 360, (235, 235, 235), -1)
+        cv2.circle(patch, (ex, eye_y), max(2, size // 22), (30, 25, 20), -1)
+    cv2.ellipse(patch, (px, py + size // 12), (size // 14, size // 20), 0, 0, 180, dark, t)
+    cv2.ellipse(patch, (px, py + int(size * 0.27)), (size // 6, size // 16), 0, 0, 180, (60, 60, 150), 2 * t)
+    patch = cv2.GaussianBlur(patch, (0, 0), max(0.8, size / 120))
+    image[y0:y0 + patch.shape[0], x0:x0 + patch.shape[1]] = patch
+
+
+def _load_face_sources(cv2, folder):
+    faces = []
+    if folder:
+        for name in sorted(os.listdir(folder)):
+            img = cv2.imread(os.path.join(folder, name))
+            if img is not None:
+                faces.append(img)
+    return faces
+
+
+def make_corpus(corpus, count, seed, faces_dir=None):
+    """Create the corpus unless an identical one (same version/seed/count/faces) already exists."""
+    import cv2
+
+    manifest_path = os.path.join(corpus, 'manifest.json')
+    spec = {'version': CORPUS_VERSION, 'seed': seed, 'count': count,
+            'faces_dir': os.path.abspath(faces_dir) if faces_dir else None}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as fh:
+            manifest = json.load(fh)
+        if manifest.get('spec') == spec:
+            return manifest
+        print("Corpus spec changed, regenerating (the golden result is discarded).")
+        for name in os.listdir(corpus):
+            os.remove(os.path.join(corpus, name))
+
+    os.makedirs(corpus, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    sources = _load_face_sources(cv2, faces_dir)
+    files = []
+    for i in range(count):
+        w, h = SIZES[i % len(SIZES)]
+        ext = FORMATS[(i // len(SIZES)) % len(FORMATS)]
+        image = _background(rng, w, h)
+        face = bool(rng.random() < FACE_FRACTION)
+        if face:
+            size = int(min(w, h) * rng.uniform(0.08, 0.4))
+            cx, cy = int(rng.integers(size, w - size)), int(rng.integers(size, h - size))
+            if sources:
+                src = sources[int(rng.integers(len(sources)))]
+                ratio = size / max(src.shape[:2])
+                patch = cv2.resize(src, (max(1, int(src.shape[1] * ratio)), max(1, int(src.shape[0] * ratio))))
+                ph, pw = patch.shape[:2]
+                image[cy - ph // 2:cy - ph // 2 + ph, cx - pw // 2:cx - pw // 2 + pw] = patch
+            else:
+                _draw_face(cv2, rng, image, cx, cy, size)
+        name = f"img_{i:04d}_{w}x{h}{ext}"
+        cv2.imwrite(os.path.join(corpus, name), image)
+        files.append({'file': name, 'width': w, 'height': h, 'face_content': face})
+
+    # Corrupt files: a truncated JPEG, random bytes with an image extension, and an empty file
+    with open(os.path.join(corpus, files[0]['file']), 'rb') as fh:
+        head = fh.read(4096)
+    with open(os.path.join(corpus, CORRUPT_FILES[0]), 'wb') as fh:
+        fh.write(head)
+    with open(os.path.join(corpus, CORRUPT_FILES[1]), 'wb') as fh:
+        fh.write(rng.bytes(20000))
+    open(os.path.join(corpus, CORRUPT_FILES[2]), 'wb').close()
+
+    manifest = {'spec': spec, 'files': files, 'corrupt': CORRUPT_FILES}
+    with open(manifest_path, 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=1)
+    return manifest
+
+
+def _peak_rss_mb():
+    """(this process, largest child) peak RSS in MB; None where the platform can't tell."""
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    # ru_maxrss is KB on Linux, bytes on macOS
+    unit = 1 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 2 ** 20
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit / 2 ** 20
+    return round(own, 1), round(children, 1)
+
+
+def run_config(config):
+    """Child-process entry: one scan, result as JSON on stdout."""
+    from core.scanner import ScannerEngine
+
+    engine = ScannerEngine(logger_callback=lambda x: None)
+    engine.detect_long_edge = config['long_edge']
+    # Measure the configuration as given: no first-run tuning pass, no resume journal
+    engine.autotune = False
+    engine.checkpoint = False
+    for name, value in config.get('settings', {}).items():
+        setattr(engine, name, value)
+
+    verdicts = {}
+    latencies = []
+    start = time.perf_counter()
+    for result in engine.iter_scan(config['corpus'], keep_animals=config['keep_animals'],
+                                   workers=config['workers'], use_cache=False):
+        verdicts[os.path.basename(result.path)] = result.verdict
+        latencies.append(result.seconds)
+    elapsed = time.perf_counter() - start
+
+    own_rss, child_rss = _peak_rss_mb()
+    json.dump({'elapsed_s': elapsed, 'verdicts': verdicts, 'latencies': latencies,
+               'peak_rss_mb': own_rss, 'peak_worker_rss_mb': child_rss}, sys.stdout)
+    return 0
+
+
+def spawn(config):
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--run-config', json.dumps(config)],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Benchmark run failed ({config}):\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout)
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def load_golden(corpus, animals, update):
+    """Golden verdicts per animals setting, computed by the reference configuration when missing."""
+    path = os.path.join(corpus, 'golden.json')
+    golden = {}
+    if os.path.exists(path) and not update:
+        with open(path, encoding='utf-8') as fh:
+            golden = json.load(fh)
+
+    changed = False
+    for keep_animals in animals:
+        key = 'animals_on' if keep_animals else 'animals_off'
+        if key not in golden:
+            print(f"Computing golden result ({key}, reference: {REFERENCE})...")
+            golden[key] = spawn(dict(REFERENCE, corpus=corpus, keep_animals=keep_animals))['verdicts']
+            changed = True
+    if changed:
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(golden, fh, indent=1, sort_keys=True)
+    return golden
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure scanner throughput on a synthetic corpus.")
+    parser.add_argument("--corpus", default=os.path.join(REPO_ROOT, 'benchmarks', 'corpus'))
+    parser.add_argument("--count", type=int, default=120, help="Readable images to generate")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--faces", default=None, help="Folder of face crops to paste instead of drawn faces")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, max(1, (os.cpu_count() or 2) - 1)])
+    parser.add_argument("--long-edges", type=int, nargs="+", default=[1024, 0], help="0 = full resolution")
+    parser.add_argument("--animals", nargs="+", choices=['off', 'on'], default=['off', 'on'])
+    parser.add_argument("--settings", default="{}", help='Extra ScannerEngine attributes as JSON, e.g. \'{"batch_size": 4}\'')
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--update-golden", action="store_true")
+    parser.add_argument("--run-config", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_config:
+        return run_config(json.loads(args.run_config))
+
+    corpus = os.path.abspath(args.corpus)
+    manifest = make_corpus(corpus, args.count, args.seed, args.faces)
+    total = len(manifest['files']) + len(manifest['corrupt'])
+    animals = [a == 'on' for a in dict.fromkeys(args.animals)]
+    golden = load_golden(corpus, animals, args.update_golden)
+    settings = json.loads(args.settings)
+
+    runs = []
+    print(f"{total} files ({len(manifest['corrupt'])} corrupt) in {corpus}")
+    print(f"{'animals':>8} {'workers':>8} {'long edge':>10} {'img/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'rss MB':>8} {'agreement':>10}")
+    for keep_animals in animals:
+        expected = golden['animals_on' if keep_animals else 'animals_off']
+        for workers in dict.fromkeys(args.workers):
+            for long_edge in dict.fromkeys(args.long_edges):
+                config = {'corpus': corpus, 'keep_animals': keep_animals, 'workers': workers,
+                          'long_edge': long_edge, 'settings': settings}
+                out = spawn(config)
+                verdicts = out['verdicts']
+                common = [f for f in expected if f in verdicts]
+                agree = sum(1 for f in common if verdicts[f] == expected[f])
+                rss = max(v for v in (out['peak_rss_mb'], out['peak_worker_rss_mb'], 0) if v is not None)
+                row = {
+                    'keep_animals': keep_animals, 'workers': workers, 'long_edge': long_edge, 'settings': settings,
+                    'images': len(verdicts), 'elapsed_s': round(out['elapsed_s'], 3),
+                    'images_per_s': round(len(verdicts) / out['elapsed_s'], 2) if out['elapsed_s'] > 0 else None,
+                    'latency_p50_ms': round(_percentile(out['latencies'], 50) * 1000, 1) if out['latencies'] else None,
+                    'latency_p95_ms': round(_percentile(out['latencies'], 95) * 1000, 1) if out['latencies'] else None,
+                    'peak_rss_mb': out['peak_rss_mb'], 'peak_worker_rss_mb': out['peak_worker_rss_mb'],
+                    'agreement': round(agree / len(common), 4) if common else None,
+                    'disagreements': sorted(f for f in common if verdicts[f] != expected[f]),
+                    'missing': sorted(f for f in expected if f not in verdicts),
+                }
+                runs.append(row)
+                print(f"{'on' if keep_animals else 'off':>8} {workers:>8} {long_edge or 'full':>10} "
+                      f"{row['images_per_s'] or 0:8.2f} {row['latency_p50_ms'] or 0:8.1f} {row['latency_p95_ms'] or 0:8.1f} "
+                      f"{rss:8.0f} {row['agreement'] if row['agreement'] is not None else 0:10.1%}")
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+        'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+        'corpus': {'path': corpus, 'spec': manifest['spec'], 'files': total},
+        'runs': runs,
+    }
+    try:
+        import cv2
+        report['opencv'] = cv2.__version__
+    except ImportError:
+        pass
+
+    output = args.output or os.path.join(REPO_ROOT, 'benchmarks', 'results', f"scan_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh, indent=1)
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
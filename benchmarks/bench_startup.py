@@ -0,0 +1,107 @@
+"""
+Startup-time benchmark / regression guard.
+
+Launches the app (from source, or a PyInstaller build with --exe), waits for it to
+report its first painted window through the MAO_STARTUP_PROBE file, and prints the
+time to first paint. From source it also runs `python -X importtime` and lists the
+slowest imports.
+
+    python benchmarks/bench_startup.py [--runs 5] [--exe dist/MediaArchiveOrganizer_v2.exe]
+                                       [--max-seconds 3.0] [--top 15]
+
+Exits non-zero if the median exceeds --max-seconds, or if OpenCV/MediaPipe were
+imported before the window appeared (they must load lazily on first scan).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAUNCHER = os.path.join(REPO_ROOT, 'launcher.py')
+FORBIDDEN_AT_STARTUP = {'cv2', 'mediapipe'}
+
+
+def launch_once(cmd, timeout, extra_env=None):
+    """Run the app once; returns (seconds to first paint, probe dict, stderr text)."""
+    fd, probe_path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    os.remove(probe_path)
+
+    env = dict(os.environ, MAO_STARTUP_PROBE=probe_path, **(extra_env or {}))
+    start = time.time()
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    try:
+        _, stderr = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        raise RuntimeError(f"App did not report a painted window within {timeout}s")
+
+    if not os.path.exists(probe_path):
+        raise RuntimeError(f"App exited without writing the startup probe:\n{stderr[-2000:]}")
+    with open(probe_path, encoding='utf-8') as fh:
+        probe = json.load(fh)
+    os.remove(probe_path)
+    return probe['painted_at'] - start, probe, stderr
+
+
+def parse_importtime(stderr, top):
+    """Top-N modules by cumulative import time (microseconds) from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            # Nested imports are indented by two spaces per level; keep only direct ones
+            if name.startswith('  '):
+                continue
+            rows.append((int(cumulative_us), int(self_us), name.strip()))
+        except ValueError:
+            continue
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure time to first painted window.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--exe", default=None, help="Path to a PyInstaller build instead of running from source")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Fail if the median exceeds this")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list (source only)")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    cmd = [args.exe] if args.exe else [sys.executable, LAUNCHER]
+    times = []
+    leaked = set()
+    for i in range(args.runs):
+        elapsed, probe, _ = launch_once(cmd, args.timeout)
+        times.append(elapsed)
+        leaked |= FORBIDDEN_AT_STARTUP & set(probe.get('heavy_modules_loaded', []))
+        print(f"run {i + 1}: {elapsed:.3f}s")
+
+    median = statistics.median(times)
+    print(f"time to first paint: median {median:.3f}s, min {min(times):.3f}s, max {max(times):.3f}s")
+
+    if not args.exe:
+        _, _, stderr = launch_once([sys.executable, '-X', 'importtime', LAUNCHER], args.timeout)
+        print("\nslowest imports (cumulative ms, self ms):")
+        for cumulative, self_us, name in parse_importtime(stderr, args.top):
+            print(f"  {cumulative / 1000:9.1f} {self_us / 1000:9.1f}  {name}")
+
+    failed = False
+    if leaked:
+        print(f"FAIL: loaded before first paint: {', '.join(sorted(leaked))}")
+        failed = True
+    if args.max_seconds is not None and median > args.max_seconds:
+        print(f"FAIL: median {median:.3f}s exceeds {args.max_seconds:.3f}s")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,13 @@
+import sys
+import os
+import multiprocessing
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from core.cli import main
+
+if __name__ == "__main__":
+    # Required for the scanner's worker processes in frozen builds
+    multiprocessing.freeze_support()
+    sys.exit(main())
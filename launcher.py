@@ -1,5 +1,6 @@
 import sys
 import os
+import multiprocessing
 
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
@@ -7,5 +8,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 from ui.app import App
 
 if __name__ == "__main__":
+    # Required for the scanner's worker processes in the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
     app = App()
     app.mainloop()
@@ -0,0 +1,223 @@
+import json
+import os
+import platform
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2
+
+from core.cache import get_cache_dir
+
+# Face detector placements: name -> (cv2.dnn backend, target). Which ones work depends on the build and hardware.
+DNN_TARGETS = {
+    'cpu': (cv2.dnn.DNN_BACKEND_OPENCV, cv2.dnn.DNN_TARGET_CPU),
+    'opencl': (cv2.dnn.DNN_BACKEND_OPENCV, cv2.dnn.DNN_TARGET_OPENCL),
+    'opencl_fp16': (cv2.dnn.DNN_BACKEND_OPENCV, cv2.dnn.DNN_TARGET_OPENCL_FP16),
+    'cuda': (getattr(cv2.dnn, 'DNN_BACKEND_CUDA', -1), getattr(cv2.dnn, 'DNN_TARGET_CUDA', -1)),
+}
+
+# Bump when the measurement changes so machines re-tune
+TUNING_VERSION = 1
+# Images decoded for the benchmark, and scans with autotune on but fewer files than this don't tune
+DEFAULT_SAMPLE_SIZE = 24
+AUTOTUNE_MIN_FILES = 500
+# Files per worker task while measuring worker counts (small, so the sample spreads over every worker)
+_TUNE_CHUNK = 2
+
+
+def available_dnn_targets() -> List[str]:
+    """DNN_TARGETS usable on this machine, CPU first."""
+    names = ['cpu']
+    try:
+        if cv2.ocl.haveOpenCL():
+            names += ['opencl', 'opencl_fp16']
+    except Exception:
+        pass
+    try:
+        if DNN_TARGETS['cuda'][0] >= 0 and cv2.cuda.getCudaEnabledDeviceCount() > 0:
+            names.append('cuda')
+    except Exception:
+        pass
+    return names
+
+
+def default_dnn_target() -> str:
+    # Before tuning: OpenCL when present (the historical default), else plain CPU
+    return 'opencl' if 'opencl' in available_dnn_targets() else 'cpu'
+
+
+def machine_key() -> str:
+    """Identifies the hardware/OpenCV combination a tuning result is valid for."""
+    return f"{platform.node()}|{platform.machine()}|{os.cpu_count()}|opencv {cv2.__version__}|v{TUNING_VERSION}"
+
+
+def _tuning_key(long_edge: int, batch_size: int) -> str:
+    # Detection resolution and batch size change which placement is fastest, so each has its own result
+    return f"{machine_key()}|long_edge {long_edge}|batch {batch_size}"
+
+
+def _tuning_path() -> str:
+    return os.path.join(get_cache_dir(), "autotune.json")
+
+
+def load_tuning(long_edge: int, batch_size: int) -> Optional[Dict[str, Any]]:
+    """Cached tuning result for this machine at this detection resolution and batch size, or None."""
+    try:
+        with open(_tuning_path(), "r", encoding="utf-8") as fh:
+            return json.load(fh).get(_tuning_key(long_edge, batch_size))
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def save_tuning(result: Dict[str, Any]):
+    path = _tuning_path()
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        data = {}
+    data[_tuning_key(result['long_edge'], result['batch_size'])] = result
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=1)
+    os.replace(tmp, path)
+
+
+def _powers_of_two_up_to(n: int) -> List[int]:
+    counts = []
+    c = 1
+    while c < n:
+        counts.append(c)
+        c *= 2
+    counts.append(n)
+    return counts
+
+
+class Autotuner:
+    """
+    Finds the fastest face-detector placement for this machine on a small sample of real images:
+
+    1. every available DNN target (CPU, OpenCL, OpenCL FP16, CUDA), rejecting any whose verdicts
+       differ from CPU on the sample,
+    2. OpenCV thread counts (1, 2, 4, ... cores) for the winning target,
+    3. single-process scanning with those threads vs 2, 4, ... worker processes with one thread each.
+
+    Single-process throughput is modelled as max(decode, detect) per image, since the threaded
+    pipeline overlaps the two. MediaPipe's animal detector has no thread setting to tune.
+    """
+
+    def __init__(self, engine, logger: Optional[Callable[[str], None]] = None):
+        self.engine = engine
+        self.logger = logger or engine.logger
+
+    def run(self, files: List[str], sample_size: int = DEFAULT_SAMPLE_SIZE) -> Optional[Dict[str, Any]]:
+        """Benchmark on up to sample_size images from files; saves and returns the result (None if no usable sample)."""
+        cpu_count = os.cpu_count() or 1
+        sample, decode_s = self._decode_sample(files, sample_size)
+        if len(sample) < 2:
+            self.logger("Autotune: not enough readable images to benchmark.")
+            return None
+        self.logger(f"Autotune: benchmarking on {len(sample)} images...")
+        started = time.time()
+        previous_threads = cv2.getNumThreads()
+        try:
+            measured = {'targets': {}, 'threads': {}, 'workers': {}}
+
+            reference = None
+            for name in available_dnn_targets():
+                timing = self._time_detect(name, sample, cpu_count)
+                if timing is None:
+                    continue
+                seconds, verdicts = timing
+                if reference is None:
+                    reference = verdicts
+                elif verdicts != reference:
+                    self.logger(f"Autotune: {name} disagrees with CPU on the sample; skipped.")
+                    continue
+                measured['targets'][name] = round(len(sample) / seconds, 2)
+            if not measured['targets']:
+                return None
+            target = max(measured['targets'], key=measured['targets'].get)
+
+            for threads in _powers_of_two_up_to(cpu_count):
+                timing = self._time_detect(target, sample, threads)
+                if timing:
+                    measured['threads'][str(threads)] = round(len(sample) / timing[0], 2)
+            threads = int(max(measured['threads'], key=measured['threads'].get))
+            detect_s = len(sample) / measured['threads'][str(threads)]
+            measured['workers']['1'] = round(len(sample) / max(decode_s, detect_s), 2)
+
+            for workers in _powers_of_two_up_to(cpu_count)[1:]:
+                rate = self._time_workers(target, [f for f, _ in sample], workers)
+                if rate:
+                    measured['workers'][str(workers)] = round(rate, 2)
+            workers = int(max(measured['workers'], key=measured['workers'].get))
+        finally:
+            cv2.setNumThreads(previous_threads)
+
+        result = {
+            'dnn_target': target, 'num_threads': threads, 'workers': workers,
+            'images_per_s': measured['workers'][str(workers)], 'measured': measured,
+            'sample': len(sample), 'long_edge': self.engine.detect_long_edge, 'batch_size': self.engine.batch_size,
+            'tuned_at': time.strftime('%Y-%m-%d %H:%M:%S'), 'tune_s': round(time.time() - started, 1),
+        }
+        save_tuning(result)
+        self.logger(f"Autotune: {target}, {threads} thread(s), {workers} worker(s) "
+                    f"-> {result['images_per_s']:.1f} images/s ({result['tune_s']:.0f}s).")
+        return result
+
+    def _decode_sample(self, files: List[str], sample_size: int) -> Tuple[List[Tuple[str, Any]], float]:
+        # Evenly spaced over the file list, so one folder of thumbnails doesn't skew the sample
+        images = [f for f in files if not self.engine._is_video(f)]
+        step = max(1, len(images) // max(1, sample_size))
+        sample = []
+        start = time.perf_counter()
+        for f_path in images[::step][:sample_size]:
+            image, scale = self.engine._load_image(f_path)
+            if image is not None:
+                sample.append((f_path, image))
+        return sample, time.perf_counter() - start
+
+    def _time_detect(self, target: str, sample, threads: int) -> Optional[Tuple[float, List[bool]]]:
+        """(seconds to detect faces in the whole sample, per-image has-face verdicts), or None if the target fails."""
+        engine = self.engine
+        cv2.setNumThreads(threads)
+        try:
+            detector = engine._init_opencv_face(target)
+            images = [image for _, image in sample]
+            # Warm-up: first-run kernel compilation (OpenCL) and allocation
+            self._detect(detector, images[:1])
+            start = time.perf_counter()
+            faces = self._detect(detector, images)
+            seconds = time.perf_counter() - start
+        except Exception as e:
+            self.logger(f"Autotune: {target} unavailable ({e}).")
+            return None
+        return seconds, [engine._has_face(f) for f in faces]
+
+    def _detect(self, detector, images) -> List[list]:
+        if self.engine.batch_size > 1:
+            return detector.detect_batch(images)
+        return [self.engine._detect_faces_opencv(detector, image) for image in images]
+
+    def _time_workers(self, target: str, paths: List[str], workers: int) -> Optional[float]:
+        """Images/s of `workers` processes (decode + detect) once every worker is initialized."""
+        from core.scanner import WORKER_MP_CONTEXT, _worker_init, _worker_analyze
+
+        settings = self.engine._worker_settings()
+        settings['dnn_target'] = target
+        settings['profile_path'] = None
+        chunks = [list(enumerate(paths[i:i + _TUNE_CHUNK])) for i in range(0, len(paths), _TUNE_CHUNK)]
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init, mp_context=WORKER_MP_CONTEXT,
+                                     initargs=(False, settings)) as pool:
+                # Warm-up: one task per worker, so process start and model loading aren't timed
+                wait([pool.submit(_worker_analyze, chunks[0], False) for _ in range(workers)])
+                start = time.perf_counter()
+                wait([pool.submit(_worker_analyze, chunk, False) for chunk in chunks])
+                seconds = time.perf_counter() - start
+        except Exception as e:
+            self.logger(f"Autotune: {workers} workers failed ({e}).")
+            return None
+        return len(paths) / seconds if seconds > 0 else None
@@ -0,0 +1,107 @@
+import ctypes
+import os
+import queue
+import sys
+import threading
+from collections import deque
+from typing import Any, Optional, Tuple
+
+# Share of currently available RAM the decoded-image buffer may use by default, and its bounds
+DEFAULT_BUDGET_FRACTION = 0.125
+MIN_BUDGET_BYTES = 64 * 2 ** 20
+MAX_BUDGET_BYTES = 2 * 2 ** 30
+# Used when available memory can't be determined
+FALLBACK_BUDGET_BYTES = 256 * 2 ** 20
+
+
+def available_memory() -> Optional[int]:
+    """Physical memory currently available to new allocations, in bytes (None if unknown)."""
+    try:
+        if sys.platform == 'win32':
+            class MemoryStatusEx(ctypes.Structure):
+                _fields_ = [('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                            ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                            ('ullTotalPageFile', ctypes.c_ulonglong), ('ullAvailPageFile', ctypes.c_ulonglong),
+                            ('ullTotalVirtual', ctypes.c_ulonglong), ('ullAvailVirtual', ctypes.c_ulonglong),
+                            ('ullAvailExtendedVirtual', ctypes.c_ulonglong)]
+            status = MemoryStatusEx()
+            status.dwLength = ctypes.sizeof(MemoryStatusEx)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return int(status.ullAvailPhys)
+            return None
+
+        # Linux: MemAvailable counts reclaimable page cache, unlike SC_AVPHYS_PAGES
+        if os.path.exists('/proc/meminfo'):
+            with open('/proc/meminfo') as fh:
+                for line in fh:
+                    if line.startswith('MemAvailable:'):
+                        return int(line.split()[1]) * 1024
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def default_budget() -> int:
+    """Byte budget for buffered decoded images: a share of available RAM, clamped to sane bounds."""
+    available = available_memory()
+    if not available:
+        return FALLBACK_BUDGET_BYTES
+    return int(min(MAX_BUDGET_BYTES, max(MIN_BUDGET_BYTES, available * DEFAULT_BUDGET_FRACTION)))
+
+
+class ByteBudgetQueue:
+    """
+    FIFO queue bounded by the bytes it holds rather than its item count.
+
+    put() blocks while adding the item would exceed max_bytes. Bytes stay charged after get()
+    until the consumer calls release() - i.e. they count while the image is in flight, not just
+    while it sits in the queue. An item larger than the whole budget is still admitted when
+    nothing else is in flight, so it can never deadlock.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max(1, int(max_bytes))
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._bytes = 0
+        self._peak = 0
+
+    @property
+    def buffered_bytes(self) -> int:
+        return self._bytes
+
+    @property
+    def peak_bytes(self) -> int:
+        return self._peak
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def put(self, item: Any, nbytes: int = 0, stop_event: Optional[threading.Event] = None) -> bool:
+        """Enqueue item charging nbytes. Returns False (item dropped) if stop_event got set while blocked."""
+        with self._cond:
+            while self._bytes and self._bytes + nbytes > self.max_bytes:
+                if stop_event is not None and stop_event.is_set():
+                    return False
+                self._cond.wait(0.1)
+            self._bytes += nbytes
+            self._peak = max(self._peak, self._bytes)
+            self._items.append(item)
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """Dequeue the oldest item; raises queue.Empty after timeout. Its bytes stay charged until release()."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout):
+                raise queue.Empty
+            return self._items.popleft()
+
+    def release(self, nbytes: int):
+        with self._cond:
+            self._bytes = max(0, self._bytes - nbytes)
+            self._cond.notify_all()
+
+    def stats(self) -> Tuple[int, int, int]:
+        """(buffered bytes, peak buffered bytes, budget)."""
+        return self._bytes, self._peak, self.max_bytes
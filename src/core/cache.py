@@ -0,0 +1,184 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Optional, Tuple, Dict, Any
+
+# Bump when the stored detection format (or the models producing it) changes.
+CACHE_SCHEMA_VERSION = 2
+
+DEFAULT_MAX_ENTRIES = 500_000
+
+# Bytes hashed from each end of a file when content hashing is enabled.
+HASH_BLOCK = 64 * 1024
+
+
+def get_cache_dir() -> str:
+    """
+    Per-user cache directory for the app.
+    Windows: %LOCALAPPDATA%/MediaArchiveOrganizer, elsewhere: $XDG_CACHE_HOME (or ~/.cache)/media_archive_organizer
+    """
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        path = os.path.join(base, "MediaArchiveOrganizer")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        path = os.path.join(base, "media_archive_organizer")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def quick_content_hash(file_path: str, size: int) -> str:
+    """BLAKE2b of the first and last 64KB plus the size. Cheap identity check, not a full-file hash."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(size.to_bytes(8, "little"))
+    with open(file_path, "rb") as fh:
+        h.update(fh.read(HASH_BLOCK))
+        if size > HASH_BLOCK * 2:
+            fh.seek(-HASH_BLOCK, os.SEEK_END)
+            h.update(fh.read(HASH_BLOCK))
+    return h.hexdigest()
+
+
+class DetectionCache:
+    """
+    SQLite store of raw detector outputs, keyed by file identity (path, size, mtime, optional content hash).
+
+    A record is {'faces': [[x, y, w, h, score], ...], 'animals': [[label, score], ...] or None},
+    stored together with the score floors the detectors ran at and a `params` string describing
+    anything else that changes their output (e.g. detection resolution). Verdicts are NOT stored,
+    so thresholds and label sets can change and be re-applied without running inference again.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES, hash_content: bool = False):
+        self.db_path = db_path or os.path.join(get_cache_dir(), "detections.sqlite3")
+        self.max_entries = max_entries
+        self.hash_content = hash_content
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._pending_writes = 0
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != CACHE_SCHEMA_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS detections")
+            self._conn.execute(f"PRAGMA user_version={CACHE_SCHEMA_VERSION}")
+
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS detections (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT,
+                params TEXT NOT NULL,
+                face_floor REAL NOT NULL,
+                animal_floor REAL,
+                faces TEXT NOT NULL,
+                animals TEXT,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_detections_last_used ON detections(last_used)")
+        self._conn.commit()
+
+    def identity(self, file_path: str, known: Optional[Tuple[int, int]] = None) -> Optional[Tuple[int, int, Optional[str]]]:
+        """
+        (size, mtime_ns, content_hash) for a file, or None if it can't be stat'ed.
+        known: (size, mtime_ns) already read (e.g. from a directory listing), saving the stat.
+        """
+        try:
+            size, mtime_ns = known if known else (lambda st: (st.st_size, st.st_mtime_ns))(os.stat(file_path))
+            content_hash = quick_content_hash(file_path, size) if self.hash_content else None
+        except OSError:
+            return None
+        return size, mtime_ns, content_hash
+
+    def get(self, file_path: str, identity: Tuple[int, int, Optional[str]], face_floor: float, animal_floor: float,
+            params: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Cached record for this exact file version, or None.
+        Entries recorded at a higher score floor than requested are treated as misses,
+        since detections below their floor were never stored.
+        """
+        size, mtime_ns, content_hash = identity
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, content_hash, face_floor, animal_floor, faces, animals, params FROM detections WHERE path = ?",
+                (file_path,)
+            ).fetchone()
+
+        if (row is None or row[0] != size or row[1] != mtime_ns
+                or (self.hash_content and row[2] != content_hash)
+                or row[3] > face_floor or row[7] != params):
+            self.misses += 1
+            return None
+
+        animals = json.loads(row[6]) if row[6] is not None else None
+        if animals is not None and row[4] is not None and row[4] > animal_floor:
+            animals = None
+
+        with self._lock:
+            self._conn.execute("UPDATE detections SET last_used = ? WHERE path = ?", (time.time(), file_path))
+            self._pending_writes += 1
+
+        self.hits += 1
+        return {'faces': json.loads(row[5]), 'animals': animals}
+
+    def put(self, file_path: str, identity: Tuple[int, int, Optional[str]], record: Dict[str, Any], face_floor: float, animal_floor: float,
+            params: str = ""):
+        size, mtime_ns, content_hash = identity
+        animals = record.get('animals')
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO detections VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (file_path, size, mtime_ns, content_hash, params, face_floor,
+                 animal_floor if animals is not None else None,
+                 json.dumps(record['faces']), json.dumps(animals) if animals is not None else None,
+                 time.time())
+            )
+            self._pending_writes += 1
+            if self._pending_writes >= 500:
+                self._commit_locked()
+
+    def flush(self):
+        """Commit pending writes and evict least-recently-used entries beyond max_entries."""
+        with self._lock:
+            self._commit_locked()
+            count = self._conn.execute("SELECT COUNT(*) FROM detections").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM detections WHERE path IN (SELECT path FROM detections ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                )
+                self._conn.commit()
+
+    def invalidate(self, path_prefix: Optional[str] = None) -> int:
+        """Drop every entry, or only those under `path_prefix`. Returns the number removed."""
+        with self._lock:
+            if path_prefix is None:
+                cur = self._conn.execute("DELETE FROM detections")
+            else:
+                prefix = os.path.join(os.path.abspath(path_prefix), "")
+                escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                cur = self._conn.execute("DELETE FROM detections WHERE path LIKE ? ESCAPE '\\'", (escaped + "%",))
+            self._conn.commit()
+            self._pending_writes = 0
+            return cur.rowcount
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def _commit_locked(self):
+        if self._pending_writes:
+            self._conn.commit()
+            self._pending_writes = 0
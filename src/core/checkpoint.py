@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from core.cache import get_cache_dir
+
+# Bump when the journal line format changes; older journals are then ignored.
+JOURNAL_VERSION = 1
+
+# Appended verdicts are flushed (and fsync'ed) at least this often, so a crash or reboot
+# loses at most about this many seconds of work.
+FLUSH_INTERVAL = 2.0
+
+
+def journal_path(root: str) -> str:
+    """Journal file for a scan root: one per folder, under the app's cache directory."""
+    key = os.path.normcase(os.path.abspath(root))
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=10).hexdigest()
+    folder = os.path.join(get_cache_dir(), "scan_journals")
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"{digest}.jsonl")
+
+
+class ScanJournal:
+    """
+    Append-only checkpoint of a folder scan, so a cancelled or crashed scan can be resumed.
+
+    The first line is a JSON header with the scan root and the settings that decide verdicts;
+    each further line is one classified file: [relative path, size, mtime_ns, excluded, faces].
+    A journal only resumes a scan with identical settings, and only for files whose size and
+    mtime are unchanged. A torn last line (crash mid-write) is simply skipped.
+    """
+
+    def __init__(self, root: str, settings: Dict[str, Any]):
+        self.root = os.path.abspath(root)
+        self.settings = settings
+        self.path = journal_path(self.root)
+        self._fh = None
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        self.appended = 0
+
+    @staticmethod
+    def peek(root: str) -> Optional[Dict[str, Any]]:
+        """Header of an unfinished scan of root ('settings', 'started', plus 'entries'), or None."""
+        try:
+            path = journal_path(root)
+            if not os.path.exists(path):
+                return None
+            with open(path, "r", encoding="utf-8") as fh:
+                header = json.loads(fh.readline())
+                entries = sum(1 for _ in fh)
+        except (OSError, ValueError):
+            return None
+        if header.get("v") != JOURNAL_VERSION:
+            return None
+        header["entries"] = entries
+        return header
+
+    def start(self, resume: bool) -> Dict[str, Tuple[int, int, bool, int]]:
+        """
+        Open the journal for appending. With resume, returns the verdicts already recorded by a
+        previous scan with the same settings ({relative path: (size, mtime_ns, excluded, faces)});
+        otherwise (or when the settings differ) the journal is started afresh and {} is returned.
+        """
+        entries = self._load() if resume else None
+        if entries is None:
+            self._fh = open(self.path, "w", encoding="utf-8")
+            header = {"v": JOURNAL_VERSION, "root": self.root, "settings": self.settings, "started": time.time()}
+            self._fh.write(json.dumps(header) + "\n")
+            self._sync()
+            return {}
+        self._fh = open(self.path, "a", encoding="utf-8")
+        return entries
+
+    def _load(self) -> Optional[Dict[str, Tuple[int, int, bool, int]]]:
+        entries = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                header = json.loads(fh.readline())
+                if header.get("v") != JOURNAL_VERSION or header.get("settings") != self.settings:
+                    return None
+                for line in fh:
+                    try:
+                        rel, size, mtime_ns, excluded, faces = json.loads(line)
+                    except ValueError:
+                        continue
+                    entries[rel] = (size, mtime_ns, bool(excluded), faces)
+        except (OSError, ValueError):
+            return None
+        return entries
+
+    def relative(self, f_path: str) -> str:
+        return os.path.relpath(f_path, self.root)
+
+    def append(self, f_path: str, size: int, mtime_ns: int, excluded: bool, faces: int):
+        line = json.dumps([self.relative(f_path), size, mtime_ns, int(excluded), faces], separators=(",", ":"))
+        with self._lock:
+            if self._fh is None:
+                return
+            self._fh.write(line + "\n")
+            self.appended += 1
+            if time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+                self._sync()
+
+    def _sync(self):
+        self._fh.flush()
+        try:
+            os.fsync(self._fh.fileno())
+        except OSError:
+            pass
+        self._last_flush = time.monotonic()
+
+    def close(self, completed: bool):
+        """Finish the journal. A completed scan has nothing left to resume, so its journal is deleted."""
+        with self._lock:
+            if self._fh is None:
+                return
+            self._sync()
+            self._fh.close()
+            self._fh = None
+        if completed:
+            self.discard()
+
+    def discard(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,472 @@
+"""
+Headless command-line interface for the scanner and organizer engines.
+
+    python -m cli scan <folder> [--keep-animals] [--no-subfolders] [--workers N] [--resume] ...
+    python -m cli organize <folder> [--execute] [--flat-folders] [--save-plan FILE | --from-plan FILE]
+    python -m cli watch <folder> [--scan] [--organize [--execute]]
+    python -m cli tune <folder> [--sample N]
+    python -m cli similar <folder> [--radius N]
+    python -m cli cache invalidate [folder]
+    python -m cli journal list [folder] | undo [ID] | recover [--rollback]
+
+Prints one JSON object per file on stdout followed by a summary object (and an
+error object, with exit code 1, if the run failed); log messages go to stderr. Never imports customtkinter/Tk.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+
+def _emit(obj):
+    sys.stdout.write(json.dumps(obj) + "\n")
+    sys.stdout.flush()
+
+
+def _make_logger(quiet: bool):
+    if quiet:
+        return lambda msg: None
+    return lambda msg: print(msg, file=sys.stderr, flush=True)
+
+
+def _run_cancellable(engine, target):
+    """
+    Run target() on a worker thread so Ctrl+C can cancel the engine cleanly.
+    Returns {'value': ...} or {'error': exception}, plus 'cancelled' if interrupted.
+    """
+    result = {}
+
+    def run():
+        try:
+            result['value'] = target()
+        except Exception as e:
+            result['error'] = e
+
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    try:
+        while worker.is_alive():
+            worker.join(0.2)
+    except KeyboardInterrupt:
+        engine.cancel()
+        worker.join()
+        result['cancelled'] = True
+    return result
+
+
+def _exit_code(command: str, outcome: dict) -> int:
+    """130 if the run was cancelled; 1, after an error object, if it raised; else 0."""
+    error = outcome.get('error')
+    if error is not None:
+        print(f"Error: {command} failed: {error}", file=sys.stderr)
+        _emit({'type': 'error', 'command': command, 'error': f"{type(error).__name__}: {error}"})
+        return 1
+    return 130 if outcome.get('cancelled') else 0
+
+
+def cmd_scan(args) -> int:
+    from core.scanner import ScannerEngine
+
+    if not os.path.isdir(args.folder):
+        print(f"Error: Directory not found: {args.folder}", file=sys.stderr)
+        return 2
+
+    engine = ScannerEngine(_make_logger(args.quiet))
+    if args.long_edge is not None:
+        engine.detect_long_edge = args.long_edge
+    if args.batch_size is not None:
+        engine.batch_size = args.batch_size
+    if args.face_threshold is not None:
+        engine.face_threshold = args.face_threshold
+    if args.animal_threshold is not None:
+        engine.animal_threshold = args.animal_threshold
+    engine.cascade = args.cascade
+    if args.cascade_confident is not None:
+        engine.cascade_confident = args.cascade_confident
+    engine.adaptive = args.adaptive
+    engine.scan_videos = args.videos
+    if args.video_frames is not None:
+        engine.video_frames = args.video_frames
+    if args.video_budget is not None:
+        engine.video_time_budget = args.video_budget
+    engine.profile_path = args.profile
+    if args.buffer_mb is not None:
+        engine.queue_budget_bytes = int(args.buffer_mb * 2 ** 20)
+    if args.escalation_edges:
+        engine.escalation_edges = args.escalation_edges
+    if args.tile_size is not None:
+        engine.tile_size = args.tile_size
+    if args.tile_overlap is not None:
+        engine.tile_overlap = args.tile_overlap
+    if args.tile_min_edge is not None:
+        engine.tile_min_edge = args.tile_min_edge
+    if args.dnn_target != 'auto':
+        engine.dnn_target = args.dnn_target
+    engine.num_threads = args.threads
+    engine.autotune = args.autotune
+
+    counts = {'keep': 0, 'move': 0}
+
+    def stream():
+        # Emit each result as soon as it is classified
+        for result in engine.iter_scan(args.folder, include_subfolders=not args.no_subfolders,
+                                       keep_animals=args.keep_animals, workers=args.workers,
+                                       use_cache=not args.no_cache, resume=args.resume):
+            counts[result.verdict] += 1
+            _emit({'type': 'file', 'file': result.path, 'verdict': result.verdict,
+                   'faces': result.face_count, 'cached': result.from_cache})
+
+    start = time.time()
+    outcome = _run_cancellable(engine, stream)
+    elapsed = time.time() - start
+
+    classified = counts['keep'] + counts['move']
+    summary = {
+        'type': 'summary', 'command': 'scan', 'folder': os.path.abspath(args.folder),
+        'keep': counts['keep'], 'move': counts['move'],
+        'cancelled': bool(outcome.get('cancelled')) or engine.stop_event.is_set(),
+        'elapsed_s': round(elapsed, 3), 'images_per_s': round(classified / elapsed, 2) if elapsed > 0 else None,
+    }
+    if args.resume:
+        summary['resumed'] = engine.resumed_count
+    summary['placement'] = {'dnn_target': engine._resolved_dnn_target(), 'num_threads': engine._resolved_num_threads(),
+                            'workers': args.workers or engine.tuned_workers(), 'tuned': bool(engine.tuning)}
+    if args.cascade:
+        summary['cascade'] = dict(engine.cascade_stats)
+    if args.adaptive:
+        summary['adaptive'] = dict(engine.adaptive_stats)
+    if args.videos:
+        summary['videos'] = dict(engine.video_stats)
+    summary['timings'] = engine.stats.to_dict()
+    if engine._img_queue:
+        summary['buffer'] = {'peak_bytes': engine.peak_buffered_bytes, 'budget_bytes': engine._img_queue.max_bytes}
+    _emit(summary)
+    return _exit_code('scan', outcome)
+
+
+def cmd_organize(args) -> int:
+    from core.move_plan import MovePlan
+    from core.organizer import OrganizerEngine
+
+    if not os.path.isdir(args.folder):
+        print(f"Error: Directory not found: {args.folder}", file=sys.stderr)
+        return 2
+    plan = None
+    if args.from_plan:
+        try:
+            plan = MovePlan.load(args.from_plan)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Error: Could not read plan {args.from_plan}: {e}", file=sys.stderr)
+            return 2
+        if plan.source_dir != os.path.abspath(args.folder):
+            print(f"Error: The plan is for {plan.source_dir}, not {os.path.abspath(args.folder)}", file=sys.stderr)
+            return 2
+
+    engine = OrganizerEngine(_make_logger(args.quiet))
+    engine.profile_path = args.profile
+    if args.date_workers is not None:
+        engine.date_workers = args.date_workers
+    if args.copy_workers is not None:
+        engine.copy_workers = max(1, args.copy_workers)
+
+    def on_result(result):
+        _emit(dict(type='file', **result))
+
+    start = time.time()
+    if plan is None:
+        outcome = _run_cancellable(engine, lambda: engine.organize(
+            args.folder, dry_run=not args.execute, use_flat_folders=args.flat_folders, result_callback=on_result))
+    elif args.execute:
+        outcome = _run_cancellable(engine, lambda: engine.execute(plan, result_callback=on_result))
+    else:
+        # Show the saved plan as the dry run it came from
+        for move in plan.moves:
+            on_result({'file': move.source, 'action': 'dry_run' if move.action == 'move' else move.action,
+                       'target': move.target, 'date': move.date.isoformat() if move.date else None})
+        outcome = {'value': {'processed': len(plan.moves), 'moved': len(plan.pending()),
+                             'duplicates': sum(1 for m in plan.moves if m.action == 'duplicate')}}
+    elapsed = time.time() - start
+    if (args.save_plan and plan is None and engine.last_plan is not None
+            and not outcome.get('cancelled') and 'error' not in outcome):
+        engine.last_plan.save(args.save_plan)
+
+    counts = outcome.get('value') or {}
+    processed = counts.get('processed', 0)
+    _emit({
+        'type': 'summary', 'command': 'organize', 'folder': os.path.abspath(args.folder),
+        'dry_run': not args.execute, 'processed': processed,
+        'moved': counts.get('moved', 0), 'duplicates': counts.get('duplicates', 0),
+        'cancelled': bool(outcome.get('cancelled')) or engine.cancel_flag,
+        'elapsed_s': round(elapsed, 3), 'files_per_s': round(processed / elapsed, 2) if elapsed > 0 else None,
+        'timings': engine.stats.to_dict(),
+    })
+    return _exit_code('organize', outcome)
+
+
+def cmd_watch(args) -> int:
+    from core.organizer import MEDIA_EXTS, OrganizerEngine
+    from core.scanner import ScannerEngine
+    from core.watcher import MediaWatcher
+
+    if not os.path.isdir(args.folder):
+        print(f"Error: Directory not found: {args.folder}", file=sys.stderr)
+        return 2
+    if not (args.scan or args.organize):
+        print("Error: Nothing to do; pass --scan and/or --organize.", file=sys.stderr)
+        return 2
+
+    log = _make_logger(args.quiet)
+    # One engine each for the whole session: detectors are loaded on the first batch and reused
+    scanner = None
+    exts = set()
+    if args.scan:
+        scanner = ScannerEngine(log)
+        scanner.scan_videos = args.videos
+        exts |= scanner.scan_extensions()
+    organizer = OrganizerEngine(log) if args.organize else None
+    if organizer:
+        exts |= MEDIA_EXTS
+
+    totals = {'batches': 0, 'files': 0, 'keep': 0, 'move': 0, 'moved': 0, 'duplicates': 0}
+    watcher = None
+
+    def on_files(paths):
+        totals['batches'] += 1
+        totals['files'] += len(paths)
+        log(f"{len(paths)} new file(s).")
+        if scanner:
+            for result in scanner.iter_scan_files(paths, keep_animals=args.keep_animals, workers=1):
+                totals[result.verdict] += 1
+                _emit({'type': 'file', 'stage': 'scan', 'file': result.path, 'verdict': result.verdict,
+                       'faces': result.face_count, 'cached': result.from_cache})
+        if organizer:
+            def on_result(result):
+                if result.get('target') and result['action'] == 'move':
+                    watcher.ignore([result['target']])  # Our own move into the tree is not a new arrival
+                _emit(dict(type='file', stage='organize', **result))
+
+            counts = organizer.organize_files(args.folder, paths, dry_run=not args.execute,
+                                              use_flat_folders=args.flat_folders, result_callback=on_result) or {}
+            totals['moved'] += counts.get('moved', 0)
+            totals['duplicates'] += counts.get('duplicates', 0)
+
+    watcher = MediaWatcher(args.folder, exts, on_files, log, settle_seconds=args.settle,
+                           poll_interval=args.interval, use_inotify=not args.poll)
+    start = time.time()
+    thread = threading.Thread(target=watcher.run, daemon=True)
+    thread.start()
+    cancelled = False
+    try:
+        while thread.is_alive():
+            thread.join(0.2)
+    except KeyboardInterrupt:
+        cancelled = True
+        watcher.stop()
+        if scanner:
+            scanner.cancel()
+        if organizer:
+            organizer.cancel()
+        thread.join()
+
+    _emit(dict(type='summary', command='watch', folder=os.path.abspath(args.folder), mode=watcher.mode,
+               dry_run=bool(organizer) and not args.execute, elapsed_s=round(time.time() - start, 3), **totals))
+    return 130 if cancelled else 0
+
+
+def cmd_tune(args) -> int:
+    from core.scanner import ScannerEngine
+
+    if not os.path.isdir(args.folder):
+        print(f"Error: Directory not found: {args.folder}", file=sys.stderr)
+        return 2
+
+    engine = ScannerEngine(_make_logger(args.quiet))
+    if args.long_edge is not None:
+        engine.detect_long_edge = args.long_edge
+    if args.batch_size is not None:
+        engine.batch_size = args.batch_size
+    files = engine._collect_files(args.folder, include_subfolders=True)
+    result = engine.tune(files, args.sample)
+    _emit({'type': 'summary', 'command': 'tune', 'folder': os.path.abspath(args.folder), 'result': result})
+    return 0 if result else 1
+
+
+def cmd_similar(args) -> int:
+    from core.similar import DEFAULT_HASH_WORKERS, DEFAULT_RADIUS, SimilarImageFinder
+
+    if not os.path.isdir(args.folder):
+        print(f"Error: Directory not found: {args.folder}", file=sys.stderr)
+        return 2
+
+    radius = DEFAULT_RADIUS if args.radius is None else args.radius
+    finder = SimilarImageFinder(_make_logger(args.quiet), radius=radius, workers=args.workers or DEFAULT_HASH_WORKERS,
+                                use_cache=not args.no_cache)
+    start = time.time()
+    outcome = _run_cancellable(finder, lambda: finder.find_groups(args.folder, include_subfolders=not args.no_subfolders))
+    elapsed = time.time() - start
+
+    groups = outcome.get('value') or []
+    for number, group in enumerate(groups, 1):
+        _emit({'type': 'group', 'group': number, 'keep': group[0], 'similar': group[1:]})
+    _emit({
+        'type': 'summary', 'command': 'similar', 'folder': os.path.abspath(args.folder), 'radius': radius,
+        'groups': len(groups), 'redundant': sum(len(g) - 1 for g in groups),
+        'cancelled': bool(outcome.get('cancelled')), 'elapsed_s': round(elapsed, 3),
+        'timings': finder.stats.to_dict(),
+    })
+    return _exit_code('similar', outcome)
+
+
+def cmd_cache(args) -> int:
+    from core.cache import DetectionCache
+
+    cache = DetectionCache()
+    removed = cache.invalidate(args.folder)
+    cache.close()
+    _emit({'type': 'summary', 'command': 'cache invalidate', 'folder': args.folder, 'removed': removed})
+    return 0
+
+
+def cmd_journal(args) -> int:
+    from core.move_journal import MoveJournal, interrupted_journals, last_undoable, list_journals
+
+    log = _make_logger(args.quiet)
+    folder = getattr(args, 'folder', None)
+    if args.journal_command == 'list':
+        for journal in list_journals(folder):
+            state = 'interrupted' if not journal.ended else 'undone' if journal.undone else 'finished'
+            _emit({'type': 'journal', 'id': journal.id, 'kind': journal.kind, 'root': journal.root,
+                   'started': journal.header.get('started'), 'moved': journal.moved_count, 'state': state})
+        return 0
+
+    if args.journal_command == 'undo':
+        if args.id:
+            journal = next((j for j in list_journals() if j.id == args.id), None)
+        else:
+            journal = last_undoable(folder)
+        if journal is None or journal.undone:
+            print("Error: No run to undo." if journal is None else f"Error: Run {journal.id} was already undone.",
+                  file=sys.stderr)
+            return 2
+        counts = journal.undo(log)
+        _emit(dict(type='summary', command='journal undo', id=journal.id, root=journal.root, **counts))
+        return 0
+
+    # recover
+    totals = {'runs': 0, 'moved': 0, 'restored': 0, 'skipped': 0}
+    for journal in interrupted_journals(folder):
+        log(f"{'Rolling back' if args.rollback else 'Finishing'} interrupted run {journal.id} ({journal.root})...")
+        counts = journal.recover(args.rollback, log)
+        totals['runs'] += 1
+        for key, value in counts.items():
+            totals[key] += value
+    _emit(dict(type='summary', command='journal recover', rollback=args.rollback, **totals))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    from version import __version__, APP_NAME
+
+    parser = argparse.ArgumentParser(prog="cli", description=f"{APP_NAME} {__version__} (headless)")
+    parser.add_argument("--quiet", action="store_true", help="Suppress log messages on stderr")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    scan = sub.add_parser("scan", help="AI scan: split a folder into Keep (people/animals) and Move (other)")
+    scan.add_argument("folder")
+    scan.add_argument("--keep-animals", action="store_true", help="Treat photos of animals like photos of people (Keep)")
+    scan.add_argument("--no-subfolders", action="store_true", help="Only scan the top-level folder")
+    scan.add_argument("--workers", type=int, default=None, help="Worker processes (1 = single process; default: autotuned)")
+    scan.add_argument("--no-cache", action="store_true", help="Ignore and don't update the detection cache")
+    scan.add_argument("--resume", action="store_true", help="Continue an unfinished scan of this folder from its checkpoint")
+    scan.add_argument("--long-edge", type=int, default=None, help="Detection resolution, long edge in pixels (0 = full size)")
+    scan.add_argument("--batch-size", type=int, default=None, help="Images per face-detector forward pass")
+    scan.add_argument("--face-threshold", type=float, default=None)
+    scan.add_argument("--animal-threshold", type=float, default=None)
+    scan.add_argument("--cascade", action="store_true", help="Try EXIF thumbnails / tiny decodes first; full decode only when needed")
+    scan.add_argument("--cascade-confident", type=float, default=None, help="Stage-one face score that skips the full decode")
+    scan.add_argument("--adaptive", action="store_true", help="Coarse-to-fine detection: escalate resolution, then tiles, until a face is found")
+    scan.add_argument("--escalation-edges", type=int, nargs="+", default=None, help="Long edges tried in order with --adaptive (0 = full size)")
+    scan.add_argument("--tile-size", type=int, default=None, help="Tile size in pixels for the last --adaptive level")
+    scan.add_argument("--tile-overlap", type=float, default=None, help="Fraction of a tile shared with its neighbour")
+    scan.add_argument("--tile-min-edge", type=int, default=None, help="Only tile images at least this long (0 = never tile)")
+    scan.add_argument("--videos", action="store_true", help="Also classify .mp4/.mov/.avi/.mkv/.webm clips from sampled frames")
+    scan.add_argument("--video-frames", type=int, default=None, help="Frames sampled per clip (by seeking)")
+    scan.add_argument("--video-budget", type=float, default=None, help="Max seconds spent per clip (0 = no limit)")
+    scan.add_argument("--buffer-mb", type=float, default=None, help="Decoded-image buffer budget in MB (default: share of free RAM)")
+    scan.add_argument("--dnn-target", default="auto", choices=["auto", "cpu", "opencl", "opencl_fp16", "cuda"],
+                      help="Face detector backend/target (default: autotuned, else OpenCL when present)")
+    scan.add_argument("--threads", type=int, default=None, help="OpenCV threads for single-process scans (default: autotuned)")
+    scan.add_argument("--autotune", action="store_true",
+                      help="Benchmark this machine first if it isn't tuned yet (scans of 500+ images; see `tune`)")
+    scan.add_argument("--profile", default=None, metavar="FILE", help="Run under cProfile and write the profile to FILE")
+    scan.set_defaults(func=cmd_scan)
+
+    tune = sub.add_parser("tune", help="Benchmark detector backends, threads and workers on a folder's images and remember the fastest")
+    tune.add_argument("folder")
+    tune.add_argument("--sample", type=int, default=24, help="Images to benchmark on")
+    tune.add_argument("--long-edge", type=int, default=None, help="Detection resolution to tune for")
+    tune.add_argument("--batch-size", type=int, default=None, help="Images per face-detector forward pass to tune for")
+    tune.set_defaults(func=cmd_tune)
+
+    org = sub.add_parser("organize", help="Sort media into YYYY/YYYY-MM folders (dry run unless --execute)")
+    org.add_argument("folder")
+    org.add_argument("--execute", action="store_true", help="Actually move files (default is a dry run)")
+    org.add_argument("--flat-folders", action="store_true", help="Use flat YYYY-MM folders instead of YYYY/YYYY-MM")
+    org.add_argument("--date-workers", type=int, default=None, help="Threads reading dates ahead of the moves (1 = inline)")
+    org.add_argument("--copy-workers", type=int, default=None, help="Threads copying files when a move crosses devices")
+    plan_opts = org.add_mutually_exclusive_group()
+    plan_opts.add_argument("--save-plan", default=None, metavar="FILE", help="Write the run's move plan to FILE (e.g. from a dry run)")
+    plan_opts.add_argument("--from-plan", default=None, metavar="FILE",
+                           help="Use a plan saved with --save-plan instead of reading dates again (moves only with --execute)")
+    org.add_argument("--profile", default=None, metavar="FILE", help="Run under cProfile and write the profile to FILE")
+    org.set_defaults(func=cmd_organize)
+
+    watch = sub.add_parser("watch", help="Watch a folder and scan and/or organize only newly arrived files")
+    watch.add_argument("folder")
+    watch.add_argument("--scan", action="store_true", help="AI-classify each new image (Keep/Move verdicts)")
+    watch.add_argument("--organize", action="store_true", help="Sort each new file into YYYY/YYYY-MM folders")
+    watch.add_argument("--execute", action="store_true", help="With --organize: actually move files (default is a dry run)")
+    watch.add_argument("--flat-folders", action="store_true", help="With --organize: use flat YYYY-MM folders")
+    watch.add_argument("--keep-animals", action="store_true", help="With --scan: treat photos of animals like photos of people")
+    watch.add_argument("--videos", action="store_true", help="With --scan: also classify video clips")
+    watch.add_argument("--settle", type=float, default=2.0, help="Seconds a file must stay unchanged before it is processed")
+    watch.add_argument("--poll", action="store_true", help="Poll the folder instead of using inotify")
+    watch.add_argument("--interval", type=float, default=2.0, help="Seconds between sweeps when polling")
+    watch.set_defaults(func=cmd_watch)
+
+    similar = sub.add_parser("similar", help="Find near-duplicate photos (resized / re-compressed copies) by perceptual hash")
+    similar.add_argument("folder")
+    similar.add_argument("--radius", type=int, default=None, help="Max differing hash bits (of 64) to count as the same photo (default 6)")
+    similar.add_argument("--workers", type=int, default=None, help="Decode threads (default 8)")
+    similar.add_argument("--no-subfolders", action="store_true", help="Only look in the top-level folder")
+    similar.add_argument("--no-cache", action="store_true", help="Don't read or store image hashes in the hash cache")
+    similar.set_defaults(func=cmd_similar)
+
+    cache = sub.add_parser("cache", help="Detection cache maintenance")
+    cache_sub = cache.add_subparsers(dest="cache_command", required=True)
+    inval = cache_sub.add_parser("invalidate", help="Forget cached detections (all, or under a folder)")
+    inval.add_argument("folder", nargs="?", default=None)
+    inval.set_defaults(func=cmd_cache)
+
+    journal = sub.add_parser("journal", help="Move journals: list runs, undo one, resolve interrupted ones")
+    journal_sub = journal.add_subparsers(dest="journal_command", required=True)
+    jlist = journal_sub.add_parser("list", help="Recorded organize / AI-scan move runs, newest first")
+    jlist.add_argument("folder", nargs="?", default=None)
+    jlist.set_defaults(func=cmd_journal)
+    jundo = journal_sub.add_parser("undo", help="Move a run's files back (default: the newest run not undone yet)")
+    jundo.add_argument("id", nargs="?", default=None, help="Run ID from 'journal list'")
+    jundo.add_argument("--folder", default=None, help="Newest run in this folder instead of the newest overall")
+    jundo.set_defaults(func=cmd_journal)
+    jrec = journal_sub.add_parser("recover", help="Finish (or --rollback) runs that were interrupted by a crash")
+    jrec.add_argument("folder", nargs="?", default=None)
+    jrec.add_argument("--rollback", action="store_true", help="Move the interrupted runs' files back instead")
+    jrec.set_defaults(func=cmd_journal)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
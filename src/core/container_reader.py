@@ -0,0 +1,201 @@
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from core.exif_reader import RangeReader, ReadLimit
+
+# Date lookups give up after reading this many bytes of a file (they normally need 4-12KB)
+CONTAINER_DATE_MAX_BYTES = 64 * 1024
+# Formats with a creation time in the container; anything else is not opened
+CONTAINER_DATE_EXTS = {'.mp4', '.mov', '.m4v', '.3gp', '.mkv', '.webm'}
+
+# Epochs of QuickTime/MP4 (seconds) and Matroska (nanoseconds) timestamps
+_MP4_EPOCH = datetime(1904, 1, 1, tzinfo=timezone.utc)
+_MKV_EPOCH = datetime(2001, 1, 1, tzinfo=timezone.utc)
+# Camera defaults for "clock never set" come out as 1904 / 1970 / 2001; treat anything before this as unset
+_MIN_YEAR = 1980
+
+# Top-level atoms that may open a QuickTime/MP4 file
+_MP4_FIRST_ATOMS = {b'ftyp', b'moov', b'mdat', b'free', b'skip', b'wide', b'pnot'}
+
+# Matroska element IDs
+_EBML = 0x1A45DFA3
+_SEGMENT = 0x18538067
+_SEEK_HEAD = 0x114D9B74
+_SEEK = 0x4DBB
+_SEEK_ID = 0x53AB
+_SEEK_POSITION = 0x53AC
+_INFO = 0x1549A966
+_DATE_UTC = 0x4461
+_CLUSTER = 0x1F43B675
+
+
+def _local(utc: datetime) -> Optional[datetime]:
+    # Containers store UTC; folders follow local time like EXIF dates do
+    if utc.year < _MIN_YEAR:
+        return None
+    return utc.astimezone().replace(tzinfo=None)
+
+
+def _atoms(reader: RangeReader, start: int, end: Optional[int]):
+    """(type, payload offset, end offset) of the atoms between start and end (None: up to EOF)."""
+    pos = start
+    while end is None or pos + 8 <= end:
+        header = reader.read_at(pos, 16)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack('>I4s', header[:8])
+        payload = pos + 8
+        if size == 1:
+            if len(header) < 16:
+                return
+            (size,) = struct.unpack('>Q', header[8:16])
+            payload = pos + 16
+        elif size == 0:
+            # Runs to the end of its parent (or of the file)
+            yield kind, payload, end
+            return
+        if size < payload - pos:
+            return
+        yield kind, payload, pos + size
+        pos += size
+
+
+def _mp4_date(reader: RangeReader) -> Optional[datetime]:
+    # moov may come before or after mdat; mdat itself is seeked over, never read
+    for kind, payload, end in _atoms(reader, 0, None):
+        if kind != b'moov':
+            continue
+        for child, child_payload, _ in _atoms(reader, payload, end):
+            if child != b'mvhd':
+                continue
+            version = reader.read_at(child_payload, 1)[0]
+            if version == 1:
+                (created,) = struct.unpack('>Q', reader.read_at(child_payload + 4, 8))
+            else:
+                (created,) = struct.unpack('>I', reader.read_at(child_payload + 4, 4))
+            if not created:
+                return None
+            return _local(_MP4_EPOCH + timedelta(seconds=created))
+        return None
+    return None
+
+
+def _vint(reader: RangeReader, pos: int, keep_marker: bool) -> Tuple[Optional[int], int]:
+    """EBML variable-length integer at pos: (value, length). Value None for an unknown size (all ones)."""
+    first = reader.read_at(pos, 1)
+    if not first or not first[0]:
+        raise ValueError("invalid EBML number")
+    length = 9 - first[0].bit_length()
+    raw = reader.read_at(pos, length)
+    if len(raw) < length:
+        raise ValueError("truncated EBML number")
+    value = int.from_bytes(raw, 'big')
+    if keep_marker:
+        return value, length
+    value &= (1 << (7 * length)) - 1
+    return (None if value == (1 << (7 * length)) - 1 else value), length
+
+
+def _element(reader: RangeReader, pos: int) -> Tuple[int, int, Optional[int]]:
+    """(element ID, data offset, data size or None if unknown) of the element at pos."""
+    element_id, id_len = _vint(reader, pos, keep_marker=True)
+    size, size_len = _vint(reader, pos + id_len, keep_marker=False)
+    return element_id, pos + id_len + size_len, size
+
+
+def _mkv_info_date(reader: RangeReader, start: int, size: int) -> Optional[datetime]:
+    pos, end = start, start + size
+    while pos < end:
+        element_id, data, length = _element(reader, pos)
+        if length is None:
+            return None
+        if element_id == _DATE_UTC and length == 8:
+            (nanoseconds,) = struct.unpack('>q', reader.read_at(data, 8))
+            return _local(_MKV_EPOCH + timedelta(microseconds=nanoseconds // 1000))
+        pos = data + length
+    return None
+
+
+def _mkv_seek_info(reader: RangeReader, start: int, size: int) -> Optional[int]:
+    """Position of the Info element (relative to the segment data) from a SeekHead, or None."""
+    pos, end = start, start + size
+    while pos < end:
+        element_id, data, length = _element(reader, pos)
+        if length is None:
+            return None
+        if element_id == _SEEK:
+            target, position = None, None
+            child, child_end = data, data + length
+            while child < child_end:
+                child_id, child_data, child_len = _element(reader, child)
+                if child_len is None:
+                    return None
+                raw = reader.read_at(child_data, child_len)
+                if child_id == _SEEK_ID:
+                    target = int.from_bytes(raw, 'big')
+                elif child_id == _SEEK_POSITION:
+                    position = int.from_bytes(raw, 'big')
+                child = child_data + child_len
+            if target == _INFO and position is not None:
+                return position
+        pos = data + length
+    return None
+
+
+def _mkv_date(reader: RangeReader) -> Optional[datetime]:
+    element_id, data, length = _element(reader, 0)
+    if element_id != _EBML or length is None:
+        return None
+    element_id, segment, segment_size = _element(reader, data + length)
+    if element_id != _SEGMENT:
+        return None
+    segment_end = None if segment_size is None else segment + segment_size
+
+    # Info normally precedes the first Cluster; otherwise the SeekHead says where it is
+    info_at = None
+    pos = segment
+    while segment_end is None or pos < segment_end:
+        element_id, data, length = _element(reader, pos)
+        if element_id == _INFO and length is not None:
+            return _mkv_info_date(reader, data, length)
+        if element_id == _SEEK_HEAD and length is not None:
+            info_at = _mkv_seek_info(reader, data, length)
+        if element_id == _CLUSTER or length is None:
+            break
+        pos = data + length
+    if info_at is None:
+        return None
+    element_id, data, length = _element(reader, segment + info_at)
+    if element_id != _INFO or length is None:
+        return None
+    return _mkv_info_date(reader, data, length)
+
+
+def read_container_date(file_path: str, max_bytes: int = CONTAINER_DATE_MAX_BYTES) -> Tuple[Optional[datetime], int]:
+    """
+    (creation time, bytes read) of a QuickTime/MP4 (moov/mvhd) or Matroska/WebM (Segment Info DateUTC)
+    video, in local time. Only atom/element headers are read, seeking over the media data, and at most
+    max_bytes. Other formats aren't opened: (None, 0).
+    """
+    if os.path.splitext(file_path)[1].lower() not in CONTAINER_DATE_EXTS:
+        return None, 0
+    try:
+        fh = open(file_path, 'rb', buffering=0)
+    except OSError:
+        return None, 0
+    reader = RangeReader(fh, max_bytes)
+    try:
+        magic = reader.read_at(0, 8)
+        if magic[:4] == b'\x1a\x45\xdf\xa3':
+            date = _mkv_date(reader)
+        elif magic[4:8] in _MP4_FIRST_ATOMS:
+            date = _mp4_date(reader)
+        else:
+            date = None
+    except (ReadLimit, struct.error, ValueError, IndexError, OverflowError, OSError):
+        date = None
+    finally:
+        fh.close()
+    return date, reader.bytes_read
@@ -0,0 +1,304 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import nullcontext
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.cache import HASH_BLOCK, get_cache_dir, quick_content_hash
+from core.manifest import ManifestEntry
+
+# Bump when the stored hash format changes.
+HASH_STORE_VERSION = 2
+
+DEFAULT_MAX_ENTRIES = 2_000_000
+
+# Read size while hashing whole files
+FULL_HASH_CHUNK = 1024 * 1024
+
+
+def full_content_hash(file_path: str) -> str:
+    """BLAKE2b of the whole file."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(FULL_HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_key(entry: ManifestEntry) -> Tuple[int, int, int]:
+    """(inode, size, mtime_ns) identifying a file version; the path stands in where there is no inode."""
+    inode = entry.inode
+    if not inode:
+        digest = hashlib.blake2b(os.fsencode(os.path.normcase(entry.path)), digest_size=8).digest()
+        inode = int.from_bytes(digest, "little") >> 1
+    return inode, entry.size, entry.mtime_ns
+
+
+class HashStore:
+    """
+    SQLite store of content hashes keyed by (inode, size, mtime_ns), so a file is only read again
+    once it changes. Hashes are filled in as they are needed: the head/tail hash (edge_hash), the
+    full-file hash (full_hash) and the perceptual image hash (dhash, see core.similar) independently.
+    Files known to sit in an organized tree also keep their path, so later runs can find identical
+    copies among them without walking it.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path or os.path.join(get_cache_dir(), "file_hashes.sqlite3")
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._pending_writes = 0
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != HASH_STORE_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS hashes")
+            self._conn.execute(f"PRAGMA user_version={HASH_STORE_VERSION}")
+
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                inode INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                path TEXT,
+                edge_hash TEXT,
+                full_hash TEXT,
+                dhash INTEGER,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (inode, size, mtime_ns)
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_hashes_size ON hashes(size)")
+        self._conn.commit()
+
+    def get(self, key: Tuple[int, int, int]) -> Tuple[Optional[str], Optional[str]]:
+        """(edge_hash, full_hash) stored for this file version; None for either not computed yet."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT edge_hash, full_hash FROM hashes WHERE inode = ? AND size = ? AND mtime_ns = ?", key
+            ).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def get_dhash(self, key: Tuple[int, int, int]) -> Optional[int]:
+        """Stored 64-bit perceptual hash for this file version, or None if not computed yet."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT dhash FROM hashes WHERE inode = ? AND size = ? AND mtime_ns = ?", key
+            ).fetchone()
+        if not row or row[0] is None:
+            return None
+        # Stored signed (SQLite integers are 64-bit signed)
+        return row[0] & 0xFFFFFFFFFFFFFFFF
+
+    def put(self, key: Tuple[int, int, int], path: Optional[str] = None, edge_hash: Optional[str] = None,
+            full_hash: Optional[str] = None, dhash: Optional[int] = None):
+        """Record what is known about a file version, keeping previously stored values for anything passed as None."""
+        if dhash is not None and dhash >= 1 << 63:
+            dhash -= 1 << 64
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(inode, size, mtime_ns) DO UPDATE SET
+                       path = COALESCE(excluded.path, path),
+                       edge_hash = COALESCE(excluded.edge_hash, edge_hash),
+                       full_hash = COALESCE(excluded.full_hash, full_hash),
+                       dhash = COALESCE(excluded.dhash, dhash),
+                       last_used = excluded.last_used""",
+                (*key, path, edge_hash, full_hash, dhash, time.time())
+            )
+            self._pending_writes += 1
+            if self._pending_writes >= 500:
+                self._commit_locked()
+
+    def paths_with_size(self, size: int, root: str) -> List[Tuple[str, Tuple[int, int, int]]]:
+        """(path, key) of recorded files of this size under root. Entries may be stale; callers re-stat them."""
+        prefix = os.path.join(os.path.abspath(root), "")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, inode, size, mtime_ns FROM hashes WHERE size = ? AND path IS NOT NULL", (size,)
+            ).fetchall()
+        return [(row[0], tuple(row[1:])) for row in rows if row[0].startswith(prefix)]
+
+    def flush(self):
+        """Commit pending writes and evict least-recently-used entries beyond max_entries."""
+        with self._lock:
+            self._commit_locked()
+            count = self._conn.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM hashes WHERE (inode, size, mtime_ns) IN "
+                    "(SELECT inode, size, mtime_ns FROM hashes ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                )
+                self._conn.commit()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def _commit_locked(self):
+        if self._pending_writes:
+            self._conn.commit()
+            self._pending_writes = 0
+
+
+class DuplicateIndex:
+    """
+    Finds byte-identical copies among the files of an organized tree (root), whatever their names.
+
+    Files are compared in stages, each only among files still matching after the previous one:
+    size (free, from the listing), BLAKE2b of the first and last 64KB, then BLAKE2b of the whole
+    file - so most files are never read in full and files of a unique size are not read at all.
+    The index holds the files added this run, the files already in the tree when the run began
+    (add_existing) and, through the HashStore, files recorded under root by earlier runs (re-stat'ed
+    before use). Hashes are cached in memory and in the store.
+    """
+
+    def __init__(self, root: str, store: Optional[HashStore] = None, stats=None):
+        self.root = os.path.abspath(root)
+        self.store = store
+        self.stats = stats
+        # size -> [(path shown to the user, entry to read the content from)], in the order added
+        self._by_size: Dict[int, List[Tuple[str, ManifestEntry]]] = {}
+        self._added_paths = set()
+        # size -> files in the tree before this run: listed by add_existing(), plus those recorded under
+        # root by earlier runs (looked up and re-stat'ed once per size)
+        self._existing: Dict[int, List[Tuple[str, ManifestEntry]]] = {}
+        self._known: Dict[int, List[Tuple[str, ManifestEntry]]] = {}
+        # (size, edge hash) -> [(rank, shown path, entry)] of the files hashed so far, so a lookup only
+        # compares files with the same head and tail; rank keeps files added this run ahead of known ones
+        self._by_edge: Dict[Tuple[int, str], List[Tuple[Tuple[int, int], str, ManifestEntry]]] = {}
+        # size -> how many of _by_size[size] / _known[size] are in _by_edge
+        self._bucketed: Dict[int, Tuple[int, int]] = {}
+        self._hashes: Dict[Tuple[int, int, int], Dict[str, str]] = {}
+
+    def add(self, entry: ManifestEntry, shown_path: Optional[str] = None):
+        """
+        Index a file of the organized tree. shown_path: where it is reported as being, when that's
+        not where it can be read from (dry runs); such files aren't recorded in the store.
+        """
+        self._by_size.setdefault(entry.size, []).append((shown_path or entry.path, entry))
+        self._added_paths.add(entry.path)
+        if self.store is not None and shown_path is None:
+            self.store.put(file_key(entry), path=entry.path)
+
+    def add_existing(self, entries: Iterable[ManifestEntry]):
+        """
+        Index files already in the organized tree, before the first find(), so a copy elsewhere is
+        recognised whether or not the walk reaches it first. Like files from the store, they give way
+        to a later add() of the same path (e.g. when the file turns out to be moving).
+        """
+        for entry in entries:
+            self._existing.setdefault(entry.size, []).append((entry.path, entry))
+
+    def find(self, entry: ManifestEntry) -> Optional[str]:
+        """Path of an indexed file with exactly the same content as entry, or None."""
+        size = entry.size
+        others = chain(self._by_size.get(size, ()), self._known_with_size(size))
+        if not any(other.path != entry.path for _, other in others):
+            return None
+        digest = self._hash(entry, 'edge')
+        if digest is None:
+            return None
+        self._bucket(size)
+        matches = sorted((c for c in self._by_edge.get((size, digest), ()) if self._usable(c, entry)),
+                         key=lambda c: c[0])
+        if not matches:
+            return None
+        if size <= HASH_BLOCK:
+            # The head block already covers the whole file
+            return matches[0][1]
+        digest = self._hash(entry, 'full')
+        if digest is None:
+            return None
+        for _, shown, other in matches:
+            if self._hash(other, 'full') == digest:
+                return shown
+        return None
+
+    def same(self, a: ManifestEntry, b: ManifestEntry) -> bool:
+        """Whether two files have identical content (staged like find)."""
+        if a.size != b.size:
+            return False
+        for stage in ('edge', 'full'):
+            digest = self._hash(a, stage)
+            if digest is None or digest != self._hash(b, stage):
+                return False
+            if a.size <= HASH_BLOCK:
+                return True
+        return True
+
+    def _usable(self, candidate, entry: ManifestEntry) -> bool:
+        (known, _), _, other = candidate
+        # A known file that was also added this run is only compared through its added entry
+        return other.path != entry.path and not (known and other.path in self._added_paths)
+
+    def _known_with_size(self, size: int) -> List[Tuple[str, ManifestEntry]]:
+        if size not in self._known:
+            found = list(self._existing.get(size, ()))
+            seen = {path for path, _ in found}
+            rows = self.store.paths_with_size(size, self.root) if self.store is not None else ()
+            for path, key in rows:
+                if path in seen:
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                other = ManifestEntry(path, st.st_size, st.st_mtime_ns, st.st_ino)
+                if file_key(other) == key:
+                    found.append((path, other))
+                    seen.add(path)
+            self._known[size] = found
+        return self._known[size]
+
+    def _bucket(self, size: int):
+        """File the not yet hashed files of this size under their edge hash."""
+        done_added, done_known = self._bucketed.get(size, (0, 0))
+        added, known = self._by_size.get(size, []), self._known_with_size(size)
+        for kind, items, done in ((0, added, done_added), (1, known, done_known)):
+            for i in range(done, len(items)):
+                shown, other = items[i]
+                digest = self._hash(other, 'edge')
+                if digest is not None:
+                    self._by_edge.setdefault((size, digest), []).append(((kind, i), shown, other))
+        self._bucketed[size] = (len(added), len(known))
+
+    def _hash(self, entry: ManifestEntry, stage: str) -> Optional[str]:
+        key = file_key(entry)
+        known = self._hashes.setdefault(key, {})
+        if stage in known:
+            return known[stage]
+        if self.store is not None and not known:
+            edge_hash, full_hash = self.store.get(key)
+            if edge_hash:
+                known['edge'] = edge_hash
+            if full_hash:
+                known['full'] = full_hash
+            if stage in known:
+                return known[stage]
+        try:
+            with self.stats.measure(f'hash_{stage}') if self.stats is not None else nullcontext():
+                if stage == 'edge':
+                    digest = quick_content_hash(entry.path, entry.size)
+                else:
+                    digest = full_content_hash(entry.path)
+        except OSError:
+            return None
+        known[stage] = digest
+        if self.store is not None:
+            self.store.put(key, edge_hash=digest if stage == 'edge' else None,
+                           full_hash=digest if stage == 'full' else None)
+        return digest
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
@@ -0,0 +1,273 @@
+import os
+import struct
+from datetime import datetime
+from typing import Optional, Dict, Tuple
+
+# EXIF lives in the first APP1 segment, which is capped at 64KB by the JPEG format
+EXIF_MAX_BYTES = 128 * 1024
+
+# Date lookups give up after reading this many bytes of a file
+EXIF_DATE_MAX_BYTES = 64 * 1024
+# Bytes fetched per read while looking for a date (the EXIF IFDs are usually within the first 4KB)
+READ_CHUNK = 4096
+# Formats that can carry EXIF; anything else (video, GIF, BMP) is not opened at all
+EXIF_DATE_EXTS = {'.jpg', '.jpeg', '.tif', '.tiff', '.png'}
+
+# TIFF tags
+TAG_JPEG_IF_OFFSET = 0x0201   # IFD1: embedded thumbnail offset
+TAG_JPEG_IF_LENGTH = 0x0202   # IFD1: embedded thumbnail length
+TAG_EXIF_IFD = 0x8769         # IFD0: offset of the EXIF sub-IFD
+TAG_DATETIME_ORIGINAL = 0x9003
+TAG_DATETIME_DIGITIZED = 0x9004
+
+# Bytes per component for each TIFF field type
+_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 9: 4, 10: 8}
+
+
+def read_jpeg_exif(file_path: str, max_bytes: int = EXIF_MAX_BYTES) -> Optional[bytes]:
+    """
+    Return the TIFF-structured EXIF payload of a JPEG's APP1 segment, or None.
+    Walks marker segments from the start of the file and stops at the first APP1 EXIF
+    block, the start of image data, or after max_bytes - never reads the whole file.
+    """
+    with open(file_path, 'rb') as fh:
+        if fh.read(2) != b'\xff\xd8':
+            return None
+        consumed = 2
+        while consumed < max_bytes:
+            marker = fh.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            code = marker[1]
+            if code == 0xFF:
+                # Fill byte: the real marker code follows
+                fh.seek(-1, 1)
+                consumed += 1
+                continue
+            if code == 0x01 or 0xD0 <= code <= 0xD8:
+                consumed += 2
+                continue  # Standalone markers carry no length
+            if code in (0xDA, 0xD9):
+                return None  # Start of scan / end of image: no EXIF ahead of the pixels
+
+            raw_len = fh.read(2)
+            if len(raw_len) < 2:
+                return None
+            length = struct.unpack('>H', raw_len)[0]
+            if code == 0xE1:
+                payload = fh.read(min(length - 2, max_bytes - consumed))
+                if payload.startswith(b'Exif\x00\x00'):
+                    return payload[6:]
+            else:
+                fh.seek(length - 2, 1)
+            consumed += 2 + length
+    return None
+
+
+def _read_ifd(tiff: bytes, offset: int, endian: str) -> Tuple[Dict[int, Tuple[int, int, bytes]], int]:
+    """Parse one IFD: ({tag: (type, count, raw value/offset field)}, next IFD offset)."""
+    (count,) = struct.unpack_from(endian + 'H', tiff, offset)
+    entries = {}
+    pos = offset + 2
+    for _ in range(count):
+        tag, typ, n = struct.unpack_from(endian + 'HHI', tiff, pos)
+        entries[tag] = (typ, n, tiff[pos + 8:pos + 12])
+        pos += 12
+    (next_offset,) = struct.unpack_from(endian + 'I', tiff, pos)
+    return entries, next_offset
+
+
+def _tiff_header(tiff: bytes) -> Optional[Tuple[str, int]]:
+    """(struct endian prefix, IFD0 offset) for a TIFF header, or None."""
+    if len(tiff) < 8:
+        return None
+    if tiff[:2] == b'II':
+        endian = '<'
+    elif tiff[:2] == b'MM':
+        endian = '>'
+    else:
+        return None
+    magic, ifd0 = struct.unpack_from(endian + 'HI', tiff, 2)
+    if magic != 42:
+        return None
+    return endian, ifd0
+
+
+def _value(entry: Tuple[int, int, bytes], tiff: bytes, endian: str) -> Optional[bytes]:
+    """Raw bytes of a tag's value, following the offset when it doesn't fit in 4 bytes."""
+    typ, count, field = entry
+    size = _TYPE_SIZES.get(typ, 1) * count
+    if size <= 4:
+        return field[:size]
+    (offset,) = struct.unpack(endian + 'I', field)
+    if offset + size > len(tiff):
+        return None
+    return tiff[offset:offset + size]
+
+
+def _uint(entry: Tuple[int, int, bytes], endian: str) -> int:
+    typ, _, field = entry
+    if typ == 3:
+        return struct.unpack(endian + 'H', field[:2])[0]
+    return struct.unpack(endian + 'I', field)[0]
+
+
+def extract_thumbnail(tiff: bytes) -> Optional[bytes]:
+    """JPEG bytes of the embedded thumbnail (IFD1) from an EXIF payload, or None."""
+    try:
+        header = _tiff_header(tiff)
+        if not header:
+            return None
+        endian, ifd0 = header
+        _, ifd1 = _read_ifd(tiff, ifd0, endian)
+        if not ifd1:
+            return None
+        entries, _ = _read_ifd(tiff, ifd1, endian)
+        if TAG_JPEG_IF_OFFSET not in entries or TAG_JPEG_IF_LENGTH not in entries:
+            return None
+        offset = _uint(entries[TAG_JPEG_IF_OFFSET], endian)
+        length = _uint(entries[TAG_JPEG_IF_LENGTH], endian)
+        if length <= 0 or offset + length > len(tiff):
+            return None
+        data = tiff[offset:offset + length]
+        return data if data[:2] == b'\xff\xd8' else None
+    except struct.error:
+        return None
+
+
+def read_thumbnail(file_path: str) -> Optional[bytes]:
+    """Embedded EXIF thumbnail of a JPEG file (typically ~160x120, a few KB), or None."""
+    try:
+        tiff = read_jpeg_exif(file_path)
+    except OSError:
+        return None
+    return extract_thumbnail(tiff) if tiff else None
+
+
+class ReadLimit(Exception):
+    """Raised by RangeReader when a lookup would read more than its byte cap."""
+
+
+class RangeReader:
+    """Reads byte ranges of an unbuffered file, a chunk at a time, counting bytes and stopping at a cap."""
+
+    def __init__(self, fh, max_bytes: int):
+        self.fh = fh
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self._start = 0
+        self._buf = b''
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        if self._start <= offset and offset + size <= self._start + len(self._buf):
+            return self._buf[offset - self._start:offset - self._start + size]
+        chunk = min(max(size, READ_CHUNK), self.max_bytes - self.bytes_read)
+        if chunk < size:
+            raise ReadLimit()
+        self.fh.seek(offset)
+        self._buf = self.fh.read(chunk)
+        self._start = offset
+        self.bytes_read += len(self._buf)
+        return self._buf[:size]
+
+
+def _tiff_date(reader: RangeReader, base: int) -> Optional[datetime]:
+    """DateTimeOriginal, else DateTimeDigitized, of the TIFF structure starting at file offset base."""
+    header = _tiff_header(reader.read_at(base, 8))
+    if not header:
+        return None
+    endian, ifd0 = header
+
+    def ifd(offset: int) -> Dict[int, Tuple[int, int, bytes]]:
+        (count,) = struct.unpack(endian + 'H', reader.read_at(base + offset, 2))
+        entries, _ = _read_ifd(reader.read_at(base + offset, 2 + 12 * count + 4), 0, endian)
+        return entries
+
+    entries = ifd(ifd0)
+    if TAG_EXIF_IFD not in entries:
+        return None
+    exif = ifd(_uint(entries[TAG_EXIF_IFD], endian))
+    for tag in (TAG_DATETIME_ORIGINAL, TAG_DATETIME_DIGITIZED):
+        if tag not in exif:
+            continue
+        typ, count, field = exif[tag]
+        if count <= 4:
+            raw = field[:count]
+        else:
+            raw = reader.read_at(base + struct.unpack(endian + 'I', field)[0], count)
+        try:
+            # Format is "YYYY:MM:DD HH:MM:SS"; unset dates ("0000:00:00 ...") fall through to the next tag.
+            # strptime takes single-digit fields, so a value cut short by a truncated file is checked by length.
+            text = raw.split(b'\x00')[0].decode('ascii').strip()
+            if len(text) != 19:
+                continue
+            return datetime.strptime(text, "%Y:%m:%d %H:%M:%S")
+        except (UnicodeDecodeError, ValueError):
+            continue
+    return None
+
+
+def _jpeg_date(reader: RangeReader) -> Optional[datetime]:
+    # Same marker walk as read_jpeg_exif, seeking over segments instead of reading them
+    pos = 2
+    while True:
+        marker = reader.read_at(pos, 2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        if code == 0xFF:
+            pos += 1
+            continue
+        if code == 0x01 or 0xD0 <= code <= 0xD8:
+            pos += 2
+            continue
+        if code in (0xDA, 0xD9):
+            return None
+        (length,) = struct.unpack('>H', reader.read_at(pos + 2, 2))
+        if code == 0xE1 and reader.read_at(pos + 4, 6) == b'Exif\x00\x00':
+            return _tiff_date(reader, pos + 10)
+        pos += 2 + length
+
+
+def _png_date(reader: RangeReader) -> Optional[datetime]:
+    # eXIf chunk (PNG 1.5); it has to come before the image data, so stop at IDAT
+    pos = 8
+    while True:
+        header = reader.read_at(pos, 8)
+        if len(header) < 8:
+            return None
+        length, kind = struct.unpack('>I4s', header)
+        if kind == b'eXIf':
+            return _tiff_date(reader, pos + 8)
+        if kind in (b'IDAT', b'IEND'):
+            return None
+        pos += 12 + length
+
+
+def read_exif_date(file_path: str, max_bytes: int = EXIF_DATE_MAX_BYTES) -> Tuple[Optional[datetime], int]:
+    """
+    (EXIF date taken, bytes read) for a JPEG, TIFF or PNG file, reading only the headers up to
+    DateTimeOriginal / DateTimeDigitized and at most max_bytes. Other formats aren't opened: (None, 0).
+    """
+    if os.path.splitext(file_path)[1].lower() not in EXIF_DATE_EXTS:
+        return None, 0
+    try:
+        fh = open(file_path, 'rb', buffering=0)
+    except OSError:
+        return None, 0
+    reader = RangeReader(fh, max_bytes)
+    try:
+        magic = reader.read_at(0, 8)
+        if magic[:2] == b'\xff\xd8':
+            date = _jpeg_date(reader)
+        elif magic[:4] in (b'II*\x00', b'MM\x00*'):
+            date = _tiff_date(reader, 0)
+        elif magic == b'\x89PNG\r\n\x1a\n':
+            date = _png_date(reader)
+        else:
+            date = None
+    except (ReadLimit, struct.error, OSError):
+        date = None
+    finally:
+        fh.close()
+    return date, reader.bytes_read
@@ -0,0 +1,202 @@
+import cProfile
+import glob
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Iterator
+
+# Upper bounds (milliseconds) of the stage timing histogram buckets; the last bucket is open-ended
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def _bucket_label(i: int) -> str:
+    return f"<{HISTOGRAM_BOUNDS_MS[i]}ms" if i < len(HISTOGRAM_BOUNDS_MS) else f">={HISTOGRAM_BOUNDS_MS[-1]}ms"
+
+
+class RunStats:
+    """
+    Per-run instrumentation shared by ScannerEngine and OrganizerEngine.
+
+    - stages: cumulative seconds, call count, max and a millisecond histogram per named stage
+    - queues: occupancy samples (count, mean, max, histogram of observed depths)
+    - files / bytes processed, for files/s and MB/s over the run's wall time
+    - bytes_read: bytes actually read from files where only their headers are needed (e.g. dates)
+
+    Thread-safe; to_dict() gives a plain, JSON-serializable structure and merge() folds in
+    another run's to_dict() (e.g. from a worker process).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.queues: Dict[str, Dict[str, Any]] = {}
+        self.files = 0
+        self.bytes = 0
+        self.bytes_read = 0
+        self.started = time.time()
+        self.finished: Optional[float] = None
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def add(self, stage: str, seconds: float, count: int = 1):
+        """Record `count` calls of `stage` taking `seconds` in total (histogrammed at the per-call mean)."""
+        ms = seconds * 1000 / max(count, 1)
+        bucket = next((i for i, bound in enumerate(HISTOGRAM_BOUNDS_MS) if ms < bound), len(HISTOGRAM_BOUNDS_MS))
+        with self._lock:
+            entry = self.stages.get(stage)
+            if entry is None:
+                entry = self.stages[stage] = {'count': 0, 'total_s': 0.0, 'max_s': 0.0,
+                                              'histogram': [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)}
+            entry['count'] += count
+            entry['total_s'] += seconds
+            entry['max_s'] = max(entry['max_s'], seconds / max(count, 1))
+            entry['histogram'][bucket] += count
+
+    def sample_queue(self, name: str, depth: int):
+        with self._lock:
+            entry = self.queues.get(name)
+            if entry is None:
+                entry = self.queues[name] = {'samples': 0, 'total': 0, 'max': 0, 'depths': {}}
+            entry['samples'] += 1
+            entry['total'] += depth
+            entry['max'] = max(entry['max'], depth)
+            entry['depths'][depth] = entry['depths'].get(depth, 0) + 1
+
+    def count_file(self, size: int = 0):
+        with self._lock:
+            self.files += 1
+            self.bytes += size
+
+    def count_read(self, size: int):
+        with self._lock:
+            self.bytes_read += size
+
+    def finish(self):
+        self.finished = time.time()
+
+    def merge(self, other: Dict[str, Any]):
+        """Fold another RunStats.to_dict() into this one (stage/queue totals only; files and bytes are not summed)."""
+        with self._lock:
+            for stage, theirs in other.get('stages', {}).items():
+                entry = self.stages.get(stage)
+                if entry is None:
+                    self.stages[stage] = {'count': theirs['count'], 'total_s': theirs['total_s'],
+                                          'max_s': theirs['max_s'], 'histogram': list(theirs['histogram'])}
+                    continue
+                entry['count'] += theirs['count']
+                entry['total_s'] += theirs['total_s']
+                entry['max_s'] = max(entry['max_s'], theirs['max_s'])
+                entry['histogram'] = [a + b for a, b in zip(entry['histogram'], theirs['histogram'])]
+            for name, theirs in other.get('queues', {}).items():
+                entry = self.queues.setdefault(name, {'samples': 0, 'total': 0, 'max': 0, 'depths': {}})
+                entry['samples'] += theirs['samples']
+                entry['total'] += theirs['total']
+                entry['max'] = max(entry['max'], theirs['max'])
+                for depth, n in theirs['depths'].items():
+                    entry['depths'][int(depth)] = entry['depths'].get(int(depth), 0) + n
+
+    def elapsed(self) -> float:
+        return (self.finished or time.time()) - self.started
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            elapsed = self.elapsed()
+            stages = {
+                name: {
+                    'count': e['count'], 'total_s': round(e['total_s'], 6), 'max_s': round(e['max_s'], 6),
+                    'mean_ms': round(e['total_s'] * 1000 / e['count'], 3) if e['count'] else 0.0,
+                    'histogram': list(e['histogram']),
+                }
+                for name, e in self.stages.items()
+            }
+            queues = {
+                name: {'samples': e['samples'], 'total': e['total'], 'max': e['max'],
+                       'mean': round(e['total'] / e['samples'], 2) if e['samples'] else 0.0,
+                       'depths': dict(sorted(e['depths'].items()))}
+                for name, e in self.queues.items()
+            }
+            return {
+                'elapsed_s': round(elapsed, 3), 'files': self.files, 'bytes': self.bytes, 'bytes_read': self.bytes_read,
+                'files_per_s': round(self.files / elapsed, 2) if elapsed > 0 else None,
+                'mb_per_s': round(self.bytes / 2 ** 20 / elapsed, 2) if elapsed > 0 else None,
+                'histogram_bounds_ms': list(HISTOGRAM_BOUNDS_MS),
+                'stages': stages, 'queues': queues,
+            }
+
+    def summary_lines(self) -> List[str]:
+        """Human-readable report, slowest stages first."""
+        data = self.to_dict()
+        lines = [f"Timing: {data['files']} files, {data['bytes'] / 2 ** 20:.1f} MB in {data['elapsed_s']:.1f}s "
+                 f"({data['files_per_s'] or 0:.1f} files/s, {data['mb_per_s'] or 0:.1f} MB/s)"]
+        if data['bytes_read']:
+            lines.append(f"  header reads: {data['bytes_read'] / 1024:.1f} KB "
+                         f"({data['bytes_read'] / max(data['files'], 1) / 1024:.1f} KB/file)")
+        for name, e in sorted(data['stages'].items(), key=lambda kv: -kv[1]['total_s']):
+            peak = max(range(len(e['histogram'])), key=lambda i: e['histogram'][i])
+            lines.append(f"  {name:<16} {e['total_s']:9.2f}s  {e['count']:7d} calls  mean {e['mean_ms']:8.2f}ms  "
+                         f"max {e['max_s'] * 1000:8.1f}ms  mode {_bucket_label(peak)}")
+        for name, q in data['queues'].items():
+            lines.append(f"  queue {name}: mean depth {q['mean']}, max {q['max']} ({q['samples']} samples)")
+        return lines
+
+
+class Profiler:
+    """
+    Opt-in cProfile wrapper for a run. cProfile only sees the thread it is enabled on, so
+    every thread that does work enters thread() itself; save() merges them into one .prof file
+    (open with `python -m pstats <file>` or snakeviz).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def thread(self) -> Iterator[None]:
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self._profiles.append(profile)
+
+    def save(self, worker_glob: Optional[str] = None) -> Optional[str]:
+        """
+        Write the merged profile. worker_glob picks up profiles dumped by other processes
+        (e.g. scan worker processes), which are merged in and then deleted.
+        """
+        with self._lock:
+            sources = [p for p in self._profiles if p.getstats()]
+        worker_files = sorted(glob.glob(worker_glob)) if worker_glob else []
+        sources.extend(worker_files)
+        if not sources:
+            return None
+        stats = pstats.Stats(*sources)
+        stats.dump_stats(self.path)
+        for path in worker_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return self.path
+
+
+@contextmanager
+def maybe_profile(profiler: Optional[Profiler]) -> Iterator[None]:
+    """profiler.thread() when profiling is on, otherwise a no-op."""
+    if profiler is None:
+        yield
+    else:
+        with profiler.thread():
+            yield
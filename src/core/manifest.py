@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Set
+
+
+class ManifestEntry(NamedTuple):
+    path: str
+    size: int
+    mtime_ns: int
+    # 0 where scandir doesn't provide it without an extra call (Windows)
+    inode: int
+
+
+def scan_tree(root: str, exts: Set[str], include_subfolders: bool = True,
+              stop: Callable[[], bool] = lambda: False,
+              on_dir: Optional[Callable[[float], None]] = None) -> Iterator[ManifestEntry]:
+    """
+    Media files under root (by lower-case extension), one os.scandir pass, in os.walk order:
+    a folder's files first, then its subfolders depth-first. Size/mtime/inode come from the
+    DirEntry (free on Windows; one stat per matching file elsewhere, none for other files).
+    Symlinked folders are not followed. on_dir(seconds) is called with the time each listing took.
+    """
+    stack = [os.path.abspath(root)]
+    while stack:
+        if stop():
+            return
+        current = stack.pop()
+        start = time.perf_counter()
+        files: List[ManifestEntry] = []
+        subdirs = []
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif os.path.splitext(entry.name)[1].lower() in exts and entry.is_file():
+                            st = entry.stat()
+                            files.append(ManifestEntry(entry.path, st.st_size, st.st_mtime_ns, st.st_ino))
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        if on_dir:
+            on_dir(time.perf_counter() - start)
+        yield from files
+        if include_subfolders:
+            stack.extend(reversed(subdirs))
+
+
+def stat_entries(paths: Iterable[str]) -> List[ManifestEntry]:
+    """ManifestEntry for each path (size/mtime 0 when it can't be stat'ed, so it still gets reported)."""
+    entries = []
+    for path in paths:
+        path = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+            entries.append(ManifestEntry(path, st.st_size, st.st_mtime_ns, st.st_ino))
+        except OSError:
+            entries.append(ManifestEntry(path, 0, 0, 0))
+    return entries
+
+
+class Manifest:
+    """
+    Streams a folder's media files to the processing stage while the tree is still being walked.
+
+    The scan_tree() walk runs once, on a background thread, and runs ahead of the consumer.
+    Iterating yields entries as soon as they are found. `total` is the number found so far and
+    `complete` tells when it is final. stop() ends the walk early. Listing time is recorded as
+    the 'walk' stage when a RunStats is given; cancel (a threading.Event) ends walk and iteration
+    like stop(). on_complete(manifest) runs on the walk thread once the walk has finished.
+    skip(path), when given, drops files the consumer has produced itself (e.g. moved into the tree).
+    """
+
+    def __init__(self, root: Optional[str], exts: Set[str], include_subfolders: bool = True, stats=None,
+                 on_complete: Optional[Callable[["Manifest"], None]] = None,
+                 cancel: Optional[threading.Event] = None, skip: Optional[Callable[[str], bool]] = None):
+        self.root = root
+        self.exts = exts
+        self.include_subfolders = include_subfolders
+        self.stats = stats
+        self.on_complete = on_complete
+        self.cancel = cancel
+        self.skip = skip
+        self.entries: List[ManifestEntry] = []
+        self.complete = False
+        self._stopped = False
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[str], exts: Optional[Set[str]] = None) -> "Manifest":
+        """Already-complete manifest of an explicit file list (filtered by extension when exts is given)."""
+        if exts is not None:
+            paths = [p for p in paths if os.path.splitext(p)[1].lower() in exts]
+        manifest = cls(None, exts or set())
+        manifest.entries = stat_entries(paths)
+        manifest.complete = True
+        return manifest
+
+    @property
+    def total(self) -> int:
+        return len(self.entries)
+
+    def start(self) -> "Manifest":
+        if self._thread is None and not self.complete:
+            self._thread = threading.Thread(target=self._walk, daemon=True, name="manifest")
+            self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def _should_stop(self) -> bool:
+        return self._stopped or (self.cancel is not None and self.cancel.is_set())
+
+    def _walk(self):
+        record = (lambda s: self.stats.add('walk', s)) if self.stats is not None else None
+        try:
+            for entry in scan_tree(self.root, self.exts, self.include_subfolders, self._should_stop, record):
+                if self.skip is not None and self.skip(entry.path):
+                    continue
+                with self._cond:
+                    self.entries.append(entry)
+                    self._cond.notify_all()
+        finally:
+            with self._cond:
+                self.complete = True
+                self._cond.notify_all()
+            if self.on_complete and not self._should_stop():
+                self.on_complete(self)
+
+    def __iter__(self) -> Iterator[ManifestEntry]:
+        self.start()
+        i = 0
+        while True:
+            with self._cond:
+                while i >= len(self.entries) and not self.complete and not self._should_stop():
+                    self._cond.wait(0.2)
+                if self._should_stop() or i >= len(self.entries):
+                    return
+                entry = self.entries[i]
+            i += 1
+            yield entry
@@ -0,0 +1,448 @@
+import errno
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.cache import get_cache_dir
+from core.move_plan import COPY_SUFFIX, DeviceMap, copy_move
+
+# Bump when the journal line format changes; older journals are then ignored.
+MOVE_JOURNAL_VERSION = 1
+
+# Confirmed moves are fsync'ed at least this often (and when the run ends), so a crash leaves at most
+# about this many seconds of moves unconfirmed; those are still found by checking the file system.
+FLUSH_INTERVAL = 1.0
+
+# Finished journals kept for undo (oldest deleted first)
+KEEP_JOURNALS = 50
+
+# File systems with coarse timestamps (FAT: 2s) may round a moved file's mtime
+_MTIME_SLACK_NS = 2_000_000_000
+
+# Journals this process is still writing (begun, not yet closed)
+_open_paths = set()
+
+
+def journal_dir() -> str:
+    folder = os.path.join(get_cache_dir(), "move_journals")
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+class MoveJournal:
+    """
+    Durable record of a batch of file moves, so a run can be undone and an interrupted one finished
+    or rolled back.
+
+    One JSON-lines file per run. The first line is a header (kind, root, start time, and the writing
+    process: pid, plus boot id and start time where available); then every planned move as
+    ["m", source, destination, size, mtime_ns], written and fsync'ed in one go before the first file
+    moves; then ["d", index] per executed move, fsync'ed in batches, and ["end", moved] once the run
+    is over (["undone", count] after an undo). A journal without "end" belongs to a run that was
+    interrupted. A torn last line (crash mid-write) is simply skipped.
+    """
+
+    def __init__(self, path: str, stats=None):
+        self.path = path
+        self.stats = stats
+        self.header: Dict = {}
+        self.moves: List[Tuple[str, str, int, int]] = []
+        self.done: List[int] = []
+        self.ended = False
+        self.undone = False
+        # Moves confirmed, as of the last "end" record (peek() reads only that, not the moves)
+        self.moved_count = 0
+        self._partial = False
+        self._fh = None
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    @classmethod
+    def begin(cls, kind: str, root: str, moves: Iterable[Tuple[str, str, int, int]], stats=None,
+              checked: bool = False) -> "MoveJournal":
+        """
+        Start the journal of a run: kind ('organize', 'scan_move'), the folder, and (source, destination,
+        size, mtime_ns) per move. A move onto an existing path, or two onto the same one, is refused with
+        FileExistsError (nothing written): undo and recovery could not tell whose file is there. checked
+        skips the on-disk check when the caller has just listed the destination folders itself.
+        """
+        moves = [tuple(m) for m in moves]
+        destinations = set()
+        for _, destination, _, _ in moves:
+            key = os.path.normcase(os.path.abspath(destination))
+            if key in destinations or (not checked and os.path.lexists(destination)):
+                raise FileExistsError(errno.EEXIST, "Move destination already taken", destination)
+            destinations.add(key)
+        root = os.path.abspath(root)
+        started = time.time()
+        digest = hashlib.blake2b(f"{root}{started}".encode("utf-8"), digest_size=4).hexdigest()
+        run_id = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(started))}-{kind}-{digest}"
+        journal = cls(os.path.join(journal_dir(), f"{run_id}.jsonl"), stats)
+        journal.header = {"v": MOVE_JOURNAL_VERSION, "id": run_id, "kind": kind, "root": root, "started": started,
+                          "pid": os.getpid(), "process": _process_identity(os.getpid())}
+        journal.moves = moves
+        with journal._measure():
+            journal._fh = open(journal.path, "w", encoding="utf-8")
+            _open_paths.add(journal.path)
+            journal._fh.write(json.dumps(journal.header) + "\n")
+            journal._fh.writelines(json.dumps(["m", *m], separators=(",", ":")) + "\n" for m in journal.moves)
+            journal._sync()
+            _sync_dir(os.path.dirname(journal.path))
+        _prune()
+        return journal
+
+    @classmethod
+    def peek(cls, path: str) -> Optional["MoveJournal"]:
+        """Header and state of a journal from its first and last lines only (undo() / recover() load the rest)."""
+        journal = cls(path)
+        journal._partial = True
+        try:
+            with open(path, "rb") as fh:
+                journal.header = json.loads(fh.readline())
+                if journal.header.get("v") != MOVE_JOURNAL_VERSION:
+                    return None
+                fh.seek(max(fh.tell(), os.fstat(fh.fileno()).st_size - 4096))
+                tail = fh.read().decode("utf-8", "replace").splitlines()
+        except (OSError, ValueError):
+            return None
+        # The run is over once "end" (or "undone", which only follows or precedes an "end") is the last record
+        for line in reversed(tail):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record[0] == "end":
+                journal.ended, journal.moved_count = True, record[1]
+            elif record[0] == "undone":
+                journal.ended = journal.undone = True
+                continue
+            break
+        return journal
+
+    @classmethod
+    def load(cls, path: str) -> Optional["MoveJournal"]:
+        journal = cls(path)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                journal.header = json.loads(fh.readline())
+                if journal.header.get("v") != MOVE_JOURNAL_VERSION:
+                    return None
+                for line in fh:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record[0] == "m":
+                        journal.moves.append(tuple(record[1:5]))
+                    elif record[0] == "d":
+                        journal.done.append(record[1])
+                    elif record[0] == "end":
+                        journal.ended, journal.moved_count = True, record[1]
+                    elif record[0] == "undone":
+                        journal.undone = True
+        except (OSError, ValueError, IndexError):
+            return None
+        return journal
+
+    @property
+    def id(self) -> str:
+        return self.header.get("id", os.path.splitext(os.path.basename(self.path))[0])
+
+    @property
+    def root(self) -> str:
+        return self.header.get("root", "")
+
+    @property
+    def kind(self) -> str:
+        return self.header.get("kind", "")
+
+    def moved(self, index: int):
+        """Record that move number index (in begin() order) has happened."""
+        self._append(["d", index])
+        self.done.append(index)
+
+    def finish(self):
+        """The run is over (completed or cancelled): nothing is left to recover."""
+        self._append(["end", len(self.done)], sync=True)
+        self.ended, self.moved_count = True, len(self.done)
+        self.close()
+
+    def close(self):
+        """Close without finishing (the run was interrupted; recover() resolves it)."""
+        with self._lock:
+            if self._fh is None:
+                return
+            with self._measure():
+                self._sync()
+            self._fh.close()
+            self._fh = None
+            _open_paths.discard(self.path)
+
+    def _append(self, record: list, sync: bool = False):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._fh is None:
+                self._fh = open(self.path, "a", encoding="utf-8")
+            self._fh.write(line)
+            if sync or time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+                with self._measure():
+                    self._sync()
+
+    def _sync(self):
+        self._fh.flush()
+        try:
+            os.fsync(self._fh.fileno())
+        except OSError:
+            pass
+        self._last_flush = time.monotonic()
+
+    def _measure(self):
+        return self.stats.measure('journal') if self.stats is not None else nullcontext()
+
+    def _load_rest(self):
+        if self._partial:
+            full = MoveJournal.load(self.path)
+            if full is None:
+                raise ValueError(f"Unreadable move journal {self.path}")
+            self.header, self.moves, self.done = full.header, full.moves, full.done
+            self.ended, self.undone, self.moved_count = full.ended, full.undone, full.moved_count
+            self._partial = False
+
+    def undo(self, logger: Callable[[str], None] = lambda msg: None) -> Dict[str, int]:
+        """
+        Move this run's files back, newest move first. A file is only moved back while it is still
+        the file that was moved (same size and mtime) and its old place is free; folders the run
+        left empty are removed. Returns {'restored', 'skipped'}.
+        """
+        self._load_rest()
+        confirmed = set(self.done)
+        # An interrupted run may have moved files it never got to confirm
+        order = list(reversed(self.done)) + [i for i in reversed(range(len(self.moves))) if i not in confirmed]
+        counts = {'restored': 0, 'skipped': 0}
+        back = []
+        for i in order:
+            source, destination, size, mtime_ns = self.moves[i]
+            state = _state(source, destination, size, mtime_ns)
+            if state == 'moved':
+                back.append((destination, source))
+            elif i in confirmed or state == 'conflict':
+                logger(f"[UNDO] Skipping {os.path.basename(destination)}: it changed or its old place is taken.")
+                counts['skipped'] += 1
+        counts['restored'] = _move_all(back, logger, "[UNDO]")
+        counts['skipped'] += len(back) - counts['restored']
+        _remove_empty_dirs({os.path.dirname(d) for _, d, _, _ in self.moves}, self.root)
+        if not self.ended:
+            self._append(["end", len(self.done)])
+            self.ended = True
+        # Last, so peek() sees the run as undone
+        self._append(["undone", counts['restored']])
+        self.undone = True
+        self.close()
+        return counts
+
+    def recover(self, rollback: bool = False, logger: Callable[[str], None] = lambda msg: None) -> Dict[str, int]:
+        """
+        Resolve an interrupted run: finish its remaining moves, or with rollback undo the whole run.
+        Returns {'moved', 'restored', 'skipped'}.
+        """
+        self._load_rest()
+        if rollback:
+            counts = self.undo(logger)
+            return {'moved': 0, 'restored': counts['restored'], 'skipped': counts['skipped']}
+        confirmed = set(self.done)
+        counts = {'moved': 0, 'restored': 0, 'skipped': 0}
+        forward = []
+        for i, (source, destination, size, mtime_ns) in enumerate(self.moves):
+            if i in confirmed:
+                continue
+            _remove_partial(destination)
+            state = _state(source, destination, size, mtime_ns)
+            if state == 'moved':
+                self.moved(i)
+            elif state == 'pending':
+                forward.append((i, source, destination))
+            else:
+                counts['skipped'] += 1
+        done = set(_move_all([(s, d) for _, s, d in forward], logger, "[RECOVER]", report=True))
+        for i, source, destination in forward:
+            if (source, destination) in done:
+                self.moved(i)
+                counts['moved'] += 1
+            else:
+                counts['skipped'] += 1
+        self.finish()
+        return counts
+
+
+def _state(source: str, destination: str, size: int, mtime_ns: int) -> str:
+    """'moved' (the file is at destination, source is free), 'pending' (still at source, destination free) or 'conflict'."""
+    def is_file(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_size == size and abs(st.st_mtime_ns - mtime_ns) <= _MTIME_SLACK_NS
+
+    at_destination = is_file(destination)
+    source_free = not os.path.lexists(source)
+    if at_destination and source_free:
+        return 'moved'
+    if is_file(source) and not os.path.lexists(destination):
+        return 'pending'
+    return 'conflict'
+
+
+def _move_all(pairs: List[Tuple[str, str]], logger, tag: str, report: bool = False):
+    """Move (from, to) pairs in order: renames within a device, copies across. Returns the count (or the moved pairs with report)."""
+    devices = DeviceMap()
+    made = set()
+    moved = []
+    for src, dst in pairs:
+        folder = os.path.dirname(dst)
+        try:
+            if folder not in made:
+                os.makedirs(folder, exist_ok=True)
+                made.add(folder)
+            if devices.same(src, dst):
+                os.rename(src, dst)
+            else:
+                copy_move(src, dst)
+        except OSError as e:
+            logger(f"{tag} Could not move {os.path.basename(src)}: {e}")
+            continue
+        moved.append((src, dst))
+    logger(f"{tag} Moved {len(moved)} of {len(pairs)} files.")
+    return moved if report else len(moved)
+
+
+def _remove_partial(destination: str):
+    try:
+        os.remove(destination + COPY_SUFFIX)
+    except OSError:
+        pass
+
+
+def _remove_empty_dirs(folders: Iterable[str], root: str):
+    """Remove the folders that are now empty, and their emptied parents, up to (not including) root."""
+    root = os.path.abspath(root)
+    for folder in sorted(set(folders), key=len, reverse=True):
+        folder = os.path.abspath(folder)
+        while folder != root and folder.startswith(os.path.join(root, "")):
+            try:
+                os.rmdir(folder)
+            except OSError:
+                break
+            folder = os.path.dirname(folder)
+
+
+def _sync_dir(folder: str):
+    # Makes a new journal file's directory entry durable (POSIX; not possible / needed on Windows)
+    if os.name != "posix":
+        return
+    try:
+        fd = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def list_journals(root: Optional[str] = None, kind: Optional[str] = None) -> List[MoveJournal]:
+    """Journals (of a folder / kind, when given), newest first."""
+    folder = journal_dir()
+    root = os.path.abspath(root) if root else None
+    journals = []
+    for name in sorted(os.listdir(folder), reverse=True):
+        if not name.endswith(".jsonl"):
+            continue
+        journal = MoveJournal.peek(os.path.join(folder, name))
+        if journal is None or (root and journal.root != root) or (kind and journal.kind != kind):
+            continue
+        journals.append(journal)
+    journals.sort(key=lambda j: j.header.get("started", 0), reverse=True)
+    return journals
+
+
+def _boot_id() -> Optional[str]:
+    try:
+        with open("/proc/sys/kernel/random/boot_id", "r", encoding="ascii") as fh:
+            return fh.read().strip()
+    except OSError:
+        return None
+
+
+def _process_identity(pid: int) -> Optional[str]:
+    """
+    Boot id and start time of a live process (Linux), which unlike its pid are never reused; None
+    elsewhere or when it's gone.
+    """
+    boot = _boot_id()
+    if boot is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as fh:
+            stat = fh.read()
+    except OSError:
+        return None
+    # Field 22 (starttime, in clock ticks since boot); the command name before it may contain spaces
+    fields = stat[stat.rindex(b")") + 2:].split()
+    return f"{boot}:{int(fields[19])}"
+
+
+def _running(journal: MoveJournal) -> bool:
+    """Whether the process that wrote a journal may still be moving files (then it isn't interrupted)."""
+    if journal.path in _open_paths:
+        return True
+    pid = journal.header.get("pid")
+    if not pid or pid == os.getpid():
+        return False  # This process isn't writing it (any more)
+    if os.name != "posix":
+        return False  # One app instance at a time on Windows; a journal left open there is from a crash
+    recorded = journal.header.get("process")
+    if recorded and _boot_id() is not None:
+        return _process_identity(pid) == recorded
+    # No identity recorded (not Linux): the pid may since have been reused, e.g. after a reboot
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # Exists, owned by someone else
+    return True
+
+
+def interrupted_journals(root: Optional[str] = None, kind: Optional[str] = None) -> List[MoveJournal]:
+    """Runs that stopped without finishing (crash, power loss, killed), newest first."""
+    return [j for j in list_journals(root, kind) if not j.ended and not _running(j)]
+
+
+def last_undoable(root: Optional[str] = None, kind: Optional[str] = None) -> Optional[MoveJournal]:
+    """The newest finished run that moved files and hasn't been undone."""
+    for journal in list_journals(root, kind):
+        if journal.ended and not journal.undone and journal.moved_count:
+            return journal
+    return None
+
+
+def _prune():
+    # File names start with the run's start time, so they sort oldest first
+    try:
+        names = sorted(n for n in os.listdir(journal_dir()) if n.endswith(".jsonl"))
+    except OSError:
+        return
+    for name in names[:-KEEP_JOURNALS]:
+        path = os.path.join(journal_dir(), name)
+        journal = MoveJournal.peek(path)
+        if journal is None or journal.ended:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,196 @@
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+from core.manifest import ManifestEntry
+
+# Bump when the saved plan format changes.
+PLAN_VERSION = 1
+
+# Suffix of a cross-device copy until it is complete (ignored by the watcher like other partial files)
+COPY_SUFFIX = ".part"
+
+
+class PlannedMove(NamedTuple):
+    """
+    What the organizer decided for one file. action: 'move' | 'duplicate' | 'skipped' | 'in_place'.
+    target: where it goes ('move'), the identical file ('duplicate') or where it already is ('in_place').
+    reason: why, e.g. 'prefix_added', 'prefix_fixed', 'same_content', 'no_date'.
+    renamed_from: the target name that was taken by a different file, when the target had to be renamed.
+    """
+    source: str
+    action: str
+    target: Optional[str]
+    reason: str
+    date: Optional[datetime]
+    size: int
+    mtime_ns: int
+    inode: int
+    renamed_from: Optional[str] = None
+
+    @property
+    def entry(self) -> ManifestEntry:
+        return ManifestEntry(self.source, self.size, self.mtime_ns, self.inode)
+
+    def to_dict(self) -> dict:
+        d = self._asdict()
+        d['date'] = self.date.isoformat() if self.date else None
+        return d
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "PlannedMove":
+        d = dict(d)
+        d['date'] = datetime.fromisoformat(d['date']) if d.get('date') else None
+        return cls(**{k: d.get(k) for k in cls._fields})
+
+
+class MovePlan:
+    """
+    An organize run's decisions for every file, made before anything is moved: dry runs show it,
+    save() keeps it, and OrganizerEngine.execute() carries it out later without reading any dates again.
+    Saved as JSON lines: a header object, then one object per file.
+    """
+
+    def __init__(self, source_dir: str, use_flat_folders: bool = False, created: Optional[float] = None):
+        self.source_dir = os.path.abspath(source_dir)
+        self.use_flat_folders = use_flat_folders
+        self.created = created if created is not None else time.time()
+        self.moves: List[PlannedMove] = []
+
+    def add(self, move: PlannedMove):
+        self.moves.append(move)
+
+    def pending(self) -> List[PlannedMove]:
+        """The files to move, in plan order."""
+        return [m for m in self.moves if m.action == 'move']
+
+    def target_dirs(self) -> List[str]:
+        """Distinct folders the pending moves go to, in first-use order."""
+        return list(dict.fromkeys(os.path.dirname(m.target) for m in self.pending()))
+
+    def save(self, path: str):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(json.dumps({'version': PLAN_VERSION, 'source_dir': self.source_dir,
+                                 'use_flat_folders': self.use_flat_folders, 'created': self.created}) + "\n")
+            for move in self.moves:
+                fh.write(json.dumps(move.to_dict()) + "\n")
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "MovePlan":
+        with open(path, "r", encoding="utf-8") as fh:
+            header = json.loads(fh.readline())
+            if header.get('version') != PLAN_VERSION:
+                raise ValueError(f"Unsupported plan version {header.get('version')} in {path}")
+            plan = cls(header['source_dir'], header.get('use_flat_folders', False), header.get('created'))
+            for line in fh:
+                if line.strip():
+                    plan.moves.append(PlannedMove.from_dict(json.loads(line)))
+        return plan
+
+
+class DeviceMap:
+    """st_dev of folders, one stat per folder: tells whether a move can be a rename."""
+
+    def __init__(self):
+        self._devices: Dict[str, Optional[int]] = {}
+
+    def device(self, folder: str) -> Optional[int]:
+        if folder not in self._devices:
+            try:
+                self._devices[folder] = os.stat(folder).st_dev
+            except OSError:
+                self._devices[folder] = None
+        return self._devices[folder]
+
+    def same(self, source: str, target: str) -> bool:
+        a = self.device(os.path.dirname(source))
+        return a is not None and a == self.device(os.path.dirname(target))
+
+
+class DestinationIndex:
+    """
+    Names taken in the folders an organize run moves files into, so targets are checked and collisions
+    resolved in memory: each folder is listed once (os.scandir), recording every file's size, mtime and
+    inode, and the targets planned so far are added as they are assigned. Names compare as the platform
+    does (case-insensitively on Windows).
+    """
+
+    def __init__(self):
+        # folder -> normcased name -> the file holding it (on disk, or the planned file), None if unreadable
+        self._folders: Dict[str, Dict[str, Optional[ManifestEntry]]] = {}
+        # Folders that exist but couldn't be listed: names not planned there are stat'ed instead
+        self._unlisted = set()
+
+    def get(self, path: str) -> Optional[ManifestEntry]:
+        """The file at path, on disk or planned (where a planned one is read from), or None if the name is free."""
+        folder, name = os.path.split(path)
+        names = self._names(folder)
+        key = os.path.normcase(name)
+        if key in names or folder not in self._unlisted:
+            return names.get(key)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return ManifestEntry(path, st.st_size, st.st_mtime_ns, st.st_ino)
+
+    def taken(self, path: str) -> bool:
+        folder, name = os.path.split(path)
+        if os.path.normcase(name) in self._names(folder):
+            return True
+        return folder in self._unlisted and os.path.lexists(path)
+
+    def free_name(self, path: str) -> str:
+        """path if it's free, else the first of base_1.ext, base_2.ext, ... that is."""
+        base, extension = os.path.splitext(path)
+        candidate, n = path, 0
+        while self.taken(candidate):
+            n += 1
+            candidate = f"{base}_{n}{extension}"
+        return candidate
+
+    def claim(self, path: str, entry: ManifestEntry):
+        """Mark path as the target of entry's planned move."""
+        folder, name = os.path.split(path)
+        self._names(folder)[os.path.normcase(name)] = entry
+
+    def _names(self, folder: str) -> Dict[str, Optional[ManifestEntry]]:
+        names = self._folders.get(folder)
+        if names is None:
+            names = self._folders[folder] = {}
+            try:
+                with os.scandir(folder) as it:
+                    for item in it:
+                        # Free on Windows (part of the listing); one stat per file elsewhere
+                        try:
+                            st = item.stat()
+                            names[os.path.normcase(item.name)] = ManifestEntry(
+                                item.path, st.st_size, st.st_mtime_ns, st.st_ino)
+                        except OSError:
+                            names[os.path.normcase(item.name)] = None  # Taken, but not comparable (e.g. broken link)
+            except FileNotFoundError:
+                pass  # Created when the first file moves in
+            except OSError:
+                self._unlisted.add(folder)
+        return names
+
+
+def copy_move(source: str, target: str):
+    """Move across devices: copy (with timestamps) under a partial name, rename into place, remove the source."""
+    partial = target + COPY_SUFFIX
+    try:
+        shutil.copy2(source, partial)
+        os.replace(partial, target)
+    except BaseException:
+        try:
+            os.remove(partial)
+        except OSError:
+            pass
+        raise
+    os.remove(source)
+
@@ -1,38 +1,64 @@
+import errno
 import os
-import shutil
-import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Callable, Optional
-import piexif
+from typing import Dict, List, Callable, Optional, Iterable, Iterator, Tuple
+from core.container_reader import read_container_date
+from core.duplicates import DuplicateIndex, HashStore, file_key
+from core.exif_reader import read_exif_date
+from core.instrumentation import RunStats, Profiler, maybe_profile
+from core.manifest import Manifest, ManifestEntry, scan_tree, stat_entries
+from core.move_journal import MoveJournal, interrupted_journals
+from core.move_plan import DestinationIndex, DeviceMap, MovePlan, PlannedMove, copy_move
+
+# Media the organizer sorts into date folders
+MEDIA_EXTS = {'.jpg', '.jpeg', '.png', '.mp4', '.mov', '.avi', '.webm', '.mkv', '.gif', '.bmp', '.tiff'}
+
+# Threads reading dates (EXIF / stat) ahead of the move decisions. Date reads are I/O-latency bound,
+# so on network storage this scales well past the core count. 1 = read inline.
+DEFAULT_DATE_WORKERS = 8
+# Files whose dates may be read ahead of the one being moved, per date thread
+DATE_READAHEAD_PER_WORKER = 4
+
+# Threads copying files for moves across devices (moves within a device are renames, done inline)
+DEFAULT_COPY_WORKERS = 4
+
 
 class OrganizerEngine:
     def __init__(self, logger_callback: Optional[Callable[[str], None]] = None):
         self.logger = logger_callback or (lambda x: print(x))
         self.cancel_flag = False
+        # Per-stage timings of the last run (core.instrumentation.RunStats);
+        # profile_path, when set, runs organize() under cProfile and writes the profile there.
+        self.stats = RunStats()
+        self.profile_path: Optional[str] = None
+        self.date_workers = DEFAULT_DATE_WORKERS
+        self.copy_workers = DEFAULT_COPY_WORKERS
+        # Plan of the last organize run (a dry run's can be handed to execute())
+        self.last_plan: Optional[MovePlan] = None
+        # Interrupted runs already reported (watch mode plans many batches)
+        self._reported_interrupted: set = set()
 
     def cancel(self):
         self.cancel_flag = True
 
-    def get_date_taken(self, file_path: str) -> Optional[datetime]:
+    def get_date_taken(self, file_path: str, mtime_ns: Optional[int] = None) -> Optional[datetime]:
         """
-        Extract date taken from EXIF or fallback to file modified time.
+        Extract date taken from EXIF / video container metadata or fallback to file modified time.
+        mtime_ns: the file's mtime if already known (e.g. from the directory listing), saving a stat.
         """
-        # Try Piexif for images
-        try:
-            exif_dict = piexif.load(file_path)
-            # DateTimeOriginal is 36867
-            if 36867 in exif_dict.get("Exif", {}):
-                date_str = exif_dict["Exif"][36867].decode("utf-8")
-                # Format is usually "YYYY:MM:DD HH:MM:SS"
-                return datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")
-            
-            # DateTimeDigitized is 36868
-            if 36868 in exif_dict.get("Exif", {}):
-                date_str = exif_dict["Exif"][36868].decode("utf-8")
-                return datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")
+        # 1. EXIF DateTimeOriginal / DateTimeDigitized: header bytes only, and only for formats that carry EXIF
+        date_obj, bytes_read = read_exif_date(file_path)
+        self.stats.count_read(bytes_read)
+        if date_obj:
+            return date_obj
 
-        except Exception:
-            pass
+        # 1b. Video creation time: MP4/MOV moov/mvhd, MKV/WebM Segment Info DateUTC (headers only, media data skipped)
+        date_obj, bytes_read = read_container_date(file_path)
+        self.stats.count_read(bytes_read)
+        if date_obj:
+            return date_obj
             
         # 2. Try Filename Parsing (Smart Regex)
         # Looks for patterns like:
@@ -59,9 +85,9 @@ class OrganizerEngine:
                 except:
                     continue
 
-        # 3. Fallback to file creation/modification (Standard for videos/webms if no other lib)
+        # 3. Fallback to file creation/modification (videos without container dates, GIF, BMP)
         try:
-            timestamp = os.path.getmtime(file_path)
+            timestamp = mtime_ns / 1e9 if mtime_ns is not None else os.path.getmtime(file_path)
             # Check if timestamp is reasonable (e.g. not 1970)
             dt = datetime.fromtimestamp(timestamp)
             if dt.year < 1980: return None # Junk date
@@ -70,128 +96,499 @@ class OrganizerEngine:
             return None
 
     def count_files(self, source_dir: str, valid_exts: set) -> int:
-        count = 0
-        for root, _, files in os.walk(source_dir):
-            if self.cancel_flag: return 0
-            for file in files:
-                if os.path.splitext(file)[1].lower() in valid_exts:
-                    count += 1
-        return count
-
-    def organize(self, source_dir: str, dry_run: bool = True, use_flat_folders: bool = False, progress_callback=None):
+        # organize() no longer needs this (its manifest counts while it works); kept for callers wanting a number up front
+        count = sum(1 for _ in scan_tree(source_dir, valid_exts, stop=lambda: self.cancel_flag))
+        return 0 if self.cancel_flag else count
+
+    def organize(self, source_dir: str, dry_run: bool = True, use_flat_folders: bool = False, progress_callback=None,
+                 result_callback: Optional[Callable[[dict], None]] = None):
+        """
+        Sort media under source_dir into YYYY/YYYY-MM (or flat YYYY-MM) folders.
+        Every file is decided first (the plan, kept in self.last_plan); unless dry_run the plan is then
+        carried out. result_callback, if given, receives one dict per media file:
+        {'file', 'action' ('move' | 'dry_run' | 'duplicate' | 'skipped' | 'in_place' | 'error'), 'target', 'date'}.
+        Stage timings are logged at the end and kept in self.stats.
+        """
+        # Absolute like the walked paths, or no file would ever be found already at its target
+        source_dir = os.path.abspath(source_dir)
         if not os.path.exists(source_dir):
             self.logger("Source directory does not exist.")
             return
 
+        return self._instrumented(lambda: self._organize(source_dir, dry_run, use_flat_folders, progress_callback,
+                                                         result_callback))
+
+    def organize_files(self, source_dir: str, paths: List[str], dry_run: bool = True, use_flat_folders: bool = False,
+                       result_callback: Optional[Callable[[dict], None]] = None):
+        """
+        organize() for an explicit list of files (e.g. new arrivals in watch mode): each one is sorted
+        into source_dir's YYYY/YYYY-MM folders exactly as a full run would. Non-media paths are ignored.
+        """
+        source_dir = os.path.abspath(source_dir)
+        if not os.path.exists(source_dir):
+            self.logger("Source directory does not exist.")
+            return
+
+        def run():
+            self.cancel_flag = False
+            return self._plan_and_execute(source_dir, Manifest.from_paths(paths, MEDIA_EXTS), dry_run,
+                                          use_flat_folders, None, result_callback)
+
+        return self._instrumented(run)
+
+    def execute(self, plan: MovePlan, progress_callback=None, result_callback: Optional[Callable[[dict], None]] = None):
+        """
+        Carry out a plan made earlier (a dry run's self.last_plan, or MovePlan.load()) without reading
+        any dates again. Targets taken since the plan was made are never overwritten: those files are
+        reported as errors and stay where they are.
+        """
+        if not os.path.exists(plan.source_dir):
+            self.logger("Source directory does not exist.")
+            return
+
+        def run():
+            self.cancel_flag = False
+            self._report_interrupted(plan.source_dir)
+            store = self._hash_store()
+            try:
+                moved = self._execute(plan, progress_callback, self._reporter(result_callback), store)
+            finally:
+                if store is not None:
+                    store.close()
+            counts = {'processed': len(plan.moves), 'moved': moved,
+                      'duplicates': sum(1 for m in plan.moves if m.action == 'duplicate')}
+            if self.cancel_flag:
+                self.logger("Operation Cancelled.")
+            self.logger(f"Done. Moved: {counts['moved']}. Duplicates: {counts['duplicates']}.")
+            return counts
+
+        return self._instrumented(run)
+
+    def _report_interrupted(self, source_dir: str):
+        """
+        Log the organize runs of source_dir that were interrupted (crash, power loss). They are left as
+        they are: finishing or rolling them back is the user's choice (`journal recover`, or the prompt
+        at app start). Files they moved are where this run finds them, and their pending targets that
+        this run takes are skipped by recovery, never overwritten.
+        """
+        try:
+            journals = interrupted_journals(source_dir, 'organize')
+        except OSError:
+            return
+        for journal in journals:
+            if journal.id in self._reported_interrupted:
+                continue
+            self._reported_interrupted.add(journal.id)
+            self.logger(f"Run {journal.id} of this folder was interrupted; finish or roll it back with "
+                        f"'journal recover' (or when the app starts).")
+
+    def _instrumented(self, run: Callable[[], dict]):
+        # Fresh stats per run, optional cProfile, timing report at the end
+        self.stats = RunStats()
+        profiler = Profiler(self.profile_path) if self.profile_path else None
+        try:
+            with maybe_profile(profiler):
+                return run()
+        finally:
+            self.stats.finish()
+            for line in self.stats.summary_lines():
+                self.logger(line)
+            if profiler:
+                try:
+                    saved = profiler.save()
+                    if saved:
+                        self.logger(f"Profile written to {saved}")
+                except Exception as e:
+                    self.logger(f"Could not write profile: {e}")
+
+    def _hash_store(self) -> Optional[HashStore]:
+        # Hashes persist in the cache folder; without it (read-only, locked) they last for this run only
+        try:
+            return HashStore()
+        except Exception as e:
+            self.logger(f"Hash cache unavailable ({e}); duplicate hashes won't be kept.")
+            return None
+
+    def _duplicate_index(self, source_dir: str) -> DuplicateIndex:
+        return DuplicateIndex(source_dir, self._hash_store(), self.stats)
+
+    def _organized_files(self, source_dir: str) -> Iterator[ManifestEntry]:
+        """Media files already in source_dir's date folders, YYYY/YYYY-MM or flat YYYY-MM (either style)."""
+        import re
+
+        def subdirs(folder: str, pattern: str) -> List[str]:
+            try:
+                with os.scandir(folder) as it:
+                    return sorted(e.path for e in it if re.match(pattern, e.name) and e.is_dir(follow_symlinks=False))
+            except OSError:
+                return []
+
+        for folder in subdirs(source_dir, r'^\d{4}(-\d{2})?$'):
+            months = subdirs(folder, r'^\d{4}-\d{2}$') if len(os.path.basename(folder)) == 4 else [folder]
+            for month in months:
+                if self.cancel_flag:
+                    return
+                yield from scan_tree(month, MEDIA_EXTS, include_subfolders=False)
+
+    def _read_date(self, entry: ManifestEntry) -> Optional[datetime]:
+        with self.stats.measure('date'):
+            return self.get_date_taken(entry.path, entry.mtime_ns)
+
+    def _dated(self, entries: Iterable[ManifestEntry]) -> Iterator[Tuple[ManifestEntry, Optional[datetime]]]:
+        """
+        (entry, date taken) for each manifest entry, in input order, with dates read ahead on date_workers threads.
+        At most date_workers * DATE_READAHEAD_PER_WORKER reads are in flight, so memory stays bounded
+        and the consumer's move/collision decisions still happen one file at a time, in order.
+        Stops early (outstanding reads are cancelled) once cancel() is called.
+        """
+        if self.date_workers <= 1:
+            for entry in entries:
+                if self.cancel_flag:
+                    return
+                yield entry, self._read_date(entry)
+            return
+
+        window = deque()
+        limit = self.date_workers * DATE_READAHEAD_PER_WORKER
+        source = iter(entries)
+        with ThreadPoolExecutor(max_workers=self.date_workers, thread_name_prefix="date") as pool:
+            try:
+                while True:
+                    # Top up the window, then hand out the oldest read
+                    while len(window) < limit and not self.cancel_flag:
+                        entry = next(source, None)
+                        if entry is None:
+                            break
+                        window.append((entry, pool.submit(self._read_date, entry)))
+                    if not window or self.cancel_flag:
+                        return
+                    entry, future = window.popleft()
+                    with self.stats.measure('date_wait'):
+                        date_obj = future.result()
+                    yield entry, date_obj
+            finally:
+                for _, future in window:
+                    future.cancel()
+
+    def _log(self, msg: str):
+        # Per-file log lines, timed: a slow UI logger shows up as its own stage
+        with self.stats.measure('log_callback'):
+            self.logger(msg)
+
+    def _reporter(self, result_callback: Optional[Callable[[dict], None]]):
+        def report(entry: ManifestEntry, action, target=None, date=None, error=None):
+            path = entry.path
+            self.stats.count_file(entry.size)
+            if result_callback:
+                result = {'file': path, 'action': action, 'target': target, 'date': date.isoformat() if date else None}
+                if error:
+                    result['error'] = error
+                with self.stats.measure('result_callback'):
+                    result_callback(result)
+        return report
+
+    @staticmethod
+    def _tally(counts: dict, action: str):
+        if action in ('move', 'dry_run'):
+            counts['moved'] += 1
+        elif action == 'duplicate':
+            counts['duplicates'] += 1
+
+    def _organize(self, source_dir: str, dry_run: bool, use_flat_folders: bool, progress_callback,
+                  result_callback: Optional[Callable[[dict], None]]):
         self.cancel_flag = False
-        valid_exts = {'.jpg', '.jpeg', '.png', '.mp4', '.mov', '.avi', '.webm', '.mkv', '.gif', '.bmp', '.tiff'}
+
+        # One scandir walk, streamed: planning starts on the first files while the rest of the tree is still
+        # being listed, and the progress total grows until the walk completes. Nothing moves until the walk
+        # and the plan are done, so the walk never meets files this run has moved.
+        manifest = Manifest(source_dir, MEDIA_EXTS, stats=self.stats,
+                            on_complete=lambda m: self.logger(f"Found {m.total} media files."))
+        if progress_callback: progress_callback(0, 0, "Scanning folders...")
+
+        folder_style = "Flat (YYYY-MM)" if use_flat_folders else "Nested (YYYY/YYYY-MM)"
+        self.logger(f"Starting Organization (Dry Run: {dry_run}, Style: {folder_style})...")
+        try:
+            return self._plan_and_execute(source_dir, manifest.start(), dry_run, use_flat_folders,
+                                          progress_callback, result_callback, index_organized=True)
+        finally:
+            manifest.stop()
+
+    def _plan_and_execute(self, source_dir: str, manifest: Manifest, dry_run: bool, use_flat_folders: bool,
+                          progress_callback, result_callback: Optional[Callable[[dict], None]],
+                          index_organized: bool = False) -> dict:
+        """
+        Plan every file of the manifest (kept as self.last_plan), reporting all but the moves as they are
+        decided; then, unless dry_run or cancelled, execute the plan. Returns the counts.
+        index_organized: list the date folders first, so a copy of an organized file is a duplicate even
+        when the walk reaches it before the original (otherwise only files recorded in the store count).
+        """
+        source_dir = os.path.abspath(source_dir)
+        if not dry_run:
+            self._report_interrupted(source_dir)
+        plan = MovePlan(source_dir, use_flat_folders)
+        self.last_plan = plan
+        counts = {'processed': 0, 'moved': 0, 'duplicates': 0}
+        report = self._reporter(result_callback)
+        duplicates = self._duplicate_index(source_dir)
+        # Names in the target folders, plus the targets planned so far (taken although nothing has moved yet)
+        targets = DestinationIndex()
+
+        # Dates are read ahead on a thread pool; decisions stay sequential, in walk order
+        try:
+            if index_organized:
+                with self.stats.measure('index_organized'):
+                    duplicates.add_existing(self._organized_files(source_dir))
+            for entry, date_obj in self._dated(manifest):
+                counts['processed'] += 1
+                if progress_callback:
+                    with self.stats.measure('progress_callback'):
+                        progress_callback(counts['processed'], manifest.total, os.path.basename(entry.path))
+                move = self._plan_file(entry, source_dir, use_flat_folders, date_obj, targets, duplicates)
+                plan.add(move)
+                if move.action == 'move' and not dry_run:
+                    continue  # Reported once it has moved
+                if move.action == 'move':
+                    self._log(f"[DRY RUN] \"{os.path.basename(entry.path)}\" -> \"{os.path.relpath(move.target, source_dir)}\"")
+                action = 'dry_run' if move.action == 'move' else move.action
+                report(entry, action, move.target, date_obj)
+                self._tally(counts, action)
+
+            if not dry_run and not self.cancel_flag:
+                counts['moved'] = self._execute(plan, progress_callback, report, duplicates.store)
+        finally:
+            duplicates.close()
+
+        if self.cancel_flag:
+            self.logger("Operation Cancelled.")
+
+        self.logger(f"Done. Moved: {counts['moved']}. Duplicates: {counts['duplicates']}.")
+        return counts
+
+    def _plan_file(self, entry: ManifestEntry, source_dir: str, use_flat_folders: bool, date_obj: Optional[datetime],
+                   targets: DestinationIndex, duplicates: Optional[DuplicateIndex] = None) -> PlannedMove:
+        """
+        Decide where one file dated date_obj goes, without touching it. targets holds the names taken in
+        the target folders, including the moves decided so far, and gains this file's target if it is to move.
+        Files ending up in the organized tree are added to duplicates, and a file identical to one
+        already there (under any name) is planned as a duplicate instead of a move.
+        """
+        full_path = entry.path
+        file = os.path.basename(full_path)
+
+        def decided(action: str, target: Optional[str], reason: str, renamed_from: Optional[str] = None):
+            return PlannedMove(full_path, action, target, reason, date_obj, entry.size, entry.mtime_ns, entry.inode,
+                               renamed_from)
+
+        if not date_obj:
+            self._log(f"Skipping {file}: Could not determine date.")
+            return decided('skipped', None, 'no_date')
         
-        self.logger("Counting files...")
-        if progress_callback: progress_callback(0, 0, "Counting files...")
+        # Format Data
+        year = str(date_obj.year)
+        month_name = f"{date_obj.year}-{date_obj.month:02d}"
+        date_prefix = f"{date_obj.year}-{date_obj.month:02d}-{date_obj.day:02d}"
+
+        # Target Structure
+        if use_flat_folders:
+            # Flat: Source/YYYY-MM/
+            target_dir = os.path.join(source_dir, month_name)
+            rel_base = month_name
+        else:
+            # Nested: Source/YYYY/YYYY-MM/
+            target_dir = os.path.join(source_dir, year, month_name)
+            rel_base = os.path.join(year, month_name)
         
-        total_files = self.count_files(source_dir, valid_exts)
-        self.logger(f"Found {total_files} media files.")
+        # Logic: Check if file already has a YYYY-MM-DD prefix
+        # Regex for YYYY-MM-DD_ at start
+        import re
+        match = re.match(r'^(\d{4}-\d{2}-\d{2})_', file)
         
-        folder_style = "Flat (YYYY-MM)" if use_flat_folders else "Nested (YYYY/YYYY-MM)"
-        self.logger(f"Starting Organization (Dry Run: {dry_run}, Style: {folder_style})...")
+        if match:
+            existing_date = match.group(1)
+            if existing_date == date_prefix:
+                # It matches our calculated date. Keep it as is (avoid double prefix)
+                new_filename = file
+                reason = 'prefix_kept'
+            else:
+                # Mismatch! The file has a date prefix, but it's WRONG (according to our best scan).
+                # Strip the old prefix and apply the new one.
+                # Original name without prefix
+                original_name = file[len(match.group(0)):]
+                new_filename = f"{date_prefix}_{original_name}"
+                reason = 'prefix_fixed'
+        else:
+            # No prefix, add it.
+            new_filename = f"{date_prefix}_{file}"
+            reason = 'prefix_added'
+
+        target_path = os.path.join(target_dir, new_filename)
         
-        files_moved = 0
-        files_processed = 0
-        duplicates_found = 0
+        # Check if it's already there (path match)
+        if full_path == target_path:
+            if duplicates is not None:
+                duplicates.add(entry)
+            return decided('in_place', target_path, 'already_organized')
         
-        for root, _, files in os.walk(source_dir):
-            if self.cancel_flag:
-                self.logger("Operation Cancelled.")
-                break
-                
-            for file in files:
-                if self.cancel_flag: break
-                
-                ext = os.path.splitext(file)[1].lower()
-                if ext not in valid_exts:
-                    continue
-                    
-                files_processed += 1
-                if progress_callback:
-                    progress_callback(files_processed, total_files, file)
+        # Deduplication / Collision: same content at the target name (on disk or planned), or anywhere else
+        # in the organized tree
+        with self.stats.measure('duplicate_check'):
+            existing = targets.get(target_path)
+            collision = existing is not None or targets.taken(target_path)  # Unreadable names are taken too
+            if duplicates is None:
+                duplicate_of = target_path if existing is not None and entry.size == existing.size else None
+            elif existing is not None and duplicates.same(entry, existing):
+                duplicate_of = target_path
+            else:
+                duplicate_of = duplicates.find(entry)
+        if duplicate_of:
+            if duplicate_of == target_path:
+                self._log(f"[DUPLICATE] {file} exists in {rel_base}. Skipping.")
+                return decided('duplicate', duplicate_of, 'same_as_target')
+            self._log(f"[DUPLICATE] {file} is identical to {os.path.relpath(duplicate_of, source_dir)}. Skipping.")
+            return decided('duplicate', duplicate_of, 'same_content')
+        renamed_from = None
+        if collision:
+            # Name collision with different content: first free numbered name (_1, _2, ...)
+            renamed_from = target_path
+            target_path = targets.free_name(target_path)
+
+        targets.claim(target_path, entry)
+        if duplicates is not None:
+            duplicates.add(entry, shown_path=target_path)
+        return decided('move', target_path, reason, renamed_from)
+
+    def _execute(self, plan: MovePlan, progress_callback, report, store: Optional[HashStore]) -> int:
+        """
+        Move the plan's files; returns how many moved. Each target folder is created, or listed once so
+        no existing file is ever overwritten. Moves within a device are plain renames, done in plan
+        order; moves across devices are copied on copy_workers threads, then the source removed.
+        """
+        moves = plan.pending()
+        if not moves:
+            return 0
+        self.logger(f"Moving {len(moves)} files...")
+        taken: Dict[str, set] = {}
+        unlisted = set()
+        for folder in plan.target_dirs():
+            with self.stats.measure('makedirs'):
+                try:
+                    taken[folder] = {os.path.normcase(name) for name in os.listdir(folder)}
+                except FileNotFoundError:
+                    try:
+                        os.makedirs(folder, exist_ok=True)
+                    except OSError:
+                        pass  # Reported per file by the moves into it
+                    taken[folder] = set()
+                except OSError:
+                    taken[folder] = set()
+                    unlisted.add(folder)
 
-                full_path = os.path.join(root, file)
-                date_obj = self.get_date_taken(full_path)
-                
-                if not date_obj:
-                    self.logger(f"Skipping {file}: Could not determine date.")
+        devices = DeviceMap()
+        journal = None
+        moved = 0
+        done = 0
+        copies: List[Tuple[int, PlannedMove]] = []
+
+        def finished(index: Optional[int], move: PlannedMove, error: Optional[Exception] = None,
+                     new_entry: Optional[ManifestEntry] = None):
+            nonlocal moved, done
+            done += 1
+            file = os.path.basename(move.source)
+            if error is not None:
+                self._log(f"Error moving {file}: {error}")
+                report(move.entry, 'error', move.target, move.date, str(error))
+            else:
+                moved += 1
+                if journal is not None:
+                    journal.moved(index)
+                if store is not None:
+                    store.put(file_key(new_entry), path=move.target)
+                if move.reason == 'prefix_fixed':
+                    self._log(f"[RENAME FIX] Found incorrect date {file[:10]}, fixing to {os.path.basename(move.target)[:10]}")
+                self._log(f"[MOVE] \"{file}\" -> \"{os.path.relpath(move.target, plan.source_dir)}\"")
+                report(move.entry, 'move', move.target, move.date)
+            if progress_callback:
+                with self.stats.measure('progress_callback'):
+                    progress_callback(done, len(moves), file)
+
+        # Targets taken since the plan was made stay untouched: those files are reported and neither
+        # journaled nor moved
+        runnable: List[PlannedMove] = []
+        for move in moves:
+            folder, name = os.path.split(move.target)
+            name = os.path.normcase(name)  # As the platform compares names (case-insensitively on Windows)
+            if name in taken[folder] or (folder in unlisted and os.path.lexists(move.target)):
+                finished(None, move, FileExistsError(f"{move.target} already exists"))
+                continue
+            taken[folder].add(name)
+            runnable.append(move)
+
+        # Every move is journaled (one fsync) before the first one happens, so the run can be undone
+        # and, if interrupted, finished or rolled back
+        try:
+            journal = MoveJournal.begin('organize', plan.source_dir,
+                                        ((m.source, m.target, m.size, m.mtime_ns) for m in runnable), self.stats,
+                                        checked=True)
+        except OSError as e:
+            self.logger(f"Move journal unavailable ({e}); this run can't be undone.")
+            journal = None
+
+        try:
+            for index, move in enumerate(runnable):
+                if self.cancel_flag:
+                    break
+                if not devices.same(move.source, move.target):
+                    copies.append((index, move))
                     continue
-                
-                # Format Data
-                year = str(date_obj.year)
-                month_name = f"{date_obj.year}-{date_obj.month:02d}"
-                date_prefix = f"{date_obj.year}-{date_obj.month:02d}-{date_obj.day:02d}"
-
-                # Target Structure
-                if use_flat_folders:
-                    # Flat: Source/YYYY-MM/
-                    target_dir = os.path.join(source_dir, month_name)
-                    rel_base = month_name
-                else:
-                    # Nested: Source/YYYY/YYYY-MM/
-                    target_dir = os.path.join(source_dir, year, month_name)
-                    rel_base = os.path.join(year, month_name)
-                
-                # Logic: Check if file already has a YYYY-MM-DD prefix
-                # Regex for YYYY-MM-DD_ at start
-                import re
-                match = re.match(r'^(\d{4}-\d{2}-\d{2})_', file)
-                
-                if match:
-                    existing_date = match.group(1)
-                    if existing_date == date_prefix:
-                        # It matches our calculated date. Keep it as is (avoid double prefix)
-                        new_filename = file
+                try:
+                    with self.stats.measure('move'):
+                        os.rename(move.source, move.target)
+                except OSError as e:
+                    if e.errno == errno.EXDEV:
+                        copies.append((index, move))  # Different filesystems behind one device number (e.g. bind mounts)
                     else:
-                        # Mismatch! The file has a date prefix, but it's WRONG (according to our best scan).
-                        # Strip the old prefix and apply the new one.
-                        # Original name without prefix
-                        original_name = file[len(match.group(0)):]
-                        new_filename = f"{date_prefix}_{original_name}"
-                        if not dry_run:
-                             self.logger(f"[RENAME FIX] Found incorrect date {existing_date}, fixing to {date_prefix}")
-                else:
-                    # No prefix, add it.
-                    new_filename = f"{date_prefix}_{file}"
-
-                target_path = os.path.join(target_dir, new_filename)
-                
-                # Check if it's already there (path match)
-                if full_path == target_path:
+                        finished(index, move, e)
                     continue
-                
-                # Deduplication / Collision
-                if os.path.exists(target_path):
-                    # Simple size check
-                    if os.path.getsize(full_path) == os.path.getsize(target_path):
-                        self.logger(f"[DUPLICATE] {file} exists in {rel_base}. Skipping.")
-                        duplicates_found += 1
-                        continue
-                    else:
-                        # Name collision, rename append timestamp
-                        base, extension = os.path.splitext(new_filename)
-                        new_name_collision = f"{base}_{int(datetime.now().timestamp())}{extension}"
-                        target_path = os.path.join(target_dir, new_name_collision)
-                        new_filename = new_name_collision
-
-                rel_target_path = os.path.join(rel_base, new_filename)
-                
-                if not dry_run:
-                    os.makedirs(target_dir, exist_ok=True)
-                    try:
-                        shutil.move(full_path, target_path)
-                        files_moved += 1
-                        self.logger(f"[MOVE] \"{file}\" -> \"{rel_target_path}\"")
-                    except Exception as e:
-                        self.logger(f"Error moving {file}: {e}")
-                else:
-                    files_moved += 1
-                    self.logger(f"[DRY RUN] \"{file}\" -> \"{rel_target_path}\"")
+                finished(index, move, new_entry=move.entry._replace(path=move.target))
 
-        self.logger(f"Done. Moved: {files_moved}. Duplicates: {duplicates_found}.")
+            if copies and not self.cancel_flag:
+                self._copy_moves(copies, finished)
+        except BaseException:
+            if journal is not None:
+                journal.close()  # Left unfinished: recovered from the file system on the next run
+            raise
+        if journal is not None:
+            journal.finish()
+        return moved
 
+    def _copy_moves(self, copies: List[Tuple[int, PlannedMove]], finished):
+        """Cross-device moves on copy_workers threads, finished (in order) on this one."""
+        def timed_copy(move: PlannedMove) -> ManifestEntry:
+            with self.stats.measure('copy'):
+                copy_move(move.source, move.target)
+            return stat_entries([move.target])[0]
+
+        window = deque()
+        limit = self.copy_workers * 2
+        with ThreadPoolExecutor(max_workers=self.copy_workers, thread_name_prefix="copy") as pool:
+            try:
+                for index, move in copies:
+                    if self.cancel_flag:
+                        break
+                    window.append((index, move, pool.submit(timed_copy, move)))
+                    while len(window) >= limit:
+                        self._finish_copy(*window.popleft(), finished)
+                while window:
+                    self._finish_copy(*window.popleft(), finished)
+            finally:
+                for _, _, future in window:
+                    future.cancel()
+
+    @staticmethod
+    def _finish_copy(index: int, move: PlannedMove, future, finished):
+        try:
+            new_entry = future.result()
+        except Exception as e:
+            finished(index, move, e)
+        else:
+            finished(index, move, new_entry=new_entry)
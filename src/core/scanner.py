@@ -1,215 +1,1305 @@
 import os
 import sys
+import multiprocessing
 import cv2
+import numpy as np
 import mediapipe as mp
 from mediapipe.tasks import python
 from mediapipe.tasks.python import vision
 import threading
 import time
-from typing import List, Callable, Optional
+import queue
+from itertools import chain, islice
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Callable, Optional, Tuple, Dict, Any, Iterable, Iterator, NamedTuple
+from PIL import Image
+from core.cache import DetectionCache
+from core.checkpoint import ScanJournal
+from core.manifest import Manifest
+from core.yunet_batch import BatchedYuNet
+from core.exif_reader import read_thumbnail
+from core.instrumentation import RunStats, Profiler, maybe_profile
+from core.byte_queue import ByteBudgetQueue, default_budget
+from core.autotune import DNN_TARGETS, AUTOTUNE_MIN_FILES, DEFAULT_SAMPLE_SIZE, Autotuner, default_dnn_target, load_tuning
+
+# Detectors run at these floors so the raw outputs cached in DetectionCache stay
+# usable when the decision thresholds (ScannerEngine.face_threshold etc.) change.
+FACE_SCORE_FLOOR = 0.3
+ANIMAL_SCORE_FLOOR = 0.2
+
+DEFAULT_FACE_THRESHOLD = 0.5
+DEFAULT_ANIMAL_THRESHOLD = 0.4
+ANIMAL_LABELS = {'cat', 'dog', 'bird', 'horse', 'sheep', 'cow', 'bear', 'zebra', 'giraffe'}
+
+# Long edge (pixels) images are decoded/resized to before detection. 0 = full resolution.
+DEFAULT_DETECT_LONG_EDGE = 1024
+
+# Letterbox shape long edge used by batched inference when detect_long_edge is 0 (full size)
+BATCH_FALLBACK_LONG_EDGE = 1024
+
+# Cascade (see ScannerEngine.cascade): stage-one face score that decides an image without a full decode,
+# and the long edge of the reduced decode used when a JPEG has no embedded thumbnail.
+DEFAULT_CASCADE_CONFIDENT = 0.8
+CASCADE_REDUCED_EDGE = 320
+
+# Adaptive detection (see ScannerEngine.adaptive): long edges tried from coarse to fine, then overlapping
+# full-resolution tiles for images whose long edge is at least DEFAULT_TILE_MIN_EDGE.
+DEFAULT_ESCALATION_EDGES = [640, 1600]
+DEFAULT_TILE_SIZE = 1024
+DEFAULT_TILE_OVERLAP = 0.25
+DEFAULT_TILE_MIN_EDGE = 4000
+
+IMAGE_EXTS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tiff'}
+
+# Videos (see ScannerEngine.scan_videos): frames sampled per clip by seeking, and the per-clip time budget.
+# Clips that don't report a frame count are sampled every VIDEO_FALLBACK_STEP_MS instead.
+VIDEO_EXTS = {'.mp4', '.mov', '.avi', '.mkv', '.webm'}
+DEFAULT_VIDEO_FRAMES = 8
+DEFAULT_VIDEO_TIME_BUDGET = 5.0
+VIDEO_FALLBACK_STEP_MS = 2000
+
+JPEG_EXTS = {'.jpg', '.jpeg'}
+# libjpeg DCT scaling: decode straight to 1/8, 1/4 or 1/2 size
+_JPEG_REDUCED_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+# Files handed to a worker process per task. Small enough that Stop reacts quickly,
+# large enough that pickling/IPC overhead stays negligible next to inference.
+WORKER_CHUNK_SIZE = 16
+
+# Worker processes are spawned, never forked: a child forked after this process has run OpenCV
+# inference (a threaded scan, autotuning) inherits its thread pool state and can crash.
+WORKER_MP_CONTEXT = multiprocessing.get_context('spawn')
+
+# Marks the end of iter_scan's result stream
+_SCAN_DONE = object()
+
+
+def _tile_starts(length: int, size: int, step: int) -> List[int]:
+    # Tile origins along one axis; the last tile is pulled back so it ends exactly at the edge
+    starts = list(range(0, max(length - size, 0) + 1, step))
+    if starts[-1] + size < length:
+        starts.append(length - size)
+    return starts
+
+
+def read_video_frame(f_path: str, position: float = 0.5):
+    """One BGR frame at `position` (0..1) through a video, or None. Seeks rather than decoding from the start."""
+    cap = cv2.VideoCapture(f_path)
+    try:
+        if not cap.isOpened():
+            return None
+        count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        if count > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(count * position))
+        ok, frame = cap.read()
+        return frame if ok else None
+    finally:
+        cap.release()
+
+
+class ScanResult(NamedTuple):
+    """One classified image, as yielded by ScannerEngine.iter_scan."""
+    index: int          # position in the scan's file list (yield order is completion order)
+    path: str
+    is_excluded: bool   # True = Keep list (People/Animals), False = Move list (No People)
+    face_count: int     # faces above face_threshold
+    from_cache: bool
+    seconds: float = 0.0  # decode + detection time spent on this image (0 for cache hits)
+
+    @property
+    def verdict(self) -> str:
+        return 'keep' if self.is_excluded else 'move'
+
+
+# Per-process detector state (see _worker_init). FaceDetectorYN and the MediaPipe
+# ObjectDetector are not safe to share, so every worker owns its own pair.
+_worker_engine = None
+_worker_face = None
+_worker_animal = None
+_worker_profile = None
+
+
+def _worker_init(keep_animals: bool, settings: Dict[str, Any]):
+    global _worker_engine, _worker_face, _worker_animal, _worker_profile
+    # One inference thread per process; the pool itself provides the parallelism.
+    cv2.setNumThreads(1)
+    _worker_engine = ScannerEngine(logger_callback=lambda x: None)
+    for name, value in settings.items():
+        setattr(_worker_engine, name, value)
+    _worker_face = _worker_engine._init_opencv_face()
+    _worker_animal = _worker_engine._init_animal_detector() if keep_animals else None
+    if _worker_engine.profile_path:
+        import cProfile
+        _worker_profile = cProfile.Profile()
+
+
+def _worker_analyze(chunk: List[Tuple[int, str]], keep_animals: bool):
+    """
+    Decode and run the detectors over a chunk of (index, path) pairs inside a worker process.
+    Returns ([(index, detection record), ...], RunStats dict for the chunk); a record is None
+    when the image could not be read.
+    """
+    _worker_engine.stats = RunStats()
+    if _worker_profile is None:
+        return _worker_analyze_chunk(chunk, keep_animals), _worker_engine.stats.to_dict()
+
+    _worker_profile.enable()
+    try:
+        results = _worker_analyze_chunk(chunk, keep_animals)
+    finally:
+        _worker_profile.disable()
+    # Pool workers have no exit hook, so the cumulative profile is rewritten after every chunk
+    _worker_profile.dump_stats(f"{_worker_engine.profile_path}.worker{os.getpid()}")
+    return results, _worker_engine.stats.to_dict()
+
+
+def _worker_analyze_chunk(chunk: List[Tuple[int, str]], keep_animals: bool) -> List[Tuple[int, Optional[Dict[str, Any]]]]:
+    results = []
+    batch = []
+    step = max(1, _worker_engine.batch_size)
+
+    def flush_batch():
+        start = time.perf_counter()
+        records = _worker_engine._analyze_batch(_worker_face, _worker_animal, [b[1] for b in batch], [b[2] for b in batch], keep_animals)
+        # Every image in the group waits for the whole forward pass
+        elapsed = time.perf_counter() - start
+        for b, record in zip(batch, records):
+            record['seconds'] = b[3] + elapsed
+            results.append((b[0], record))
+        batch.clear()
+
+    for idx, f_path in chunk:
+        start = time.perf_counter()
+        if _worker_engine._is_staged(f_path):
+            image, scale, source = _worker_engine._load_staged(f_path)
+            record = None
+            if image is not None or source == 'video':
+                record = _worker_engine._analyze_staged(_worker_face, _worker_animal, f_path, image, scale, source, keep_animals)
+                if record is not None:
+                    record['seconds'] = time.perf_counter() - start
+            results.append((idx, record))
+            continue
+
+        image, scale = _worker_engine._load_image(f_path)
+
+        if image is None:
+            results.append((idx, None))
+            continue
+
+        batch.append((idx, image, scale, time.perf_counter() - start))
+        # Analyze every batch_size images, so a worker never holds more decoded pixels than one batch
+        if len(batch) >= step:
+            flush_batch()
+
+    if batch:
+        flush_batch()
+    return results
+
 
 class ScannerEngine:
     """
     AI Scanner using MediaPipe Face Detection.
-    Logic: 
+    Logic:
     - No Face Detected -> 'No People' (Keep/Left)
     - Face Detected -> 'Excluded' (Reject/Right)
     """
-    
+
     def __init__(self, logger_callback: Optional[Callable[[str], None]] = None):
         self.logger = logger_callback or (lambda x: print(x))
         self.stop_event = threading.Event()
-        
+
         # Results
         self.no_people_files: List[str] = []
         self.excluded_files: List[str] = []
-        
+
         # Progress Callbacks (current, total, eta_seconds)
         self.progress_callback: Optional[Callable[[int, int, float], None]] = None
 
+        # Decision thresholds, applied to raw (possibly cached) detector output
+        self.face_threshold = DEFAULT_FACE_THRESHOLD
+        self.animal_threshold = DEFAULT_ANIMAL_THRESHOLD
+        self.animal_labels = set(ANIMAL_LABELS)
+
+        # Detection resolution (long edge in pixels, 0 = full size). Boxes are mapped back to original coordinates.
+        self.detect_long_edge = DEFAULT_DETECT_LONG_EDGE
+
+        # Faces per YuNet forward pass. 1 = per-image FaceDetectorYN, >1 = BatchedYuNet over letterboxed shape buckets.
+        self.batch_size = 1
+
+        # Two-stage cascade: detect on the embedded EXIF thumbnail (or a tiny decode) first and only
+        # decode at full detection resolution when no face scored >= cascade_confident there.
+        self.cascade = False
+        self.cascade_confident = DEFAULT_CASCADE_CONFIDENT
+        self.cascade_stats: Dict[str, int] = {}
+
+        # Coarse-to-fine detection: try each long edge in escalation_edges in turn, then overlapping
+        # tile_size tiles at full resolution (images >= tile_min_edge only, 0 = never tile).
+        # Escalation stops at the first level where a face clears face_threshold.
+        self.adaptive = False
+        self.escalation_edges: List[int] = list(DEFAULT_ESCALATION_EDGES)
+        self.tile_size = DEFAULT_TILE_SIZE
+        self.tile_overlap = DEFAULT_TILE_OVERLAP
+        self.tile_min_edge = DEFAULT_TILE_MIN_EDGE
+        self.adaptive_stats: Dict[str, int] = {}
+
+        # Videos: when scan_videos is on, clips are classified from video_frames frames spread over
+        # the clip (seeking, not decoding every frame), stopping at the first frame with a face
+        # or after video_time_budget seconds per clip (0 = no limit).
+        self.scan_videos = False
+        self.video_frames = DEFAULT_VIDEO_FRAMES
+        self.video_time_budget = DEFAULT_VIDEO_TIME_BUDGET
+        self.video_stats: Dict[str, int] = {}
+
+        # Detection cache, opened on first use (see run_scan(use_cache=...))
+        self.cache: Optional[DetectionCache] = None
+
+        # Per-stage timings of the last (or current) scan; see core.instrumentation.RunStats.
+        # profile_path, when set, runs the scan under cProfile and writes the merged profile there.
+        self.stats = RunStats()
+        self.profile_path: Optional[str] = None
+        self._profiler: Optional[Profiler] = None
+
+        # Byte budget for decoded images between the decode thread and detection (None = share of available RAM)
+        self.queue_budget_bytes: Optional[int] = None
+        self._img_queue: Optional[ByteBudgetQueue] = None
+
+        # Files of the current / last scan (core.manifest), filled in while the scan runs
+        self._manifest: Optional[Manifest] = None
+
+        # Loaded single-process detectors, reused across scans (see _get_detectors)
+        self._detectors: Optional[tuple] = None
+
+        # Detector placement. dnn_target is a core.autotune.DNN_TARGETS name and num_threads the OpenCV
+        # thread count of single-process scans; None = this machine's autotune result, else defaults.
+        # With autotune on (off unless asked for), a scan of AUTOTUNE_MIN_FILES+ files on an untuned
+        # machine runs tune() first.
+        self.dnn_target: Optional[str] = None
+        self.num_threads: Optional[int] = None
+        self.autotune = False
+        self._tuning: Optional[Dict[str, Any]] = None
+        self._tuning_for: Optional[tuple] = None
+
+        # Folder scans append every verdict to a checkpoint journal (see core.checkpoint), so a
+        # cancelled or crashed scan can be resumed with run_scan(resume=True).
+        self.checkpoint = True
+        self.resumed_count = 0
+        self._journal: Optional[ScanJournal] = None
+
     def cancel(self):
         self.stop_event.set()
 
-    def run_scan(self, directory: str, include_subfolders: bool = True, keep_animals: bool = False):
+    @property
+    def buffered_bytes(self) -> int:
+        """Decoded image bytes currently in flight between decode and detection."""
+        return self._img_queue.buffered_bytes if self._img_queue else 0
+
+    @property
+    def peak_buffered_bytes(self) -> int:
+        """High-water mark of buffered_bytes in the current / last single-process scan."""
+        return self._img_queue.peak_bytes if self._img_queue else 0
+
+    def run_scan(self, directory: str, include_subfolders: bool = True, keep_animals: bool = False,
+                 workers: Optional[int] = 1, use_cache: bool = True, resume: bool = False):
+        """
+        Classify every image under `directory` into no_people_files / excluded_files (file-list order).
+        workers <= 1 keeps the single-process pipeline (one decode thread, one detection thread).
+        workers > 1 splits the file list across that many processes, each with its own detectors.
+        workers=None uses the autotuned worker count (all cores but one before tuning).
+        use_cache reuses stored detector output for files whose size/mtime are unchanged.
+        resume takes the verdicts of an unfinished previous scan of `directory` (same settings) from
+        its checkpoint journal and only analyzes the files it hadn't reached or that changed since.
+        """
+        self.no_people_files.clear()
+        self.excluded_files.clear()
+
+        results = sorted(self.iter_scan(directory, include_subfolders, keep_animals, workers, use_cache, resume))
+        for result in results:
+            if result.is_excluded:
+                self.excluded_files.append(result.path)
+            else:
+                self.no_people_files.append(result.path)
+
+    def iter_scan(self, directory: str, include_subfolders: bool = True, keep_animals: bool = False,
+                  workers: Optional[int] = 1, use_cache: bool = True, resume: bool = False,
+                  skip_folders: Iterable[str] = ()) -> Iterator[ScanResult]:
+        """
+        Streaming form of run_scan: yields a ScanResult per image as soon as it is classified.
+        The pipeline runs on a background thread; closing the generator early cancels the scan.
+        Files under skip_folders (e.g. where results are moved to while the scan runs) are not scanned.
+        """
         if not os.path.exists(directory):
             self.logger(f"Error: Directory not found: {directory}")
             return
 
-        self.no_people_files.clear()
-        self.excluded_files.clear()
+        journal = None
+        if self.checkpoint:
+            journal = ScanJournal(directory, self.journal_settings(include_subfolders, keep_animals))
+        yield from self._iter_pipeline(lambda: self._folder_manifest(directory, include_subfolders, skip_folders),
+                                       keep_animals, workers, use_cache, journal, resume)
+
+    def journal_settings(self, include_subfolders: bool, keep_animals: bool) -> Dict[str, Any]:
+        """Everything that decides a folder scan's verdicts; a journal only resumes a scan with the same."""
+        settings = {'include_subfolders': include_subfolders, 'keep_animals': keep_animals,
+                    'face_threshold': self.face_threshold, 'animal_threshold': self.animal_threshold,
+                    'animal_labels': sorted(self.animal_labels), 'params': self._detection_params(),
+                    'scan_videos': self.scan_videos}
+        if self.scan_videos:
+            settings['video'] = [self.video_frames, self.video_time_budget]
+        return settings
+
+    def iter_scan_files(self, paths: List[str], keep_animals: bool = False, workers: int = 1,
+                        use_cache: bool = True) -> Iterator[ScanResult]:
+        """
+        iter_scan over an explicit list of files (e.g. new arrivals in watch mode) instead of a folder.
+        With workers=1, detectors stay loaded between calls while the relevant settings are unchanged.
+        Files a folder scan would not pick up (by extension) are skipped.
+        """
+        yield from self._iter_pipeline(lambda: Manifest.from_paths(paths, self.scan_extensions()),
+                                       keep_animals, workers, use_cache)
+
+    def _iter_pipeline(self, collect: Callable[[], Manifest], keep_animals: bool, workers: Optional[int],
+                       use_cache: bool, journal: Optional[ScanJournal] = None,
+                       resume: bool = False) -> Iterator[ScanResult]:
         self.stop_event.clear()
+        self._journal = journal
+        self.resumed_count = 0
+        self.stats = RunStats()
+        self._profiler = Profiler(self.profile_path) if self.profile_path else None
+        self._img_queue = None
+        results = queue.Queue()
+        failure = []
 
-        # Gather files
-        self.logger("Scanning directory structure...")
-        image_exts = {'.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tiff'}
-        all_files = []
+        def pipeline():
+            try:
+                with maybe_profile(self._profiler):
+                    self._scan_pipeline(collect, keep_animals, workers, use_cache, results.put, resume)
+            except Exception as e:
+                failure.append(e)
+            finally:
+                self._close_journal(completed=not failure and not self.stop_event.is_set())
+                self._finish_instrumentation()
+                results.put(_SCAN_DONE)
 
-        for root, dirs, files in os.walk(directory):
-            for f in files:
-                if os.path.splitext(f)[1].lower() in image_exts:
-                    all_files.append(os.path.join(root, f))
-            if not include_subfolders:
-                break
+        t_pipe = threading.Thread(target=pipeline, daemon=True)
+        t_pipe.start()
+        try:
+            while True:
+                item = results.get()
+                if item is _SCAN_DONE:
+                    break
+                yield item
+        finally:
+            if t_pipe.is_alive():
+                self.stop_event.set()
+                t_pipe.join()
+
+        if failure:
+            raise failure[0]
+
+    def scan_extensions(self) -> set:
+        """File extensions a scan picks up with the current settings."""
+        return IMAGE_EXTS | VIDEO_EXTS if self.scan_videos else set(IMAGE_EXTS)
+
+    def _collect_files(self, directory: str, include_subfolders: bool) -> List[str]:
+        """Every file a scan of directory would analyze (one scandir pass, no streaming)."""
+        return [entry.path for entry in self._folder_manifest(directory, include_subfolders, log=False)]
+
+    def _folder_manifest(self, directory: str, include_subfolders: bool, skip_folders: Iterable[str] = (),
+                         log: bool = True) -> Manifest:
+        # Walked once on a background thread; the scan starts on the first files while the rest are still being listed
+        if log:
+            self.logger("Scanning directory structure...")
+        prefixes = tuple(os.path.join(os.path.normcase(os.path.abspath(f)), "") for f in skip_folders)
+        skip = (lambda path: os.path.normcase(path).startswith(prefixes)) if prefixes else None
+        return Manifest(directory, self.scan_extensions(), include_subfolders, self.stats,
+                        on_complete=self._log_found if log else None, cancel=self.stop_event, skip=skip)
+
+    def _log_found(self, manifest: Manifest):
+        total = manifest.total
+        if self.scan_videos:
+            videos = sum(1 for entry in manifest.entries if self._is_video(entry.path))
+            self.logger(f"Found {total - videos} images and {videos} videos.")
+        else:
+            self.logger(f"Found {total} images.")
+
+    @property
+    def _total(self) -> int:
+        # Files found so far; grows while the folder is still being walked
+        return self._manifest.total if self._manifest else 0
+
+    def _scan_pipeline(self, collect: Callable[[], Manifest], keep_animals: bool, workers: Optional[int],
+                       use_cache: bool, emit: Callable[[ScanResult], None], resume: bool = False):
+        self._manifest = collect()
+        if self._manifest.complete:
+            self._log_found(self._manifest)
+        self._manifest.start()
+        self._emit = emit
+        self._record_lock = threading.Lock()
+        self._kept_count = 0
+        self._excluded_count = 0
+        self.cascade_stats = {'thumbnail': 0, 'reduced': 0, 'thumbnail_hits': 0, 'reduced_hits': 0, 'full': 0}
+        self.adaptive_stats = {name: 0 for name in self._adaptive_levels()}
+        self.video_stats = {'clips': 0, 'frames': 0, 'face_stops': 0, 'budget_stops': 0}
+        # Grow with the manifest: index i is the i-th file found
+        all_files: List[str] = []
+        self._identities: List[Optional[tuple]] = []
+        self._processed_count = 0
+        self._start_time = time.time()
+
+        self._journal_entries = {}
+        if self._journal:
+            try:
+                self._journal_entries = self._journal.start(resume)
+                if resume and not self._journal_entries:
+                    self.logger("No resumable scan with these settings; starting from the beginning.")
+            except Exception as e:
+                self.logger(f"Scan checkpoint unavailable: {e}")
+                self._journal = None
+
+        if use_cache:
+            try:
+                if self.cache is None:
+                    self.cache = DetectionCache()
+            except Exception as e:
+                self.logger(f"Detection cache unavailable: {e}")
+                self.cache = None
+                use_cache = False
+        self._use_cache = use_cache
+        self._cache_hits = 0
+
+        todo = self._triage(all_files, keep_animals)
+        if self.autotune and self.tuning is None and not self.stop_event.is_set():
+            # Tune on the first files that need inference, if there are enough of them to be worth it
+            head = list(islice(todo, AUTOTUNE_MIN_FILES))
+            if len(head) >= AUTOTUNE_MIN_FILES and not self.stop_event.is_set():
+                with self.stats.measure('autotune'):
+                    self.tune([all_files[idx] for idx in head])
+            todo = chain(head, todo)
+        if workers is None:
+            workers = self.tuned_workers()
+
+        try:
+            if not self.stop_event.is_set():
+                if workers > 1:
+                    self._run_scan_processes(all_files, todo, keep_animals, workers)
+                else:
+                    self._run_scan_threaded(all_files, todo, keep_animals)
+        finally:
+            # Also when the scan failed: the walk stops and the verdicts so far stay cached
+            self._manifest.stop()
+            if use_cache and self.cache:
+                self.cache.flush()
+
+        if self.resumed_count:
+            self.logger(f"Resumed: {self.resumed_count} files classified by the previous scan.")
+        if self._cache_hits:
+            self.logger(f"Cache: {self._cache_hits} images classified from previous scans.")
+
+        if self.cascade:
+            self._log_cascade_stats()
+        if self.adaptive:
+            self._log_adaptive_stats()
+        if self.video_stats['clips']:
+            stats = self.video_stats
+            self.logger(f"Videos: {stats['clips']} clips, {stats['frames']} frames sampled; "
+                        f"{stats['face_stops']} stopped at a face, {stats['budget_stops']} hit the time budget.")
+
+        if self.stop_event.is_set():
+            self.logger("Scan Cancelled.")
+        else:
+            self.logger(f"Done. Kept: {self._kept_count}, Excluded: {self._excluded_count}")
+
+    def tune(self, files: List[str], sample_size: int = DEFAULT_SAMPLE_SIZE) -> Optional[Dict[str, Any]]:
+        """
+        Benchmark detector targets, thread counts and worker counts on a sample of `files` and cache
+        the fastest configuration for this machine (see core.autotune.Autotuner). Later scans use it
+        unless dnn_target / num_threads / workers are given explicitly.
+        """
+        try:
+            result = Autotuner(self).run(files, sample_size)
+        except Exception as e:
+            self.logger(f"Autotune failed: {e}")
+            return None
+        if result:
+            self.tuning = result
+            self._detectors = None
+        return result
+
+    @property
+    def tuning(self) -> Optional[Dict[str, Any]]:
+        """This machine's tuning result for the current detect_long_edge and batch_size (loaded on first use), or None."""
+        settings = (self.detect_long_edge, self.batch_size)
+        if self._tuning_for != settings:
+            self._tuning, self._tuning_for = load_tuning(*settings), settings
+        return self._tuning
+
+    @tuning.setter
+    def tuning(self, result: Optional[Dict[str, Any]]):
+        self._tuning, self._tuning_for = result, (self.detect_long_edge, self.batch_size)
+
+    def tuned_workers(self) -> int:
+        """Worker processes for workers=None: the tuned count, else all cores but one."""
+        if self.tuning:
+            return max(1, int(self.tuning['workers']))
+        return max(1, (os.cpu_count() or 1) - 1)
+
+    def _resolved_dnn_target(self) -> str:
+        target = self.dnn_target or (self.tuning or {}).get('dnn_target') or default_dnn_target()
+        return target if target in DNN_TARGETS else 'cpu'
+
+    def _resolved_num_threads(self) -> Optional[int]:
+        return self.num_threads or (self.tuning or {}).get('num_threads')
+
+    def _triage(self, all_files: List[str], keep_animals: bool) -> Iterator[int]:
+        """
+        Pull files from the manifest as they are found, appending them to all_files. Files with a
+        verdict in the resume journal or the detection cache are recorded straight away; the
+        indices of the rest (those needing inference) are yielded.
+        """
+        for entry in self._manifest:
+            if self.stop_event.is_set():
+                return
+            idx = len(all_files)
+            f_path = entry.path
+            all_files.append(f_path)
+            self._identities.append(None)
+
+            journaled = self._journal_entries.get(self._journal.relative(f_path)) if self._journal_entries else None
+            if journaled and journaled[:2] == (entry.size, entry.mtime_ns):
+                self._identities[idx] = (entry.size, entry.mtime_ns, None)
+                self.resumed_count += 1
+                self._record_result(idx, f_path, journaled[2], journaled[3], True, journaled=True)
+                continue
+
+            if self._use_cache:
+                with self.stats.measure('cache_lookup'):
+                    identity = self.cache.identity(f_path, (entry.size, entry.mtime_ns))
+                    self._identities[idx] = identity
+                    record = self.cache.get(f_path, identity, *self._score_floors(), self._detection_params(f_path)) if identity else None
+                is_excluded = self._classify_detections(record, keep_animals) if record else None
+                if is_excluded is not None:
+                    self._cache_hits += 1
+                    self._record_result(idx, f_path, is_excluded, self._face_count(record), True)
+                    continue
+
+            yield idx
+
+    def _close_journal(self, completed: bool):
+        if self._journal:
+            try:
+                self._journal.close(completed)
+            except Exception as e:
+                self.logger(f"Could not close scan checkpoint: {e}")
+            self._journal = None
+
+    def _store_record(self, idx: int, f_path: str, record: Optional[Dict[str, Any]], keep_animals: bool):
+        """Classify a fresh detection record, cache it and record the verdict."""
+        if record is None:
+            # Unreadable image: counted for progress, listed nowhere.
+            self.stats.count_file(self._file_size(idx, f_path))
+            with self._record_lock:
+                self._processed_count += 1
+                self._report_progress(self._processed_count, self._total, self._start_time, os.path.basename(f_path))
+            return
+
+        stage = record.pop('stage', None)
+        if stage:
+            source, hit = stage
+            self.cascade_stats[source] += 1
+            self.cascade_stats[f"{source}_hits" if hit else 'full'] += 1
+
+        level = record.pop('level', None)
+        if level:
+            self.adaptive_stats[level] = self.adaptive_stats.get(level, 0) + 1
+        video = record.pop('video', None)
+        if video:
+            frames, reason = video
+            self.video_stats['clips'] += 1
+            self.video_stats['frames'] += frames
+            if reason in ('face', 'budget'):
+                self.video_stats[f"{reason}_stops"] += 1
+        seconds = record.pop('seconds', 0.0)
+
+        if self._use_cache and self.cache and self._identities[idx]:
+            with self.stats.measure('cache_write'):
+                self.cache.put(f_path, self._identities[idx], record, *self._score_floors(), self._detection_params(f_path))
+        self._record_result(idx, f_path, self._classify_detections(record, keep_animals), self._face_count(record),
+                            False, seconds)
+
+    def _run_scan_threaded(self, all_files: List[str], todo: Iterator[int], keep_animals: bool):
+        # todo is consumed on the decode thread, so listing, cache lookups and decoding overlap detection
+        self.logger("Analyzing images. Starting Pipeline (GPU/OpenCV)...")
 
-        total = len(all_files)
-        # Always GPU/OpenCV for Face
-        self.logger(f"Found {total} images. Starting Pipeline (GPU/OpenCV)...")
-        
         # Models
         face_engine = None
         animal_engine = None
-        
+
         try:
-            face_engine = self._init_opencv_face()
-                
+            threads = self._resolved_num_threads()
+            if threads:
+                cv2.setNumThreads(threads)
+            face_engine, animal_engine = self._get_detectors(keep_animals)
+
             # If keep_animals is True (Checked), User wants to EXCLUDE animals (per new request).
             if keep_animals:
-                animal_engine = self._init_animal_detector()
                 self.logger("Animal Filter Enabled (Keeping Animals).")
             else:
                 self.logger("Animal Filter Disabled.")
-                
+
         except Exception as e:
             self.logger(f"Model Init Failed: {e}")
             return
 
         # Pipeline
-        import queue
-        img_queue = queue.Queue(maxsize=20)
-        
+        # Bounded by decoded bytes in flight (queued or waiting in a batch), not by item count
+        budget = self.queue_budget_bytes or default_budget()
+        img_queue = ByteBudgetQueue(budget)
+        self._img_queue = img_queue
+        self.logger(f"Decode buffer: {budget / 2 ** 20:.0f} MB.")
+
         def producer():
-            for f in all_files:
+            for idx in todo:
                 if self.stop_event.is_set(): break
-                try:
-                    img = cv2.imread(f)
-                    if img is not None:
-                        img_queue.put((f, img))
-                except: pass
-            img_queue.put(None) # Sentinel
+                start = time.perf_counter()
+                if self._is_staged(all_files[idx]):
+                    img, scale, source = self._load_staged(all_files[idx])
+                else:
+                    img, scale = self._load_image(all_files[idx])
+                    source = None
+                decode_s = time.perf_counter() - start
+                nbytes = img.nbytes if img is not None else 0
+                with self.stats.measure('queue_put'):
+                    if not img_queue.put((idx, img, scale, source, decode_s), nbytes, self.stop_event):
+                        break
+            img_queue.put(None, 0, self.stop_event) # Sentinel
+
+        def run_producer():
+            with maybe_profile(self._profiler):
+                producer()
 
         # Start Producer
-        t_prod = threading.Thread(target=producer, daemon=True)
+        t_prod = threading.Thread(target=run_producer, daemon=True)
         t_prod.start()
-        
+
         # Consumer (Main Thread Context)
-        start_time = time.time()
-        processed_count = 0
-        
+        batch = []
+
+        def flush_batch():
+            start = time.perf_counter()
+            records = self._analyze_batch(face_engine, animal_engine, [b[1] for b in batch], [b[2] for b in batch], keep_animals)
+            elapsed = time.perf_counter() - start
+            for (b_idx, _, _, decode_s), record in zip(batch, records):
+                record['seconds'] = decode_s + elapsed
+                self._store_record(b_idx, all_files[b_idx], record, keep_animals)
+            img_queue.release(sum(b[1].nbytes for b in batch))
+            batch.clear()
+
         while True:
             if self.stop_event.is_set(): break
-            
+
+            self.stats.sample_queue('decode', img_queue.qsize())
+            self.stats.sample_queue('decode_mb', img_queue.buffered_bytes // 2 ** 20)
+            wait_start = time.perf_counter()
             try:
-                item = img_queue.get(timeout=1)
+                # Don't hold a partial batch hostage while the producer is slow
+                item = img_queue.get(timeout=0.05 if batch else 1)
             except queue.Empty:
+                self.stats.add('queue_wait', time.perf_counter() - wait_start)
+                if batch:
+                    flush_batch()
+                    continue
                 if not t_prod.is_alive(): break
                 continue
-                
+
+            self.stats.add('queue_wait', time.perf_counter() - wait_start)
             if item is None: break
-            
-            f_path, image = item
-            
-            # 1. Face Detect (OpenCV)
-            has_face = False
-            try:
-                has_face = self._detect_face_opencv(face_engine, image)
-            except: pass
-
-            # 2. Logic
-            is_excluded = False
-            
-            if has_face:
-                is_excluded = True
-            else:
-                # No human. Check animal?
-                if keep_animals:
-                    # We need to detect animals here
-                    if animal_engine:
-                         if self._detect_animal(animal_engine, image):
-                             is_excluded = True
-
-            fname_base = os.path.basename(f_path)
-            
-            if is_excluded:
-                # "Excluded" from Move list = KEEP (People/Animals)
-                # Wait, wait. logic revision.
-                # Project goals: "Separate family photos (Left/Keep) from Landscapes (Right/Move)"
-                # "Excluded" usually means "Not in the main set". 
-                # Let's check where `scan_result` goes.
-                # is_excluded -> self.excluded_files.append(f_path)
-                # no_people_files -> self.no_people_files.append(f_path)
-                
-                # RE-VERIFYING LOGIC:
-                # Old code: 
-                # if has_face: is_excluded = True
-                # if is_excluded: self.excluded_files.append
-                # else: self.no_people_files.append
-                
-                # UI: Left List = "KEEP (People/Animals)" -> driven by... self.keep_files? 
-                # Let's look at `tabs.py` usage of these lists.
-                # In tabs.py `update_lists`: 
-                # self.keep_files = scanner.excluded_files (Wait, "excluded" from removal?)
-                # self.exclude_files = scanner.no_people_files (To be moved?)
-                
-                # So `excluded_files` = PEOPLE (Keep).
-                # `no_people_files` = LANDSCAPE (Move).
-                
-                self.excluded_files.append(f_path)
-                # Log NOTHING for Keep files (User req: "show names ... of files flagged to be moved")
-            else:
-                self.no_people_files.append(f_path)
-                # Log MOVE candidates
-                self.logger(f"[MOVE] >> {fname_base}")
-                
-            processed_count += 1
-            self._report_progress(processed_count, total, start_time, fname_base)
+
+            idx, image, scale, source, decode_s = item
+            if image is None and source != 'video':
+                self._store_record(idx, all_files[idx], None, keep_animals)
+                continue
+
+            if source:
+                start = time.perf_counter()
+                record = self._analyze_staged(face_engine, animal_engine, all_files[idx], image, scale, source, keep_animals)
+                if record is not None:
+                    record['seconds'] = decode_s + time.perf_counter() - start
+                img_queue.release(image.nbytes if image is not None else 0)
+                self._store_record(idx, all_files[idx], record, keep_animals)
+                continue
+
+            batch.append((idx, image, scale, decode_s))
+            if len(batch) >= self.batch_size:
+                flush_batch()
+
+        if batch and not self.stop_event.is_set():
+            flush_batch()
+
+        _, peak, budget = img_queue.stats()
+        self.logger(f"Decode buffer peak: {peak / 2 ** 20:.0f} of {budget / 2 ** 20:.0f} MB.")
 
         # Cleanup
-        if face_engine: 
+        if face_engine:
              # FaceDetectorYN doesn't strictly need close, but good practice if wrapper changes
              pass
 
-        if self.stop_event.is_set():
-            self.logger("Scan Cancelled.")
+    def _run_scan_processes(self, all_files: List[str], todo: Iterator[int], keep_animals: bool, workers: int):
+        # The first chunk is taken before any process starts, so a scan needing no inference starts none
+        first = list(islice(todo, WORKER_CHUNK_SIZE))
+        if not first:
+            return
+        self.logger(f"Analyzing images. Starting Pipeline ({workers} worker processes)...")
+        if keep_animals:
+            self.logger("Animal Filter Enabled (Keeping Animals).")
         else:
-            self.logger(f"Done. Kept: {len(self.no_people_files)}, Excluded: {len(self.excluded_files)}")
+            self.logger("Animal Filter Disabled.")
+
+        # Chunks are cut from the stream as they are submitted; spawned pools only start as many
+        # processes as there are chunks in flight
+        indices = chain(first, todo)
+        exhausted = False
+        pending = set()
+
+        # Keep only a few chunks per worker in flight so cancel is not stuck behind a huge backlog.
+        max_in_flight = workers * 4
 
-    def _init_opencv_face(self):
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init, mp_context=WORKER_MP_CONTEXT,
+                                     initargs=(keep_animals, self._worker_settings())) as pool:
+                while not exhausted or pending:
+                    while not self.stop_event.is_set() and not exhausted and len(pending) < max_in_flight:
+                        chunk = [(idx, all_files[idx]) for idx in islice(indices, WORKER_CHUNK_SIZE)]
+                        if not chunk:
+                            exhausted = True
+                            break
+                        pending.add(pool.submit(_worker_analyze, chunk, keep_animals))
+
+                    if self.stop_event.is_set():
+                        for fut in pending: fut.cancel()
+                        break
+
+                    with self.stats.measure('worker_wait'):
+                        done, pending = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        records, chunk_stats = fut.result()
+                        self.stats.merge(chunk_stats)
+                        for idx, record in records:
+                            self._store_record(idx, all_files[idx], record, keep_animals)
+        except Exception as e:
+            # Raised on, so the scan fails (its checkpoint is kept for a resume) instead of ending as if complete
+            self.logger(f"Worker Pool Failed: {e}")
+            raise
+
+    def _file_size(self, idx: int, f_path: str) -> int:
+        # Size for the bytes/s figure: from the cache identity when there is one, else a stat
+        identity = self._identities[idx] if idx < len(self._identities) else None
+        if identity:
+            return identity[0]
+        try:
+            return os.path.getsize(f_path)
+        except OSError:
+            return 0
+
+    def _finish_instrumentation(self):
+        """End-of-scan timing report and, when profiling, the merged profile file."""
+        self.stats.finish()
+        for line in self.stats.summary_lines():
+            self.logger(line)
+        if self._profiler:
+            try:
+                saved = self._profiler.save(worker_glob=f"{self.profile_path}.worker*")
+                if saved:
+                    self.logger(f"Profile written to {saved}")
+            except Exception as e:
+                self.logger(f"Could not write profile: {e}")
+
+    def _get_detectors(self, keep_animals: bool):
+        """
+        (face detector, animal detector or None) for the single-process pipeline. Kept between scans
+        and rebuilt only when a setting they are created with changes.
+        """
+        key = (self.batch_size, self.detect_long_edge, self._score_floors(), keep_animals, self._resolved_dnn_target())
+        if self._detectors is None or self._detectors[0] != key:
+            self._detectors = None
+            face_engine = self._init_opencv_face()
+            animal_engine = self._init_animal_detector() if keep_animals else None
+            self._detectors = (key, face_engine, animal_engine)
+        return self._detectors[1], self._detectors[2]
+
+    def _worker_settings(self) -> Dict[str, Any]:
+        # Engine attributes copied onto each worker process's engine
+        return {
+            'face_threshold': self.face_threshold,
+            'animal_threshold': self.animal_threshold,
+            'detect_long_edge': self.detect_long_edge,
+            'batch_size': self.batch_size,
+            'cascade': self.cascade,
+            'cascade_confident': self.cascade_confident,
+            'adaptive': self.adaptive,
+            'escalation_edges': list(self.escalation_edges),
+            'tile_size': self.tile_size,
+            'tile_overlap': self.tile_overlap,
+            'tile_min_edge': self.tile_min_edge,
+            'profile_path': self.profile_path,
+            'scan_videos': self.scan_videos,
+            'video_frames': self.video_frames,
+            'video_time_budget': self.video_time_budget,
+            'dnn_target': self._resolved_dnn_target(),
+            'autotune': False,
+        }
+
+    def _is_video(self, f_path: str) -> bool:
+        return os.path.splitext(f_path)[1].lower() in VIDEO_EXTS
+
+    def _is_staged(self, f_path: str) -> bool:
+        # Files analyzed one at a time by _analyze_staged instead of in decoded batches
+        return self.cascade or self.adaptive or self._is_video(f_path)
+
+    def _load_staged(self, f_path: str):
+        """
+        First image for the staged paths: (image or None, scale, source) where source is the
+        cascade stage-one source, 'adaptive' (the coarsest escalation level) or 'video'
+        (no image: clips are decoded frame by frame in _analyze_video).
+        """
+        if self._is_video(f_path):
+            return None, 1.0, 'video'
+        if self.cascade:
+            return self._load_stage1(f_path)
+        image, scale = self._load_image(f_path, self.escalation_edges[0] if self.escalation_edges else None)
+        return image, scale, 'adaptive'
+
+    def _analyze_staged(self, face_engine, animal_engine, f_path: str, image, scale: float, source: str,
+                        keep_animals: bool) -> Optional[Dict[str, Any]]:
+        if source == 'video':
+            return self._analyze_video(face_engine, animal_engine, f_path, keep_animals)
+        if source == 'adaptive':
+            return self._analyze_adaptive(face_engine, animal_engine, f_path, keep_animals, (image, scale))
+        return self._analyze_cascade(face_engine, animal_engine, f_path, image, scale, source, keep_animals)
+
+    def _video_positions(self, cap) -> List[Tuple[int, float]]:
+        # (cv2 seek property, value) per sample: frame indices centred in video_frames equal slices,
+        # or fixed time steps when the container doesn't report a frame count
+        n = max(1, self.video_frames)
+        count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        if count > 0:
+            return [(cv2.CAP_PROP_POS_FRAMES, int((i + 0.5) * count / n)) for i in range(min(n, count))]
+        return [(cv2.CAP_PROP_POS_MSEC, i * VIDEO_FALLBACK_STEP_MS) for i in range(n)]
+
+    def _analyze_video(self, face_engine, animal_engine, f_path: str, keep_animals: bool) -> Optional[Dict[str, Any]]:
+        """
+        Classify a clip from sampled frames: faces on each frame until one clears face_threshold,
+        then (no face, animals wanted) animals on the sampled frames until one is found.
+        Sampling stops once video_time_budget seconds are spent on the clip. Face boxes are in frame
+        coordinates. The record carries 'video': (frames sampled, 'face' | 'budget' | 'sampled').
+        """
+        deadline = time.perf_counter() + self.video_time_budget if self.video_time_budget else None
+        frames = []
+        faces = []
+        reason = 'sampled'
+
+        cap = cv2.VideoCapture(f_path)
+        try:
+            if not cap.isOpened():
+                return None
+            for prop, value in self._video_positions(cap):
+                if self.stop_event.is_set():
+                    break
+                if deadline and frames and time.perf_counter() > deadline:
+                    reason = 'budget'
+                    break
+                with self.stats.measure('video_seek'):
+                    cap.set(prop, value)
+                    ok, frame = cap.read()
+                if not ok or frame is None:
+                    if prop == cv2.CAP_PROP_POS_MSEC:
+                        break  # Past the end of a clip of unknown length
+                    continue
+                image, scale = self._fit_long_edge(frame, self.detect_long_edge)
+                frames.append(image)
+                faces.extend(self._analyze_batch(face_engine, None, [image], [scale], False)[0]['faces'])
+                if self._has_face(faces):
+                    reason = 'face'
+                    break
+        except Exception:
+            return None
+        finally:
+            cap.release()
+
+        if not frames:
+            return None
+
+        record = {'faces': faces, 'animals': None, 'video': (len(frames), reason)}
+        if keep_animals and animal_engine and not self._has_face(faces):
+            animals = []
+            for image in frames:
+                if animals and deadline and time.perf_counter() > deadline:
+                    record['video'] = (len(frames), 'budget')
+                    break
+                try:
+                    animals.extend(self._detect_animals(animal_engine, image))
+                except Exception:
+                    pass
+                if any(label in self.animal_labels and score >= self.animal_threshold for label, score in animals):
+                    break
+            record['animals'] = animals
+        return record
+
+    def _load_stage1(self, f_path: str):
+        """
+        Cheap cascade input: the embedded EXIF thumbnail when there is one, else a tiny reduced decode.
+        Returns (image or None, scale to original coordinates, 'thumbnail' | 'reduced').
+        """
+        if os.path.splitext(f_path)[1].lower() in JPEG_EXTS:
+            with self.stats.measure('thumbnail_decode'):
+                data = read_thumbnail(f_path)
+                thumb = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR) if data else None
+                orig_long = self._probe_long_edge(f_path) if thumb is not None else 0
+            if thumb is not None and orig_long:
+                return thumb, orig_long / max(thumb.shape[:2]), 'thumbnail'
+
+        image, scale = self._load_image(f_path, CASCADE_REDUCED_EDGE)
+        return image, scale, 'reduced'
+
+    def _analyze_cascade(self, face_engine, animal_engine, f_path: str, image, scale: float, source: str,
+                         keep_animals: bool) -> Optional[Dict[str, Any]]:
+        """
+        Stage one on the cheap image; a confident face decides the image at once.
+        Otherwise stage two runs the normal analysis on a full detection-resolution decode.
+        The returned record carries 'stage': (source, decided_in_stage_one) for cascade_stats.
+        """
+        stage1 = self._analyze_batch(face_engine, None, [image], [scale], False)[0]
+        if any(face[4] >= max(self.cascade_confident, self.face_threshold) for face in stage1['faces']):
+            stage1['stage'] = (source, True)
+            return stage1
+
+        if self.adaptive:
+            record = self._analyze_adaptive(face_engine, animal_engine, f_path, keep_animals)
+        else:
+            full, full_scale = self._load_image(f_path)
+            record = self._analyze_image(face_engine, animal_engine, full, keep_animals, full_scale) if full is not None else None
+        if record is None:
+            return None
+        record['stage'] = (source, False)
+        return record
+
+    def _adaptive_levels(self) -> List[str]:
+        # Stat keys for each escalation level, coarsest first
+        levels = [f"le={edge or 'full'}" for edge in self.escalation_edges]
+        if self.tile_min_edge:
+            levels.append('tiles')
+        return levels
+
+    def _analyze_adaptive(self, face_engine, animal_engine, f_path: str, keep_animals: bool,
+                          first: Optional[Tuple[Any, float]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Coarse-to-fine face detection: each escalation edge in turn, then overlapping full-resolution
+        tiles for large images, stopping at the first level where a face clears face_threshold.
+        A level is skipped when the previous one already saw the image at its full size.
+        `first` is the already decoded coarsest level, if any. Faces from every level run are kept
+        in the record; animals are checked on the coarsest image. The record carries 'level'
+        (the deepest level run) for adaptive_stats.
+        """
+        levels = self._adaptive_levels()
+        orig_long = self._probe_long_edge(f_path)
+        faces = []
+        base = None
+        level = None
+        seen_full = False
+
+        for i, edge in enumerate(self.escalation_edges):
+            if seen_full:
+                break
+            seen_full = not edge or bool(orig_long and orig_long <= edge)
+            image, scale = first if i == 0 and first else self._load_image(f_path, edge)
+            if image is None:
+                break
+            if base is None:
+                base = (image, scale)
+            level = levels[i]
+            faces.extend(self._analyze_batch(face_engine, None, [image], [scale], False)[0]['faces'])
+            if self._has_face(faces):
+                break
+
+        if (self.tile_min_edge and not seen_full and not self._has_face(faces) and orig_long >= self.tile_min_edge
+                and orig_long > self.tile_size):
+            full, _ = self._load_image(f_path, 0)
+            if full is not None:
+                level = 'tiles'
+                faces.extend(self._detect_tiled(face_engine, full))
+                if base is None:
+                    base = (full, 1.0)
+
+        if base is None:
+            return None
+        record = self._finish_record(animal_engine, base[0], faces, 1.0, keep_animals)
+        record['level'] = level
+        return record
+
+    def _detect_tiled(self, face_engine, image) -> list:
+        """
+        Faces from overlapping tile_size tiles of a full-resolution image, in image coordinates.
+        Tiles run in batch_size groups; the first group with a face above face_threshold ends the search.
+        """
+        h, w = image.shape[:2]
+        size = self.tile_size
+        step = max(1, int(size * (1 - self.tile_overlap)))
+        origins = [(x, y) for y in _tile_starts(h, size, step) for x in _tile_starts(w, size, step)]
+
+        faces = []
+        group = max(1, self.batch_size)
+        for start in range(0, len(origins), group):
+            if self.stop_event.is_set():
+                break
+            part = origins[start:start + group]
+            tiles = [np.ascontiguousarray(image[y:y + size, x:x + size]) for x, y in part]
+            records = self._analyze_batch(face_engine, None, tiles, [1.0] * len(tiles), False)
+            for (x, y), record in zip(part, records):
+                faces.extend([fx + x, fy + y, fw, fh, score] for fx, fy, fw, fh, score in record['faces'])
+            if self._has_face(faces):
+                break
+        return faces
+
+    def _log_adaptive_stats(self):
+        stats = self.adaptive_stats
+        total = sum(stats.values())
+        if not total:
+            return
+        parts = ", ".join(f"{name}: {count}" for name, count in stats.items())
+        self.logger(f"Adaptive detection: deepest level needed per image ({total} images) - {parts}.")
+
+    def _log_cascade_stats(self):
+        stats = self.cascade_stats
+        stage1 = stats['thumbnail'] + stats['reduced']
+        if not stage1:
+            return
+        hits = stats['thumbnail_hits'] + stats['reduced_hits']
+        self.logger(f"Cascade: {hits} of {stage1} images decided in stage 1 ({hits / stage1:.0%}); "
+                    f"thumbnails {stats['thumbnail_hits']}/{stats['thumbnail']}, "
+                    f"reduced decodes {stats['reduced_hits']}/{stats['reduced']}; full decodes: {stats['full']}.")
+
+    def _probe_long_edge(self, f_path: str) -> int:
+        # Header-only read for the original size (0 if unknown)
+        try:
+            with Image.open(f_path) as probe:
+                return max(probe.size)
+        except Exception:
+            return 0
+
+    def _load_image(self, f_path: str, long_edge: Optional[int] = None):
+        """
+        Decode an image for detection, at most `long_edge` pixels on its longest side
+        (defaults to self.detect_long_edge, 0 = full size).
+        JPEGs are decoded directly at 1/2, 1/4 or 1/8 size via libjpeg DCT scaling.
+        Returns (image or None, scale) where scale maps detection coordinates back to the original.
+        """
+        if long_edge is None:
+            long_edge = self.detect_long_edge
+
+        with self.stats.measure('decode'):
+            try:
+                if not long_edge:
+                    return cv2.imread(f_path), 1.0
+
+                orig_long = self._probe_long_edge(f_path)
+
+                image = None
+                if orig_long and os.path.splitext(f_path)[1].lower() in JPEG_EXTS:
+                    for factor, flag in _JPEG_REDUCED_FLAGS:
+                        if orig_long // factor >= long_edge:
+                            image = cv2.imread(f_path, flag)
+                            break
+                if image is None:
+                    image = cv2.imread(f_path)
+                if image is None:
+                    return None, 1.0
+
+                image, _ = self._fit_long_edge(image, long_edge)
+                scale = (orig_long or max(image.shape[:2])) / max(image.shape[:2])
+                return image, scale
+            except Exception:
+                return None, 1.0
+
+    def _fit_long_edge(self, image, long_edge: int):
+        """Shrink (never enlarge) an image to `long_edge` on its longest side (0 = as is). Returns (image, scale back)."""
+        h, w = image.shape[:2]
+        if not long_edge or max(h, w) <= long_edge:
+            return image, 1.0
+        ratio = long_edge / max(h, w)
+        resized = cv2.resize(image, (max(1, round(w * ratio)), max(1, round(h * ratio))), interpolation=cv2.INTER_AREA)
+        return resized, max(h, w) / max(resized.shape[:2])
+
+    def _analyze_image(self, face_engine, animal_engine, image, keep_animals: bool, scale: float = 1.0) -> Dict[str, Any]:
+        """
+        Run the detectors and return the raw detection record:
+        {'faces': [[x, y, w, h, score], ...], 'animals': [[label, score], ...] or None}.
+        Face boxes are multiplied by `scale` so they are in original image coordinates.
+        Animals are only looked for when no face clears the threshold (None = not run).
+        """
+        return self._analyze_batch(face_engine, animal_engine, [image], [scale], keep_animals)[0]
+
+    def _analyze_batch(self, face_engine, animal_engine, images, scales, keep_animals: bool) -> List[Dict[str, Any]]:
+        """Batch form of _analyze_image: one face pass over all images, then per-image animal checks."""
+        # 1. Face Detect (OpenCV)
+        start = time.perf_counter()
+        if isinstance(face_engine, BatchedYuNet):
+            try:
+                all_faces = face_engine.detect_batch(images)
+            except Exception:
+                all_faces = [[] for _ in images]
+        else:
+            all_faces = []
+            for image in images:
+                faces = []
+                try:
+                    faces = self._detect_faces_opencv(face_engine, image)
+                except: pass
+                all_faces.append(faces)
+        self.stats.add('face_detect', time.perf_counter() - start, len(images))
+
+        return [self._finish_record(animal_engine, image, faces, scale, keep_animals)
+                for image, faces, scale in zip(images, all_faces, scales)]
+
+    def _finish_record(self, animal_engine, image, faces, scale: float, keep_animals: bool) -> Dict[str, Any]:
+        if scale != 1.0:
+            faces = [[x * scale, y * scale, w * scale, h * scale, score] for x, y, w, h, score in faces]
+
+        record = {'faces': faces, 'animals': None}
+
+        # 2. No human. Check animal?
+        if keep_animals and animal_engine and not self._has_face(faces):
+            try:
+                record['animals'] = self._detect_animals(animal_engine, image)
+            except:
+                record['animals'] = []
+        return record
+
+    def _score_floors(self) -> Tuple[float, float]:
+        # Never run the detectors above the decision thresholds, even if those are set very low.
+        return min(FACE_SCORE_FLOOR, self.face_threshold), min(ANIMAL_SCORE_FLOOR, self.animal_threshold)
+
+    def _detection_params(self, f_path: Optional[str] = None) -> str:
+        # Settings that change raw detector output; cached records made under other settings are misses
+        params = f"le={self.detect_long_edge}"
+        if self.batch_size > 1:
+            # Letterboxed buckets see slightly different pixels than per-image detection
+            params += ";batched"
+        if f_path and self._is_video(f_path):
+            # Clips skip the cascade / adaptive stages; image entries stay valid when video sampling changes
+            return params + f";video={self.video_frames}/{self.video_time_budget}"
+        if self.cascade:
+            params += f";cascade={self.cascade_confident}"
+        if self.adaptive:
+            params += ";adaptive=" + ",".join(str(edge) for edge in self.escalation_edges)
+            if self.tile_min_edge:
+                params += f";tiles={self.tile_size}/{self.tile_overlap}/{self.tile_min_edge}"
+        return params
+
+    def _has_face(self, faces) -> bool:
+        return any(face[4] >= self.face_threshold for face in faces)
+
+    def _classify_detections(self, record: Dict[str, Any], keep_animals: bool) -> Optional[bool]:
+        """
+        Returns True when the image belongs in the Keep (People/Animals) list.
+        None means the record lacks the animal detections this decision needs.
+        """
+        if self._has_face(record['faces']):
+            return True
+        if not keep_animals:
+            return False
+        if record.get('animals') is None:
+            return None
+        return any(label in self.animal_labels and score >= self.animal_threshold
+                   for label, score in record['animals'])
+
+    def _face_count(self, record: Dict[str, Any]) -> int:
+        return sum(1 for face in record['faces'] if face[4] >= self.face_threshold)
+
+    def _record_result(self, idx: int, f_path: str, is_excluded: bool, face_count: int, from_cache: bool,
+                       seconds: float = 0.0, journaled: bool = False):
+        # Cache and journal hits are recorded on the decode thread, fresh results on the detection thread
+        with self._record_lock:
+            self._record_result_locked(idx, f_path, is_excluded, face_count, from_cache, seconds, journaled)
+
+    def _record_result_locked(self, idx: int, f_path: str, is_excluded: bool, face_count: int, from_cache: bool,
+                              seconds: float, journaled: bool):
+        # `excluded_files` = PEOPLE/ANIMALS (Keep, left list in tabs.py).
+        # `no_people_files` = LANDSCAPE (Move, right list in tabs.py).
+        if is_excluded:
+            self._excluded_count += 1
+        else:
+            self._kept_count += 1
+            # Log MOVE candidates only (User req: "show names ... of files flagged to be moved")
+            with self.stats.measure('log_callback'):
+                self.logger(f"[MOVE] >> {os.path.basename(f_path)}")
+
+        if self._journal and not journaled:
+            with self.stats.measure('checkpoint'):
+                self._checkpoint(idx, f_path, is_excluded, face_count)
+        with self.stats.measure('emit_result'):
+            self._emit(ScanResult(idx, f_path, is_excluded, face_count, from_cache, seconds))
+        self.stats.count_file(self._file_size(idx, f_path))
+
+        self._processed_count += 1
+        self._report_progress(self._processed_count, self._total, self._start_time, os.path.basename(f_path))
+
+    def _checkpoint(self, idx: int, f_path: str, is_excluded: bool, face_count: int):
+        # Journal the verdict against the file version it was made for (cache identity when known)
+        identity = self._identities[idx]
+        try:
+            if identity is None:
+                st = os.stat(f_path)
+                identity = (st.st_size, st.st_mtime_ns, None)
+            self._journal.append(f_path, identity[0], identity[1], is_excluded, face_count)
+        except OSError:
+            pass
+
+    def _init_opencv_face(self, target: Optional[str] = None):
+        # target: a DNN_TARGETS name, default the resolved dnn_target (override > autotune > default)
         model = self._get_model_path('face_detection_yunet_2023mar.onnx')
+        backend_id, target_id = DNN_TARGETS[target or self._resolved_dnn_target()]
+        if self.batch_size > 1:
+            return BatchedYuNet(
+                model, long_edge=self.detect_long_edge or BATCH_FALLBACK_LONG_EDGE, batch_size=self.batch_size,
+                score_threshold=self._score_floors()[0], nms_threshold=0.3, top_k=5000,
+                backend_id=backend_id, target_id=target_id, logger=self.logger
+            )
         return cv2.FaceDetectorYN.create(
             model=model, config="", input_size=(320, 320),
-            score_threshold=0.5, nms_threshold=0.3, top_k=5000,
-            backend_id=cv2.dnn.DNN_BACKEND_OPENCV, target_id=cv2.dnn.DNN_TARGET_OPENCL
+            score_threshold=self._score_floors()[0], nms_threshold=0.3, top_k=5000,
+            backend_id=backend_id, target_id=target_id
         )
 
-    def _detect_face_opencv(self, detector, image):
+    def _detect_faces_opencv(self, detector, image):
+        # Returns [[x, y, w, h, score], ...] for every face above the detector's floor
         h, w, _ = image.shape
         detector.setInputSize((w, h))
         _, faces = detector.detect(image)
-        return faces is not None
+        if faces is None:
+            return []
+        return [[float(v) for v in face[:4]] + [float(face[14])] for face in faces]
 
     def _init_animal_detector(self):
         # MediaPipe Tasks
         model_path = self._get_model_path('efficientdet_lite0.tflite')
         base_options = python.BaseOptions(model_asset_path=model_path)
-        options = vision.ObjectDetectorOptions(base_options=base_options, score_threshold=0.4, max_results=5)
+        options = vision.ObjectDetectorOptions(base_options=base_options, score_threshold=self._score_floors()[1], max_results=10)
         return vision.ObjectDetector.create_from_options(options)
 
-    def _detect_animal(self, detector, image):
-        # Returns True if Cat, Dog, Bird etc.
-        
+    def _detect_animals(self, detector, image):
+        # Returns [[label, score], ...] for every category above the detector's floor.
+        # Filtering to Cat, Dog, Bird etc. happens in _classify_detections.
+
         # Convert to MP Image
-        img_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
-        
-        detection_result = detector.detect(mp_image)
-        
-        animal_labels = {'cat', 'dog', 'bird', 'horse', 'sheep', 'cow', 'bear', 'zebra', 'giraffe'}
-        
-        for detection in detection_result.detections:
-            for category in detection.categories:
-                if category.category_name in animal_labels:
-                    return True
-        return False
+        with self.stats.measure('animal_convert'):
+            img_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
+
+        with self.stats.measure('animal_detect'):
+            detection_result = detector.detect(mp_image)
+
+        return [[category.category_name, float(category.score)]
+                for detection in detection_result.detections
+                for category in detection.categories]
 
     def _get_model_path(self, filename):
         if getattr(sys, 'frozen', False):
@@ -223,7 +1313,10 @@ class ScannerEngine:
 
     def _report_progress(self, current, total, start_time, filename=""):
         if not self.progress_callback: return
-        
+        with self.stats.measure('progress_callback'):
+            self._call_progress(current, total, start_time, filename)
+
+    def _call_progress(self, current, total, start_time, filename):
         elapsed = time.time() - start_time
         if current > 0:
             rate = current / elapsed
@@ -232,4 +1325,3 @@ class ScannerEngine:
             self.progress_callback(current, total, remaining, filename)
         else:
             self.progress_callback(current, total, 0, filename)
-
@@ -0,0 +1,250 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from core.duplicates import HashStore, file_key
+from core.instrumentation import RunStats
+from core.manifest import Manifest, ManifestEntry
+
+# Images compared (the formats the AI scan reads)
+SIMILAR_EXTS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tiff'}
+
+# Max differing bits (of 64) between two images' hashes for them to count as the same photo.
+# Resized / re-compressed / messenger-forwarded copies typically differ by 0-4 bits; unrelated photos by ~32.
+DEFAULT_RADIUS = 6
+
+# Decode threads (OpenCV releases the GIL while decoding)
+DEFAULT_HASH_WORKERS = 8
+# Hashes in flight per decode thread
+_READAHEAD_PER_WORKER = 8
+
+# Hash images below this contrast (std of the 9x8 thumbnail, 0-255) as 0: a blank frame, not a photo to match
+_MIN_DETAIL = 2.0
+
+# Multi-index: the 64-bit hash is split into 4 chunks of 16 bits, each indexed in a sorted array
+_CHUNKS = 4
+_CHUNK_BITS = 16
+# Candidate pairs checked per numpy step (bounds memory on clumpy hash distributions)
+_PAIRS_PER_STEP = 4_000_000
+
+
+def dhash_image(gray) -> int:
+    """64-bit difference hash of a grayscale image: brightness gradients of a 9x8 thumbnail, row by row."""
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    if small.std() < _MIN_DETAIL:
+        return 0
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def compute_dhash(file_path: str) -> Optional[int]:
+    """dhash_image of a file (0 for blank images), or None if it can't be decoded."""
+    gray = None
+    if os.path.splitext(file_path)[1].lower() in ('.jpg', '.jpeg'):
+        # libjpeg DCT scaling: 1/8 size straight from the file, plenty for a 9x8 thumbnail
+        gray = cv2.imread(file_path, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+        if gray is not None and min(gray.shape[:2]) < 32:
+            gray = None
+    if gray is None:
+        gray = cv2.imread(file_path, cv2.IMREAD_GRAYSCALE)
+    if gray is None or gray.size == 0:
+        return None
+    return dhash_image(gray)
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    return np.unpackbits(values.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def near_pairs(hashes: np.ndarray, radius: int = DEFAULT_RADIUS) -> np.ndarray:
+    """
+    (i, j) index pairs, i < j, of hashes within `radius` bits of each other, without comparing all pairs.
+
+    Multi-index hashing: when two hashes differ in at most r bits, one of their 4 16-bit chunks differs
+    in at most r // 4 bits. Each chunk is sorted once; every hash then looks up the chunk values within
+    r // 4 bits of its own (1 lookup for r < 4, 17 for r < 8, 137 for r < 12) and only those candidates
+    get a full 64-bit comparison.
+    """
+    n = len(hashes)
+    if n < 2:
+        return np.empty((0, 2), dtype=np.int64)
+    flips = radius // _CHUNKS
+    masks = [0]
+    for k in range(1, flips + 1):
+        masks += [sum(1 << b for b in bits) for bits in combinations(range(_CHUNK_BITS), k)]
+    masks = np.array(masks, dtype=np.uint64)
+
+    found = []
+    for c in range(_CHUNKS):
+        keys = (hashes >> np.uint64(c * _CHUNK_BITS)) & np.uint64((1 << _CHUNK_BITS) - 1)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        start = 0
+        while start < n:
+            # Hashes per step, sized for ~64 candidates per lookup
+            step = max(1, min(n - start, _PAIRS_PER_STEP // (len(masks) * 64)))
+            ids = np.arange(start, start + step)
+            probes = (keys[ids][:, None] ^ masks[None, :]).ravel()
+            lo = np.searchsorted(sorted_keys, probes, 'left')
+            counts = np.searchsorted(sorted_keys, probes, 'right') - lo
+            total = int(counts.sum())
+            if total > _PAIRS_PER_STEP and step > 1:
+                # Too many candidates in one go (a crowded bucket): fewer hashes per step
+                per_hash = counts.reshape(step, -1).sum(axis=1)
+                step = max(1, int(np.searchsorted(np.cumsum(per_hash), _PAIRS_PER_STEP)))
+                ids = ids[:step]
+                lo = lo[:step * len(masks)]
+                counts = counts[:step * len(masks)]
+                total = int(counts.sum())
+            owner = np.repeat(np.repeat(ids, len(masks)), counts)
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            other = order[np.repeat(lo, counts) + offsets]
+            keep = other > owner
+            owner, other = owner[keep], other[keep]
+            close = _popcount(hashes[owner] ^ hashes[other]) <= radius
+            if close.any():
+                found.append(np.stack([owner[close], other[close]], axis=1))
+            start += step
+    if not found:
+        return np.empty((0, 2), dtype=np.int64)
+    # A pair is usually found through several chunks
+    return np.unique(np.concatenate(found), axis=0)
+
+
+def group_pairs(n: int, pairs: np.ndarray) -> List[List[int]]:
+    """Connected components (of 2+ members) of the graph on n nodes with these edges, via label propagation."""
+    if len(pairs) == 0:
+        return []
+    labels = np.arange(n)
+    a, b = pairs[:, 0], pairs[:, 1]
+    while True:
+        low = np.minimum(labels[a], labels[b])
+        before = labels.copy()
+        np.minimum.at(labels, a, low)
+        np.minimum.at(labels, b, low)
+        # Pointer jumping: follow labels to their roots
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels, before):
+            break
+    members = np.unique(np.concatenate([a, b]))
+    groups: Dict[int, List[int]] = {}
+    for i in members.tolist():
+        groups.setdefault(int(labels[i]), []).append(i)
+    return [g for g in groups.values() if len(g) > 1]
+
+
+class SimilarImageFinder:
+    """
+    Finds groups of near-duplicate photos under a folder: resized, re-compressed or forwarded
+    copies of the same picture. Each image gets a 64-bit difference hash from a reduced-resolution
+    decode (cached per file version in the HashStore, so later runs only decode new or changed
+    files); near_pairs() finds hashes within `radius` bits and group_pairs() joins them into groups.
+    """
+
+    def __init__(self, logger_callback: Optional[Callable[[str], None]] = None, radius: int = DEFAULT_RADIUS,
+                 workers: int = DEFAULT_HASH_WORKERS, use_cache: bool = True):
+        self.logger = logger_callback or (lambda x: print(x))
+        self.radius = radius
+        self.workers = workers
+        self.use_cache = use_cache
+        self.progress_callback: Optional[Callable[[int, int, str], None]] = None
+        self.cancel_flag = False
+        self.stats = RunStats()
+
+    def cancel(self):
+        self.cancel_flag = True
+
+    def find_groups(self, directory: str, include_subfolders: bool = True) -> List[List[str]]:
+        """
+        Groups of near-duplicate images under directory, largest groups first. Within a group the
+        largest file (usually the original) comes first. Returns what was found so far if cancelled.
+        """
+        self.cancel_flag = False
+        self.stats = RunStats()
+        manifest = Manifest(directory, SIMILAR_EXTS, include_subfolders, self.stats).start()
+        store = None
+        if self.use_cache:
+            try:
+                store = HashStore()
+            except Exception as e:
+                self.logger(f"Hash cache unavailable ({e}); hashes won't be kept.")
+        try:
+            entries, hashes = self._hash_all(manifest, store)
+        finally:
+            manifest.stop()
+            if store is not None:
+                store.close()
+        self.logger(f"Hashed {len(entries)} images.")
+
+        with self.stats.measure('index'):
+            pairs = near_pairs(hashes, self.radius)
+            groups = group_pairs(len(entries), pairs)
+        result = [sorted((entries[i] for i in g), key=lambda e: (-e.size, e.path)) for g in groups]
+        result.sort(key=lambda g: (-len(g), g[0].path))
+        self.stats.finish()
+        duplicates = sum(len(g) - 1 for g in result)
+        self.logger(f"Found {len(result)} groups of similar images ({duplicates} redundant copies).")
+        return [[e.path for e in g] for g in result]
+
+    def _hash_all(self, manifest: Manifest, store: Optional[HashStore]) -> Tuple[List[ManifestEntry], np.ndarray]:
+        """Entries with a usable hash, and their hashes (cached ones looked up, the rest decoded on a thread pool)."""
+        entries: List[ManifestEntry] = []
+        hashes: List[int] = []
+        done = 0
+
+        def collect(entry: ManifestEntry, value: Optional[int], computed: bool):
+            nonlocal done
+            done += 1
+            if value is None:
+                return
+            if computed and store is not None:
+                store.put(file_key(entry), dhash=value)
+            self.stats.count_file(entry.size)
+            if value:
+                entries.append(entry)
+                hashes.append(value)
+            if self.progress_callback and done % 64 == 0:
+                self.progress_callback(done, manifest.total, os.path.basename(entry.path))
+
+        def timed_hash(path: str) -> Optional[int]:
+            with self.stats.measure('dhash'):
+                try:
+                    return compute_dhash(path)
+                except Exception:
+                    return None
+
+        window = deque()
+        limit = self.workers * _READAHEAD_PER_WORKER
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="dhash") as pool:
+            try:
+                for entry in manifest:
+                    if self.cancel_flag:
+                        break
+                    cached = store.get_dhash(file_key(entry)) if store is not None else None
+                    if cached is not None:
+                        collect(entry, cached, False)
+                        continue
+                    window.append((entry, pool.submit(timed_hash, entry.path)))
+                    while len(window) >= limit:
+                        entry, future = window.popleft()
+                        collect(entry, future.result(), True)
+                while window and not self.cancel_flag:
+                    entry, future = window.popleft()
+                    collect(entry, future.result(), True)
+            finally:
+                for _, future in window:
+                    future.cancel()
+        if self.progress_callback:
+            self.progress_callback(done, manifest.total, "")
+        return entries, np.array(hashes, dtype=np.uint64)
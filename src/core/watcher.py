@@ -0,0 +1,277 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from core.manifest import ManifestEntry, scan_tree
+
+# Seconds a new file's size and mtime must stay unchanged before it is handed on
+DEFAULT_SETTLE_SECONDS = 2.0
+# Polling fallback: seconds between directory sweeps
+DEFAULT_POLL_INTERVAL = 2.0
+# Paths produced by the watch loop itself (e.g. organizer targets) are ignored for this long
+IGNORE_SECONDS = 60.0
+
+# Names sync tools and browsers use while a download is still in progress
+PARTIAL_SUFFIXES = ('.part', '.partial', '.tmp', '.crdownload', '.download', '.!sync', '~')
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF | IN_MOVE_SELF
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def is_partial_name(name: str) -> bool:
+    return name.startswith('.') or name.lower().endswith(PARTIAL_SUFFIXES)
+
+
+def iter_media_files(root: str, exts: Set[str]) -> Iterable[ManifestEntry]:
+    """Every finished-looking media file under root (one scandir pass, see core.manifest)."""
+    return (e for e in scan_tree(root, exts) if not is_partial_name(os.path.basename(e.path)))
+
+
+class _Settler:
+    """Holds candidate files until their size and mtime stop changing for settle_seconds."""
+
+    def __init__(self, settle_seconds: float):
+        self.settle_seconds = settle_seconds
+        self.pending: Dict[str, Tuple[Optional[Tuple[int, int]], float]] = {}
+
+    def add(self, path: str):
+        # Any new event restarts the quiet period
+        self.pending[path] = (None, time.monotonic())
+
+    def ready(self) -> List[str]:
+        now = time.monotonic()
+        done = []
+        for path, (signature, since) in list(self.pending.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self.pending[path]  # Gone (temp file renamed away, or deleted)
+                continue
+            current = (st.st_size, st.st_mtime_ns)
+            if current != signature:
+                self.pending[path] = (current, now)
+            elif now - since >= self.settle_seconds and st.st_size > 0:
+                del self.pending[path]
+                done.append(path)
+        return sorted(done)
+
+
+class _Inotify:
+    """Recursive inotify watch on Linux via ctypes. Raises OSError when inotify is unavailable."""
+
+    def __init__(self, root: str, logger: Callable[[str], None]):
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, "inotify is Linux-only")
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.logger = logger
+        self.dirs: Dict[int, str] = {}
+        self.add_tree(root)
+
+    def add_tree(self, top: str) -> List[str]:
+        """Watch top and every directory below it. Returns the files already inside (moved-in folders)."""
+        found = []
+        stack = [top]
+        while stack:
+            current = stack.pop()
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(current), _WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOSPC:
+                    raise OSError(err, "inotify watch limit reached (fs.inotify.max_user_watches)")
+                continue
+            self.dirs[wd] = current
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            found.append(entry.path)
+            except OSError:
+                continue
+        return found
+
+    def read(self, timeout: float) -> Tuple[List[str], bool]:
+        """(paths created / written / moved in, overflowed) from events within timeout seconds."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return [], False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return [], False
+
+        paths = []
+        overflow = False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            raw = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length]
+            offset += _EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            parent = self.dirs.get(wd)
+            if parent is None or not length:
+                continue
+            path = os.path.join(parent, os.fsdecode(raw.rstrip(b'\0')))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    paths.extend(self.add_tree(path))
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE):
+                paths.append(path)
+        return paths, overflow
+
+    def close(self):
+        os.close(self.fd)
+
+
+class MediaWatcher:
+    """
+    Watches a folder tree for media files that are created or moved in, and hands them to
+    on_files in batches once they have finished writing (size/mtime stable for settle_seconds).
+
+    Uses inotify on Linux; elsewhere, or when inotify is unavailable, it polls the tree with
+    scandir every poll_interval seconds and compares sizes/mtimes. Files already present when
+    the watch starts are not reported.
+    """
+
+    def __init__(self, root: str, exts: Set[str], on_files: Callable[[List[str]], None],
+                 logger: Optional[Callable[[str], None]] = None, settle_seconds: float = DEFAULT_SETTLE_SECONDS,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL, use_inotify: bool = True):
+        self.root = os.path.abspath(root)
+        self.exts = {e.lower() for e in exts}
+        self.on_files = on_files
+        self.logger = logger or (lambda x: print(x))
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.stop_event = threading.Event()
+        self._settler = _Settler(settle_seconds)
+        self._ignored: Dict[str, float] = {}
+        # path -> (size, mtime_ns) of the files present when the watch began and of those handed on or
+        # moved in by this process since: what an inotify overflow sweep doesn't report again
+        self._seen: Dict[str, Tuple[int, int]] = {}
+        self.mode = None
+
+    def stop(self):
+        self.stop_event.set()
+
+    def ignore(self, paths: Iterable[str]):
+        """Don't report these paths (e.g. files this process just moved into the tree)."""
+        until = time.monotonic() + IGNORE_SECONDS
+        for path in paths:
+            path = os.path.abspath(path)
+            self._ignored[path] = until
+            self._remember(path)
+
+    def _wanted(self, path: str) -> bool:
+        name = os.path.basename(path)
+        if os.path.splitext(name)[1].lower() not in self.exts or is_partial_name(name):
+            return False
+        until = self._ignored.get(path)
+        if until is not None:
+            if until > time.monotonic():
+                return False
+            del self._ignored[path]
+        return True
+
+    def _candidates(self, paths: Iterable[str]):
+        for path in paths:
+            if self._wanted(path):
+                self._settler.add(path)
+
+    def _remember(self, path: str):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        self._seen[path] = (st.st_size, st.st_mtime_ns)
+
+    def _flush_ready(self):
+        ready = [p for p in self._settler.ready() if self._wanted(p)]
+        if ready:
+            for path in ready:
+                self._remember(path)
+            self.on_files(ready)
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        return {e.path: (e.size, e.mtime_ns) for e in iter_media_files(self.root, self.exts)}
+
+    def run(self):
+        """Block until stop() (or stop_event) is set, calling on_files as batches of new files settle."""
+        self.stop_event.clear()
+        notifier = None
+        if self.use_inotify:
+            try:
+                notifier = _Inotify(self.root, self.logger)
+            except (OSError, AttributeError) as e:
+                self.logger(f"inotify unavailable ({e}); polling every {self.poll_interval:g}s instead.")
+
+        if notifier is not None:
+            self.mode = 'inotify'
+            self.logger(f"Watching {self.root} (inotify, {len(notifier.dirs)} folders).")
+            try:
+                self._run_inotify(notifier)
+            finally:
+                notifier.close()
+        else:
+            self.mode = 'polling'
+            self.logger(f"Watching {self.root} (polling).")
+            self._run_polling()
+
+    def _run_inotify(self, notifier: _Inotify):
+        self._seen = self._snapshot()
+        while not self.stop_event.is_set():
+            try:
+                paths, overflow = notifier.read(min(0.5, self.settle_seconds))
+            except OSError as e:
+                self.logger(f"inotify error ({e}); switching to polling.")
+                self.mode = 'polling'
+                self._run_polling()
+                return
+            if overflow:
+                # Events were dropped: sweep for files not seen before (by path, not mtime: files copied
+                # from a camera or phone keep their old mtimes)
+                self.logger("inotify queue overflowed; rescanning.")
+                current = self._snapshot()
+                paths = [p for p, signature in current.items() if self._seen.get(p) != signature]
+                self._seen = current
+            self._candidates(paths)
+            self._flush_ready()
+
+    def _run_polling(self):
+        known = self._snapshot()
+        next_sweep = time.monotonic() + self.poll_interval
+        while not self.stop_event.is_set():
+            if time.monotonic() >= next_sweep:
+                current = self._snapshot()
+                self._candidates(p for p, sig in current.items() if known.get(p) != sig)
+                known = current
+                next_sweep = time.monotonic() + self.poll_interval
+            self._flush_ready()
+            self.stop_event.wait(min(0.5, self.poll_interval))
@@ -0,0 +1,129 @@
+import cv2
+import numpy as np
+from typing import List, Tuple, Optional, Callable
+
+# YuNet (2023mar) output heads, in the order FaceDetectorYN reads them
+STRIDES = (8, 16, 32)
+OUTPUT_NAMES = ([f"cls_{s}" for s in STRIDES] + [f"obj_{s}" for s in STRIDES]
+                + [f"bbox_{s}" for s in STRIDES] + [f"kps_{s}" for s in STRIDES])
+
+# Network input sizes must be multiples of the largest stride
+SHAPE_DIVISOR = 32
+
+
+def bucket_shapes(long_edge: int) -> List[Tuple[int, int]]:
+    """Fixed (width, height) input shapes for a given long edge: landscape 4:3, portrait 3:4 and square."""
+    long_edge = max(SHAPE_DIVISOR, (long_edge + SHAPE_DIVISOR - 1) // SHAPE_DIVISOR * SHAPE_DIVISOR)
+    short_edge = max(SHAPE_DIVISOR, (long_edge * 3 // 4) // SHAPE_DIVISOR * SHAPE_DIVISOR)
+    return [(long_edge, short_edge), (short_edge, long_edge), (long_edge, long_edge)]
+
+
+class BatchedYuNet:
+    """
+    YuNet face detector running N images per forward pass through cv2.dnn.
+
+    Images are letterboxed into a small set of fixed input shapes, so the network is
+    reshaped once per shape bucket rather than once per image (as FaceDetectorYN's
+    setInputSize does). Output decoding mirrors OpenCV's FaceDetectorYN.
+    Results use the same layout as ScannerEngine: [[x, y, w, h, score], ...] per image.
+    """
+
+    def __init__(self, model_path: str, long_edge: int = 640, batch_size: int = 8,
+                 score_threshold: float = 0.5, nms_threshold: float = 0.3, top_k: int = 5000,
+                 backend_id: int = cv2.dnn.DNN_BACKEND_OPENCV, target_id: int = cv2.dnn.DNN_TARGET_CPU,
+                 logger: Optional[Callable[[str], None]] = None):
+        self.net = cv2.dnn.readNet(model_path)
+        self.net.setPreferableBackend(backend_id)
+        self.net.setPreferableTarget(target_id)
+        self.shapes = bucket_shapes(long_edge)
+        self.batch_size = max(1, batch_size)
+        self.score_threshold = score_threshold
+        self.nms_threshold = nms_threshold
+        self.top_k = top_k
+        self.logger = logger or (lambda x: None)
+
+    def detect_batch(self, images: List[np.ndarray]) -> List[list]:
+        """Detect faces in every image; returns one face list per image, in input order."""
+        results: List[list] = [[] for _ in images]
+
+        # Group by shape bucket so each bucket's batches share one input shape
+        buckets = {}
+        for i, image in enumerate(images):
+            buckets.setdefault(self._pick_shape(image), []).append(i)
+
+        for shape, indices in buckets.items():
+            for start in range(0, len(indices), self.batch_size):
+                chunk = indices[start:start + self.batch_size]
+                for i, faces in zip(chunk, self._run(shape, [images[i] for i in chunk])):
+                    results[i] = faces
+        return results
+
+    def _pick_shape(self, image) -> Tuple[int, int]:
+        h, w = image.shape[:2]
+        aspect = w / max(h, 1)
+        # The shape whose aspect ratio is closest wastes the least letterbox padding
+        return min(self.shapes, key=lambda s: abs(np.log(aspect / (s[0] / s[1]))))
+
+    def _run(self, shape: Tuple[int, int], images: List[np.ndarray]) -> List[list]:
+        bw, bh = shape
+        canvases = []
+        ratios = []
+        for image in images:
+            h, w = image.shape[:2]
+            # Shrink to fit, never enlarge (upscaling invents detail and false faces)
+            ratio = min(bw / w, bh / h, 1.0)
+            nw, nh = max(1, min(bw, round(w * ratio))), max(1, min(bh, round(h * ratio)))
+            resized = cv2.resize(image, (nw, nh), interpolation=cv2.INTER_AREA) if ratio < 1 else image
+            canvases.append(cv2.copyMakeBorder(resized, 0, bh - nh, 0, bw - nw, cv2.BORDER_CONSTANT, value=0))
+            ratios.append(ratio)
+
+        # Partial batches run at their real size: padding them with blank frames costs a full batch of inference
+        blob = cv2.dnn.blobFromImages(canvases)
+        try:
+            self.net.setInput(blob)
+            outputs = self.net.forward(OUTPUT_NAMES)
+        except cv2.error:
+            if len(images) == 1:
+                raise
+            # Some exports pin the batch dimension to 1; fall back instead of failing the scan
+            self.logger(f"Batched inference unsupported by this model ({self.batch_size}), using batch size 1.")
+            self.batch_size = 1
+            return [faces for image in images for faces in self._run(shape, [image])]
+
+        # The export folds the batch into the anchor axis ([1, N*anchors, C]); split it back per image
+        outputs = [out.reshape(len(canvases), -1, out.shape[-1]) for out in outputs]
+        return [self._decode(outputs, n, shape, ratios[n]) for n in range(len(canvases))]
+
+    def _decode(self, outputs, n: int, shape: Tuple[int, int], ratio: float) -> list:
+        bw, bh = shape
+        boxes = []
+        scores = []
+        count = len(STRIDES)
+        for i, stride in enumerate(STRIDES):
+            cols, rows = bw // stride, bh // stride
+            cls = np.clip(outputs[i][n].reshape(-1), 0, 1)
+            obj = np.clip(outputs[i + count][n].reshape(-1), 0, 1)
+            bbox = outputs[i + count * 2][n].reshape(-1, 4)
+
+            score = np.sqrt(cls * obj)
+            keep = np.nonzero(score >= self.score_threshold)[0]
+            if keep.size == 0:
+                continue
+
+            c = (keep % cols).astype(np.float32)
+            r = (keep // cols).astype(np.float32)
+            cx = (c + bbox[keep, 0]) * stride
+            cy = (r + bbox[keep, 1]) * stride
+            w = np.exp(bbox[keep, 2]) * stride
+            h = np.exp(bbox[keep, 3]) * stride
+            boxes.append(np.stack([cx - w / 2, cy - h / 2, w, h], axis=1))
+            scores.append(score[keep])
+
+        if not boxes:
+            return []
+
+        boxes = np.concatenate(boxes)
+        scores = np.concatenate(scores)
+        keep = cv2.dnn.NMSBoxes(boxes.tolist(), scores.tolist(), self.score_threshold, self.nms_threshold, top_k=self.top_k)
+        # Undo the letterbox scaling (padding is bottom/right, so no offset)
+        return [[float(v) / ratio for v in boxes[k]] + [float(scores[k])] for k in np.array(keep).reshape(-1)]
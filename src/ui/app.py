@@ -2,6 +2,9 @@ import customtkinter as ctk
 from ui.tabs import OrganizerTab, AIScannerTab, DonateTab
 import sys
 import os
+import json
+import threading
+import time
 from core.logger import setup_logger
 from version import __version__, APP_NAME
 
@@ -13,6 +16,13 @@ ctk.set_default_color_theme("blue")
 
 import tkinter as tk
 
+# Delay after the window first appears before the AI scanner's modules are loaded in the background
+PREWARM_DELAY_MS = 1500
+
+# If set, the app writes startup timings (JSON) to this path once the window is painted, then exits.
+# Used by benchmarks/bench_startup.py.
+STARTUP_PROBE_ENV = "MAO_STARTUP_PROBE"
+
 class App(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -78,6 +88,67 @@ class App(ctk.CTk):
         self.log(f"Welcome to {APP_NAME} {__version__} (Python Edition)")
         self.log("Ready.")
 
+        self._first_map_done = False
+        self.bind("<Map>", self._on_first_map, add="+")
+
+    def _on_first_map(self, event):
+        if event.widget is not self or self._first_map_done:
+            return
+        self._first_map_done = True
+
+        probe_path = os.environ.get(STARTUP_PROBE_ENV)
+        if probe_path:
+            # Let the first frame paint before taking the measurement
+            self.after_idle(lambda: self._write_startup_probe(probe_path))
+            return
+
+        self.after(PREWARM_DELAY_MS, self.ai_frame.prewarm)
+        self.after_idle(self._check_interrupted_moves)
+
+    def _check_interrupted_moves(self):
+        # A crash or power loss mid-move leaves a journal without an end: offer to finish or roll it back
+        from tkinter import messagebox
+        from core.move_journal import interrupted_journals
+        try:
+            journals = interrupted_journals()
+        except OSError:
+            return
+        choices = []
+        for journal in journals:
+            answer = messagebox.askyesnocancel(
+                "Interrupted Move",
+                f"Moving files in\n{journal.root}\nwas interrupted ({journal.id}).\n\n"
+                "Yes: finish moving the remaining files\nNo: move the files back (roll back)\nCancel: decide later")
+            if answer is not None:
+                choices.append((journal, answer))
+        if not choices:
+            return
+
+        # The files move on a worker thread (like Undo), so the window stays responsive
+        def run():
+            for journal, answer in choices:
+                self.logger.info(f"JOURNAL: {'Finishing' if answer else 'Rolling back'} {journal.id}")
+                try:
+                    counts = journal.recover(rollback=not answer, logger=self.logger.info)
+                    msg = (f"Interrupted move {'finished' if answer else 'rolled back'}: "
+                           f"{counts['moved'] or counts['restored']} files, {counts['skipped']} skipped.")
+                except (OSError, ValueError) as e:
+                    self.logger.exception(f"JOURNAL: Could not recover {journal.id}")
+                    msg = f"Could not recover interrupted move {journal.id}: {e}"
+                self.after(0, lambda msg=msg: self.log(msg))
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _write_startup_probe(self, probe_path):
+        self.update_idletasks()
+        probe = {
+            'painted_at': time.time(),
+            'heavy_modules_loaded': sorted(m for m in ('cv2', 'mediapipe', 'numpy') if m in sys.modules),
+        }
+        with open(probe_path, 'w', encoding='utf-8') as fh:
+            json.dump(probe, fh)
+        self.destroy()
+
     def log(self, message):
         self.log_text.insert("end", message + "\n")
         self.log_text.see("end")
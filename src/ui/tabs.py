@@ -5,9 +5,45 @@ import os
 import shutil
 from PIL import Image
 from core.organizer import OrganizerEngine
-from core.scanner import ScannerEngine
+from core.cache import DetectionCache
+from core.checkpoint import ScanJournal
+from core.manifest import ManifestEntry
+from core.move_journal import MoveJournal, last_undoable
+from core.move_plan import DestinationIndex
+# core.scanner is imported lazily (see AIScannerTab.scanner): it pulls in OpenCV and MediaPipe
 
 import webbrowser
+from datetime import datetime
+
+# Max rows rendered per result list (CTk buttons are expensive)
+UI_LIST_LIMIT = 500
+
+# How often (ms) streamed scan results are drained into the lists
+RESULT_DRAIN_MS = 300
+
+
+def undo_last_run(widget, kind, root, log_callback, file_logger):
+    # Moves the newest not-yet-undone run of this kind (in root, if set) back, from its move journal
+    journal = last_undoable(root if root and os.path.isdir(root) else None, kind)
+    if journal is None:
+        messagebox.showinfo("Undo", "There is no move to undo.")
+        return
+    when = datetime.fromtimestamp(journal.header.get('started', 0)).strftime("%Y-%m-%d %H:%M")
+    if not messagebox.askyesno("Undo", f"Move the {journal.moved_count} files moved on {when} in\n{journal.root}\nback to where they were?"):
+        return
+
+    def run():
+        try:
+            counts = journal.undo(lambda msg: widget.after(0, lambda: log_callback(msg)))
+            msg = f"UNDO: Restored {counts['restored']} files ({counts['skipped']} skipped)."
+            file_logger.info(msg)
+        except Exception as e:
+            file_logger.exception("UNDO: Failed")
+            msg = f"UNDO FAILED: {e}"
+        widget.after(0, lambda: log_callback(msg))
+
+    threading.Thread(target=run, daemon=True).start()
+
 
 class OrganizerTab(ctk.CTkFrame):
     def __init__(self, master, log_callback, file_logger):
@@ -85,6 +121,15 @@ class OrganizerTab(ctk.CTkFrame):
         self.btn_stop = ctk.CTkButton(self.button_frame, text="Stop", height=40, width=60, fg_color="#D32F2F", hover_color="#B71C1C", state="disabled", command=self.stop_organize)
         self.btn_stop.pack(side="right", padx=(5, 0))
 
+        # Undo Button (moves the last real run's files back, from its move journal)
+        self.btn_undo = ctk.CTkButton(self.button_frame, text="Undo", height=40, width=60, fg_color="#555555", hover_color="#444444",
+                                      command=lambda: undo_last_run(self, 'organize', self.entry_path.get(), self.log_callback, self.file_logger))
+        self.btn_undo.pack(side="right", padx=(5, 0))
+
+        # Apply Button (shown after a dry run: moves exactly what it showed, without reading any dates again)
+        self.btn_apply = ctk.CTkButton(self.button_frame, text="Apply Dry Run", height=40, fg_color="#2E7D32", hover_color="#1B5E20", command=self.apply_plan)
+        self._last_dry_run = False
+
         # Progress
         self.progress_bar = ctk.CTkProgressBar(self.frame_action)
         self.progress_bar.pack(fill="x", padx=20, pady=10)
@@ -112,27 +157,46 @@ class OrganizerTab(ctk.CTkFrame):
         dry_run = bool(self.chk_dry_run.get())
         use_flat_folders = bool(self.chk_flat_folders.get())
         
+        self._last_dry_run = dry_run
+        self._run_in_background(lambda: self.engine.organize(path, dry_run=dry_run, use_flat_folders=use_flat_folders,
+                                                             progress_callback=self.on_progress),
+                                "Scanning files...")
+
+    def apply_plan(self):
+        plan = self.engine.last_plan
+        if plan is None:
+            return
+        self._last_dry_run = False
+        self._run_in_background(lambda: self.engine.execute(plan, progress_callback=self.on_progress), "Moving files...")
+
+    def _run_in_background(self, work, status):
         self.btn_start.configure(state="disabled")
+        self.btn_apply.pack_forget()
         self.btn_stop.configure(state="normal")
         self.progress_bar.set(0)
-        self.lbl_progress.configure(text="Scanning files...")
-        
-        def on_progress(current, total, filename=""):
-            # Thread-safe update
-            self.after(0, lambda: self.update_progress(current, total, filename))
+        self.lbl_progress.configure(text=status)
 
         def run():
             try:
-                self.engine.organize(path, dry_run=dry_run, use_flat_folders=use_flat_folders, progress_callback=on_progress)
+                work()
             finally:
                 self.after(0, self.on_finished)
             
         threading.Thread(target=run, daemon=True).start()
 
+    def on_progress(self, current, total, filename=""):
+        # Thread-safe update
+        self.after(0, lambda: self.update_progress(current, total, filename))
+
     def on_finished(self):
         self.btn_start.configure(state="normal", text="Start Organization")
         self.btn_stop.configure(state="disabled")
         self.lbl_progress.configure(text="Finished.")
+        plan = self.engine.last_plan
+        pending = len(plan.pending()) if plan is not None and self._last_dry_run and not self.engine.cancel_flag else 0
+        if pending:
+            self.btn_apply.configure(text=f"Apply Dry Run ({pending} moves)")
+            self.btn_apply.pack(side="left", padx=5, after=self.btn_start)
 
     def update_progress(self, current, total, filename=""):
         if total > 0:
@@ -151,12 +215,24 @@ class AIScannerTab(ctk.CTkFrame):
                 return
             self.after(0, lambda: self.log_callback(msg))
             
-        self.scanner = ScannerEngine(safe_log)
+        self._safe_log = safe_log
+        self._scanner = None
+        self._similar = None
+        # "Move Files" destination under the scanned folder: No_People after a scan, Near_Duplicates after Find Similar
+        self._move_folder = "No_People"
+        # Row text overriding the file name (group numbers after Find Similar)
+        self._row_labels = {}
         
         # Internal State
         self.keep_files = []
         self.exclude_files = []
         self.selected_item = None # (list_name, index, file_path)
+
+        # Streaming results: the scan thread appends here, the UI drains it in batches (see _drain_results)
+        self._pending_results = []
+        self._pending_lock = threading.Lock()
+        self._scan_running = False
+        self._rendered = {}  # list_name -> (rows rendered, overflow label or None)
         
         # Grid Plan:
         # Row 0: Header/Config
@@ -172,6 +248,8 @@ class AIScannerTab(ctk.CTkFrame):
         
         self.entry_path = ctk.CTkEntry(self.top_frame, placeholder_text="Folder to Scan...")
         self.entry_path.pack(side="left", fill="x", expand=True, padx=(0,10))
+        self.entry_path.bind("<FocusOut>", lambda e: self.update_resume_button())
+        self.entry_path.bind("<Return>", lambda e: self.update_resume_button())
         
         self.btn_browse = ctk.CTkButton(self.top_frame, text="...", width=40, command=self.browse_source)
         self.btn_browse.pack(side="left", padx=(0, 10))
@@ -181,6 +259,14 @@ class AIScannerTab(ctk.CTkFrame):
         # Keep Animals Checkbox
         self.chk_keep_animals = ctk.CTkCheckBox(self.top_frame, text="Keep Animals", width=20, onvalue=True, offvalue=False)
         self.chk_keep_animals.pack(side="left", padx=15)
+
+        # Scan Videos Checkbox (clips are classified from a few sampled frames)
+        self.chk_scan_videos = ctk.CTkCheckBox(self.top_frame, text="Scan Videos", width=20, onvalue=True, offvalue=False)
+        self.chk_scan_videos.pack(side="left", padx=15)
+
+        # Tune Checkbox (off: a first large scan on an untuned machine would otherwise benchmark for minutes)
+        self.chk_autotune = ctk.CTkCheckBox(self.top_frame, text="Tune for this PC", width=20, onvalue=True, offvalue=False)
+        self.chk_autotune.pack(side="left", padx=15)
         
         # Log Output Checkbox
         self.chk_log_output = ctk.CTkCheckBox(self.top_frame, text="Log Output", width=20, onvalue=True, offvalue=False)
@@ -189,6 +275,14 @@ class AIScannerTab(ctk.CTkFrame):
         
         self.btn_scan = ctk.CTkButton(self.top_frame, text="START SCAN", fg_color="#2E7D32", hover_color="#1B5E20", command=self.start_scan)
         self.btn_scan.pack(side="right", padx=10)
+
+        # Find Similar Button (groups resized / re-compressed copies of the same photo)
+        self.btn_similar = ctk.CTkButton(self.top_frame, text="Find Similar", fg_color="#6A1B9A", hover_color="#4A148C", command=self.start_similar)
+        self.btn_similar.pack(side="right", padx=(10, 0))
+
+        # Resume Button (only shown while the folder has an unfinished scan checkpoint)
+        self.btn_resume = ctk.CTkButton(self.top_frame, text="Resume previous scan", fg_color="#1565C0", hover_color="#0D47A1",
+                                        command=lambda: self.start_scan(resume=True))
         
         # === Main Lists ===
         self.content_frame = ctk.CTkFrame(self, fg_color="transparent")
@@ -199,7 +293,8 @@ class AIScannerTab(ctk.CTkFrame):
 
         # Left List (Keep)
         # Left List (Keep - Visual Name, actually contains Excluded/People files)
-        ctk.CTkLabel(self.content_frame, text="KEEP (People/Animals)", text_color="#4CAF50", font=("Arial", 12, "bold")).grid(row=0, column=0, sticky="w")
+        self.lbl_keep = ctk.CTkLabel(self.content_frame, text="KEEP (People/Animals)", text_color="#4CAF50", font=("Arial", 12, "bold"))
+        self.lbl_keep.grid(row=0, column=0, sticky="w")
         
         self.list_keep = ctk.CTkScrollableFrame(self.content_frame, label_text="Files (0)")
         self.list_keep.grid(row=1, column=0, sticky="nsew", padx=(0,5))
@@ -214,7 +309,8 @@ class AIScannerTab(ctk.CTkFrame):
 
         # Right List (Excluded)
         # Right List (Excluded - Visual Name, actually contains Keep/NoPeople files)
-        ctk.CTkLabel(self.content_frame, text="MOVE (Other)", text_color="#F44336", font=("Arial", 12, "bold")).grid(row=0, column=2, sticky="w")
+        self.lbl_move = ctk.CTkLabel(self.content_frame, text="MOVE (Other)", text_color="#F44336", font=("Arial", 12, "bold"))
+        self.lbl_move.grid(row=0, column=2, sticky="w")
         self.list_exclude = ctk.CTkScrollableFrame(self.content_frame, label_text="Files (0)")
         self.list_exclude.grid(row=1, column=2, sticky="nsew", padx=(5,0))
 
@@ -250,6 +346,13 @@ class AIScannerTab(ctk.CTkFrame):
         # Cancel Button (Next to Move Files)
         self.btn_cancel = ctk.CTkButton(self.footer, text="Stop", width=60, fg_color="#D32F2F", hover_color="#B71C1C", state="disabled", command=self.cancel_scan)
         self.btn_cancel.pack(side="right", padx=5)
+
+        # Clear Cache Button (forces fresh inference on the next scan)
+        self.btn_clear_cache = ctk.CTkButton(self.footer, text="Clear Cache", width=90, fg_color="#555555", hover_color="#444444", command=self.clear_cache_action)
+
+        # Undo Move Button (moves the last "Move Files" batch back, from its move journal)
+        self.btn_undo_move = ctk.CTkButton(self.footer, text="Undo Move", width=90, fg_color="#555555", hover_color="#444444",
+                                           command=lambda: undo_last_run(self, 'scan_move', self.entry_path.get(), self.log_callback, self.file_logger))
         
         self.lbl_status = ctk.CTkLabel(self.footer, text="Ready", text_color="gray")
         
@@ -258,9 +361,37 @@ class AIScannerTab(ctk.CTkFrame):
 
         self.btn_move_files.pack(side="right", padx=10, pady=5)
         self.btn_cancel.pack(side="right", padx=5)
+        self.btn_clear_cache.pack(side="right", padx=5)
+        self.btn_undo_move.pack(side="right", padx=5)
         self.lbl_status.pack(side="left", padx=10)
         self.progress.pack(side="left", fill="x", expand=True, padx=10)
 
+    @property
+    def scanner(self):
+        # Created on first scan so OpenCV/MediaPipe stay out of application startup
+        if self._scanner is None:
+            from core.scanner import ScannerEngine
+            self._scanner = ScannerEngine(self._safe_log)
+        return self._scanner
+
+    @property
+    def similar(self):
+        if self._similar is None:
+            from core.similar import SimilarImageFinder
+            self._similar = SimilarImageFinder(self._safe_log)
+        return self._similar
+
+    def prewarm(self):
+        # Load the scanner's heavy modules in the background so the first scan starts instantly
+        def _load():
+            try:
+                import core.scanner
+                self.file_logger.info("SCAN: Scanner modules pre-loaded")
+            except Exception as e:
+                self.file_logger.error(f"SCAN: Pre-load failed: {e}")
+
+        threading.Thread(target=_load, daemon=True).start()
+
     def on_preview_resize(self, event):
         # Debounce: Cancel previous timer if it exists
         if self._resize_timer:
@@ -284,13 +415,39 @@ class AIScannerTab(ctk.CTkFrame):
         if path:
             self.entry_path.delete(0, "end")
             self.entry_path.insert(0, path)
+            self.update_resume_button()
+
+    def update_resume_button(self):
+        # Offer "Resume previous scan" when the folder has a checkpoint from an unfinished scan
+        path = self.entry_path.get()
+        journal = ScanJournal.peek(path) if path and os.path.isdir(path) else None
+        if journal and journal.get('entries') and not self._scan_running:
+            self.btn_resume.configure(text=f"Resume previous scan ({journal['entries']} done)")
+            self.btn_resume.pack(side="right", padx=(10, 0), before=self.btn_scan)
+        else:
+            self.btn_resume.pack_forget()
 
     def cancel_scan(self):
-        self.scanner.cancel()
+        if self._move_folder == "Near_Duplicates":
+            self.similar.cancel()
+        else:
+            self.scanner.cancel()
         self.btn_cancel.configure(state="disabled")
         self.lbl_status.configure(text="Stopping...")
 
-    def start_scan(self):
+    def clear_cache_action(self):
+        if not messagebox.askyesno("Clear Cache", "Forget all stored detection results?\nThe next scan will re-analyze every image."):
+            return
+        try:
+            cache = (self._scanner and self._scanner.cache) or DetectionCache()
+            removed = cache.invalidate()
+            self.log_callback(f"Detection cache cleared ({removed} entries).")
+            self.file_logger.info(f"CACHE: Cleared {removed} entries")
+        except Exception as e:
+            self.file_logger.exception("CACHE: Clear failed")
+            messagebox.showerror("Error", f"Failed to clear cache:\n{e}")
+
+    def start_scan(self, resume=False):
         try:
             # Debug connection
             self.file_logger.info("SCAN: Start Button Clicked")
@@ -314,17 +471,35 @@ class AIScannerTab(ctk.CTkFrame):
                 return
 
             use_gpu = True # Always GPU
+            if resume:
+                # Resume with the settings the interrupted scan used, or its verdicts won't be reused
+                settings = (ScanJournal.peek(path) or {}).get('settings', {})
+                for chk, key in ((self.chk_keep_animals, 'keep_animals'), (self.chk_scan_videos, 'scan_videos')):
+                    if settings.get(key):
+                        chk.select()
+                    elif key in settings:
+                        chk.deselect()
             keep_animals = bool(self.chk_keep_animals.get())
-            self.file_logger.info(f"SCAN: Config - Keep Animals: {keep_animals}")
+            scan_videos = bool(self.chk_scan_videos.get())
+            # None = this machine's autotuned worker count (all cores but one until tuned, keeping the UI responsive)
+            workers = None
+            self.file_logger.info(f"SCAN: Config - Keep Animals: {keep_animals}, Videos: {scan_videos}, Workers: auto, Resume: {resume}")
+
+            self._set_mode("No_People", "KEEP (People/Animals)", "MOVE (Other)")
 
             self.file_logger.debug("SCAN: Updating UI State - Buttons")
             self.btn_scan.configure(state="disabled")
+            self.btn_similar.configure(state="disabled")
+            self.btn_resume.pack_forget()
+            self.btn_clear_cache.configure(state="disabled")
             self.btn_cancel.configure(state="normal")
             self.btn_move_files.configure(state="disabled")
             
             self.file_logger.debug("SCAN: Clearing internal lists")
             self.keep_files.clear()
             self.exclude_files.clear()
+            with self._pending_lock:
+                self._pending_results.clear()
             
             self.file_logger.debug("SCAN: Refreshing Lists UI")
             self.refresh_lists()
@@ -334,11 +509,18 @@ class AIScannerTab(ctk.CTkFrame):
             
             self.file_logger.debug("SCAN: Setting Callbacks")
             self.scanner.progress_callback = self.on_progress
+            self.scanner.scan_videos = scan_videos
+            self.scanner.autotune = bool(self.chk_autotune.get())
             
             def run():
                 try:
                     self.file_logger.info("SCAN: Thread Started EXECUTION")
-                    self.scanner.run_scan(path, keep_animals=keep_animals)
+                    # Move Files works while the scan runs: files it moves into the tree must not be scanned again
+                    skip_folders = [os.path.join(path, "No_People"), os.path.join(path, "Near_Duplicates")]
+                    for result in self.scanner.iter_scan(path, keep_animals=keep_animals, workers=workers, resume=resume,
+                                                         skip_folders=skip_folders):
+                        with self._pending_lock:
+                            self._pending_results.append(result)
                     self.file_logger.info("SCAN: Thread Finished Normally")
                     # Finish call must happen on main thread to be safe with Tk
                     self.after(0, self.on_finished)
@@ -348,23 +530,104 @@ class AIScannerTab(ctk.CTkFrame):
                     self.after(0, self.on_finished)
 
             self.file_logger.info("SCAN: Dispatching Thread...")
+            self._scan_running = True
             threading.Thread(target=run, daemon=True).start()
+            self.after(RESULT_DRAIN_MS, self._drain_results)
             self.file_logger.info("SCAN: Thread Dispatched Successfully")
 
         except Exception as e:
             self.file_logger.exception("SCAN: Main Thread Error in start_scan")
             messagebox.showerror("System Error", f"Failed to start scan:\n{e}")
-    
-    def on_finished(self):
-        self.keep_files = list(self.scanner.no_people_files)
-        self.exclude_files = list(self.scanner.excluded_files)
+
+    def _set_mode(self, move_folder, keep_title, move_title):
+        self._move_folder = move_folder
+        self._row_labels = {}
+        self.lbl_keep.configure(text=keep_title)
+        self.lbl_move.configure(text=move_title)
+
+    def start_similar(self):
+        path = self.entry_path.get()
+        if not path or not os.path.isdir(path):
+            messagebox.showerror("Error", f"Please select an existing folder.\n{path}")
+            return
+        self.file_logger.info(f"SIMILAR: Searching '{path}'")
+
+        self._set_mode("Near_Duplicates", "KEEP (Best copy)", "MOVE (Similar copies)")
+        self.btn_scan.configure(state="disabled")
+        self.btn_similar.configure(state="disabled")
+        self.btn_resume.pack_forget()
+        self.btn_cancel.configure(state="normal")
+        self.btn_move_files.configure(state="disabled")
+        self.keep_files.clear()
+        self.exclude_files.clear()
+        self.refresh_lists()
+        self.progress.set(0)
+        self.lbl_status.configure(text="Hashing images...")
+
+        self.similar.progress_callback = lambda current, total, filename: self.after(
+            0, lambda: self.update_progress_ui(current, total, 0, filename))
+
+        def run():
+            groups = []
+            try:
+                groups = self.similar.find_groups(path)
+                self.file_logger.info(f"SIMILAR: {len(groups)} groups found")
+            except Exception as e:
+                self.file_logger.exception("SIMILAR: Thread Crashed")
+                self.after(0, lambda: messagebox.showerror("Error while finding similar images", str(e)))
+            self.after(0, lambda: self.on_similar_finished(groups))
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def on_similar_finished(self, groups):
+        # Left: the copy to keep of each group (the largest); right: the other copies, to move
+        for number, group in enumerate(groups, 1):
+            for f in group:
+                self._row_labels[f] = f"[{number}] {os.path.basename(f)}"
+            self.exclude_files.append(group[0])
+            self.keep_files.extend(group[1:])
         self.refresh_lists()
         self.btn_scan.configure(state="normal")
+        self.btn_similar.configure(state="normal")
+        self.btn_cancel.configure(state="disabled")
+        if self.keep_files:
+            self.btn_move_files.configure(state="normal")
+        self.lbl_status.configure(text=f"Found {len(groups)} groups of similar images.")
+        self.progress.set(1.0)
+        self.update_resume_button()
+
+    def _drain_results(self):
+        # Move results streamed in by the scan thread into the lists, one batch per tick
+        with self._pending_lock:
+            batch = self._pending_results
+            self._pending_results = []
+
+        if batch:
+            new_keep = [r.path for r in batch if not r.is_excluded]
+            new_exclude = [r.path for r in batch if r.is_excluded]
+            self.keep_files.extend(new_keep)
+            self.exclude_files.extend(new_exclude)
+            self.append_to_lists()
+            # Partial results can be acted on before the scan completes
+            if self.keep_files:
+                self.btn_move_files.configure(state="normal")
+
+        if self._scan_running:
+            self.after(RESULT_DRAIN_MS, self._drain_results)
+
+    def on_finished(self):
+        self._scan_running = False
+        self._drain_results()
+        self.btn_scan.configure(state="normal")
+        self.btn_similar.configure(state="normal")
+        self.btn_clear_cache.configure(state="normal")
         self.btn_cancel.configure(state="disabled")
         if self.keep_files:
             self.btn_move_files.configure(state="normal")
         self.lbl_status.configure(text="Scan Complete.")
         self.progress.set(1.0)
+        # A stopped scan leaves its checkpoint behind
+        self.update_resume_button()
 
     def on_progress(self, current, total, eta, filename=""):
         # We invoke 'after' to update UI safely
@@ -378,25 +641,38 @@ class AIScannerTab(ctk.CTkFrame):
     def refresh_lists(self):
         for widget in self.list_keep.winfo_children(): widget.destroy()
         for widget in self.list_exclude.winfo_children(): widget.destroy()
-
-        def add_item(parent, files, list_name):
-            for i, f in enumerate(files):
-                if i > 500: # Limit UI listing for performance
-                    ctk.CTkLabel(parent, text=f"...and {len(files)-500} more").pack()
+        self._rendered = {}
+        self.append_to_lists()
+
+    def append_to_lists(self):
+        # Adds rows for entries not rendered yet; refresh_lists() rebuilds from scratch.
+        def add_items(parent, files, list_name):
+            start, overflow = self._rendered.get(list_name, (0, None))
+            for i in range(start, len(files)):
+                if i > UI_LIST_LIMIT: # Limit UI listing for performance
                     break
-                    
-                name = os.path.basename(f)
+
+                f = files[i]
+                name = self._row_labels.get(f) or os.path.basename(f)
                 btn = ctk.CTkButton(parent, text=name, fg_color="transparent", border_width=0, anchor="w",
                                   command=lambda f=f, idx=i, ln=list_name: self.select_file(f, idx, ln))
                 btn.pack(fill="x", pady=1)
+                start = i + 1
+
+            if len(files) > start:
+                if overflow is None:
+                    overflow = ctk.CTkLabel(parent)
+                    overflow.pack()
+                overflow.configure(text=f"...and {len(files) - start} more")
+            self._rendered[list_name] = (start, overflow)
 
         # VISUAL SWAP:
         # Left List (self.list_keep UI) gets PREVIOUSLY RIGHT DATA (self.exclude_files - People)
         # Right List (self.list_exclude UI) gets PREVIOUSLY LEFT DATA (self.keep_files - No People)
         
         # We use list_name identifiers that match the actual data list they represent, to make move_item easier.
-        add_item(self.list_keep, self.exclude_files, "exclude_data") 
-        add_item(self.list_exclude, self.keep_files, "keep_data")
+        add_items(self.list_keep, self.exclude_files, "exclude_data")
+        add_items(self.list_exclude, self.keep_files, "keep_data")
         
         self.list_keep.configure(label_text=f"Files ({len(self.exclude_files)})")
         self.list_exclude.configure(label_text=f"Files ({len(self.keep_files)})")
@@ -429,7 +705,7 @@ class AIScannerTab(ctk.CTkFrame):
         def _load_worker(path, width, height):
             try:
                 # 1. Load and process in BACKGROUND THREAD
-                with Image.open(path) as img:
+                with self._open_preview(path) as img:
                     if img.mode not in ("RGB", "RGBA"):
                         img = img.convert("RGB")
                     
@@ -449,6 +725,16 @@ class AIScannerTab(ctk.CTkFrame):
         # Start thread
         threading.Thread(target=_load_worker, args=(f, w, h), daemon=True).start()
 
+    def _open_preview(self, path):
+        # Videos preview as their middle frame (the scanner, and so cv2, is loaded by then)
+        from core.scanner import VIDEO_EXTS, read_video_frame
+        if os.path.splitext(path)[1].lower() in VIDEO_EXTS:
+            frame = read_video_frame(path)
+            if frame is None:
+                raise ValueError(f"Could not read a frame from {os.path.basename(path)}")
+            return Image.fromarray(frame[:, :, ::-1].copy())
+        return Image.open(path)
+
     def _update_preview_ui(self, path, pil_img, w, h):
         # Check race condition: Is this still the file user wants to see?
         if path != self.current_preview_path:
@@ -487,7 +773,7 @@ class AIScannerTab(ctk.CTkFrame):
         self.selected_item = None
 
     def move_files_action(self):
-        dest_dir = os.path.join(self.entry_path.get(), "No_People")
+        dest_dir = os.path.join(self.entry_path.get(), self._move_folder)
         if not os.path.exists(dest_dir):
             os.makedirs(dest_dir)
             
@@ -500,27 +786,53 @@ class AIScannerTab(ctk.CTkFrame):
         
         # Snapshot list to avoid modification during iteration
         files_to_move = list(self.keep_files)
-        
+
+        # Files from different folders often share a name (IMG_0001.jpg): each gets a free one
+        # (IMG_0001_1.jpg, ...) so no file is ever overwritten
+        targets = DestinationIndex()
+        moves = []
         for f in files_to_move:
+            try:
+                st = os.stat(f)
+                entry = ManifestEntry(f, st.st_size, st.st_mtime_ns, st.st_ino)
+            except OSError:
+                entry = ManifestEntry(f, 0, 0, 0)
+            target = targets.free_name(os.path.join(dest_dir, os.path.basename(f)))
+            targets.claim(target, entry)
+            moves.append((f, target, entry.size, entry.mtime_ns))
+
+        # Journal the moves first (one fsync) so they can be undone, and finished or rolled back after a crash
+        try:
+            journal = MoveJournal.begin('scan_move', self.entry_path.get(), moves)
+        except OSError as e:
+            self.file_logger.error(f"MOVE: Journal unavailable, this move can't be undone: {e}")
+            journal = None
+        
+        for i, (f, target, _, _) in enumerate(moves):
             try:
                 fname = os.path.basename(f)
-                target = os.path.join(dest_dir, fname)
                 
-                # Move
+                # Move (shutil.move would replace a file that appeared there since)
+                if os.path.lexists(target):
+                    raise FileExistsError(f"{target} already exists")
                 shutil.move(f, target)
                 count += 1
+                if journal is not None:
+                    journal.moved(i)
                 
                 # Real-time Log (No Popup)
-                self.file_logger.info(f"Moved: {fname} -> {dest_dir}")
+                self.file_logger.info(f"Moved: {fname} -> {os.path.relpath(target, self.entry_path.get())}")
                 
             except Exception as e:
                 self.file_logger.error(f"MOVE ERROR: Failed to move {f} -> {e}")
                 error_count += 1
+        if journal is not None:
+            journal.finish()
             
         # Final Summary Log
         if count > 0:
-            self.log_callback(f"SUCCESS: Successfully moved {count} files to 'No_People' folder.")
-            self.file_logger.info(f"SUCCESS: Successfully moved {count} files to 'No_People' folder.")
+            self.log_callback(f"SUCCESS: Successfully moved {count} files to '{self._move_folder}' folder.")
+            self.file_logger.info(f"SUCCESS: Successfully moved {count} files to '{self._move_folder}' folder.")
         else:
             self.log_callback("MOVE FINISHED: No files were moved.")
             self.file_logger.info("MOVE FINISHED: No files were moved.")
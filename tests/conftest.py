@@ -0,0 +1,33 @@
+import os
+import sys
+import time
+
+import pytest
+
+# The app and CLI run with src on the path (see cli.py / launcher.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path_factory, monkeypatch):
+    """A fresh cache folder (hash store, journals) per test, never the user's."""
+    path = tmp_path_factory.mktemp('cache')
+    monkeypatch.setenv('XDG_CACHE_HOME', str(path))
+    monkeypatch.setenv('LOCALAPPDATA', str(path))
+    return path
+
+
+JULY_4 = time.mktime((2019, 7, 4, 12, 0, 0, 0, 0, -1))
+
+
+@pytest.fixture
+def media(tmp_path):
+    """media(rel, content, when=July 4th 2019): a media file without metadata under tmp_path, dated by its mtime."""
+    def make(rel: str, content: bytes, when: float = JULY_4) -> str:
+        path = os.path.join(str(tmp_path), *rel.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as fh:
+            fh.write(content)
+        os.utime(path, (when, when))
+        return path
+    return make
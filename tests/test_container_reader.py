@@ -0,0 +1,104 @@
+import struct
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from core.container_reader import read_container_date
+
+UTC = datetime(2021, 6, 5, 14, 30, 0, tzinfo=timezone.utc)
+# Dates come back in local time, like EXIF dates
+LOCAL = UTC.astimezone().replace(tzinfo=None)
+MEDIA = b'\x00' * (1 << 20)
+
+
+def atom(kind, payload):
+    return struct.pack('>I', 8 + len(payload)) + kind + payload
+
+
+def mvhd(created, version=0):
+    if version == 1:
+        return atom(b'mvhd', b'\x01\x00\x00\x00' + struct.pack('>QQIQ', created, created, 1000, 0) + b'\x00' * 80)
+    return atom(b'mvhd', b'\x00\x00\x00\x00' + struct.pack('>IIII', created, created, 1000, 0) + b'\x00' * 80)
+
+
+def mp4(when=UTC, moov_first=True, version=0):
+    created = int((when - datetime(1904, 1, 1, tzinfo=timezone.utc)).total_seconds()) if when else 0
+    ftyp = atom(b'ftyp', b'isom\x00\x00\x02\x00isomiso2mp41')
+    moov = atom(b'moov', atom(b'udta', b'\x00' * 16) + mvhd(created, version))
+    mdat = atom(b'mdat', MEDIA)
+    return ftyp + (moov + mdat if moov_first else mdat + moov)
+
+
+def ebml(element_id, payload):
+    # 8-byte sizes keep the layout simple to compute
+    return element_id + b'\x01' + len(payload).to_bytes(7, 'big') + payload
+
+
+def mkv(when=UTC, info_after_cluster=False):
+    nanoseconds = (when - datetime(2001, 1, 1, tzinfo=timezone.utc)) // timedelta(microseconds=1) * 1000
+    header = ebml(b'\x1a\x45\xdf\xa3', ebml(b'\x42\x82', b'webm'))
+    info = ebml(b'\x15\x49\xa9\x66', ebml(b'\x2a\xd7\xb1', (1000000).to_bytes(3, 'big'))
+                + ebml(b'\x44\x61', struct.pack('>q', nanoseconds)))
+    cluster = ebml(b'\x1f\x43\xb6\x75', MEDIA)
+    if not info_after_cluster:
+        return header + ebml(b'\x18\x53\x80\x67', info + cluster)
+    seek_len = len(ebml(b'\x11\x4d\x9b\x74', ebml(b'\x4d\xbb', ebml(b'\x53\xab', b'\x15\x49\xa9\x66')
+                                                                + ebml(b'\x53\xac', b'\x00' * 8))))
+    seek_head = ebml(b'\x11\x4d\x9b\x74', ebml(b'\x4d\xbb', ebml(b'\x53\xab', b'\x15\x49\xa9\x66')
+                                                           + ebml(b'\x53\xac', (seek_len + len(cluster)).to_bytes(8, 'big'))))
+    return header + ebml(b'\x18\x53\x80\x67', seek_head + cluster + info)
+
+
+def write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+@pytest.mark.parametrize('moov_first', [True, False])
+@pytest.mark.parametrize('version', [0, 1])
+def test_mp4_moov_front_or_back(tmp_path, moov_first, version):
+    date, bytes_read = read_container_date(write(tmp_path, 'a.mp4', mp4(moov_first=moov_first, version=version)))
+    assert date == LOCAL
+    # mdat is seeked over, never read
+    assert bytes_read < 16 * 1024
+
+
+def test_mp4_unset_or_default_dates(tmp_path):
+    assert read_container_date(write(tmp_path, 'a.mov', mp4(when=None)))[0] is None
+    assert read_container_date(write(tmp_path, 'b.mov', mp4(when=datetime(1970, 1, 1, tzinfo=timezone.utc))))[0] is None
+
+
+@pytest.mark.parametrize('info_after_cluster', [False, True])
+def test_mkv_date_utc(tmp_path, info_after_cluster):
+    date, bytes_read = read_container_date(write(tmp_path, 'a.mkv', mkv(info_after_cluster=info_after_cluster)))
+    assert date == LOCAL
+    assert bytes_read < 16 * 1024
+
+
+def test_other_formats_are_not_opened(tmp_path):
+    assert read_container_date(str(tmp_path / 'missing.avi')) == (None, 0)
+    assert read_container_date(write(tmp_path, 'a.mp4', b'RIFF\x00\x00\x00\x00AVI '))[0] is None
+
+
+@pytest.mark.parametrize('name, data', [('a.mp4', mp4()), ('b.mp4', mp4(moov_first=False)),
+                                        ('c.webm', mkv()), ('d.webm', mkv(info_after_cluster=True))])
+def test_truncated_files(tmp_path, name, data):
+    media = data.index(MEDIA)
+    # Every cut within the headers, and a few within / after the media data
+    sizes = list(range(media + 16)) + [media + 4096, len(data) - 200, len(data) - 1]
+    for size in sizes:
+        date, bytes_read = read_container_date(write(tmp_path, name, data[:size]))
+        assert date in (None, LOCAL)
+        assert bytes_read <= 64 * 1024
+
+
+def test_corrupt_sizes(tmp_path):
+    data = mp4()
+    moov = data.index(b'moov') - 4
+    # moov claiming to be smaller than its own header, or running far past the end of the file
+    for size in (3, 0x7FFFFFFF):
+        bad = data[:moov] + struct.pack('>I', size) + data[moov + 4:]
+        assert read_container_date(write(tmp_path, 'a.mp4', bad))[0] in (None, LOCAL)
+    assert read_container_date(write(tmp_path, 'b.mkv', b'\x1a\x45\xdf\xa3' + b'\x00' * 32))[0] is None
+    assert read_container_date(write(tmp_path, 'c.mkv', b'\x1a\x45\xdf\xa3\xff' + b'\xff' * 32))[0] is None
@@ -0,0 +1,116 @@
+import struct
+from datetime import datetime
+
+import pytest
+
+from core.exif_reader import (EXIF_DATE_MAX_BYTES, READ_CHUNK, TAG_DATETIME_DIGITIZED, TAG_DATETIME_ORIGINAL,
+                               read_exif_date)
+
+TAKEN = datetime(2019, 7, 4, 12, 34, 56)
+
+
+def tiff_block(dates, endian='<'):
+    """TIFF structure: IFD0 pointing at an EXIF IFD holding the given {tag: 'YYYY:MM:DD HH:MM:SS'} dates."""
+    exif_ifd = 8 + 2 + 12 + 4
+    data = exif_ifd + 2 + 12 * len(dates) + 4
+    out = (b'II*\x00' if endian == '<' else b'MM\x00*') + struct.pack(endian + 'I', 8)
+    out += struct.pack(endian + 'H', 1) + struct.pack(endian + 'HHII', 0x8769, 4, 1, exif_ifd) + b'\x00' * 4
+    out += struct.pack(endian + 'H', len(dates))
+    values = b''
+    for tag, text in sorted(dates.items()):
+        raw = text.encode('ascii') + b'\x00'
+        out += struct.pack(endian + 'HHII', tag, 2, len(raw), data + len(values))
+        values += raw
+    return out + b'\x00' * 4 + values
+
+
+def jpeg(tiff, filler_segments=0):
+    app0 = b'JFIF\x00' + b'\x00' * 9
+    out = b'\xff\xd8' + b'\xff\xe0' + struct.pack('>H', len(app0) + 2) + app0
+    # APP2 segments (e.g. ICC profiles) before the EXIF block, up to 64KB each
+    out += (b'\xff\xe2' + struct.pack('>H', 0xFFFF) + b'\x00' * 0xFFFD) * filler_segments
+    payload = b'Exif\x00\x00' + tiff
+    out += b'\xff\xe1' + struct.pack('>H', len(payload) + 2) + payload
+    return out + b'\xff\xda\x00\x02' + b'\x55' * 4096 + b'\xff\xd9'
+
+
+def png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + b'\x00' * 4
+
+
+def png(tiff, exif_first=True):
+    ihdr = png_chunk(b'IHDR', struct.pack('>IIBBBBB', 1, 1, 8, 0, 0, 0, 0))
+    exif, idat = png_chunk(b'eXIf', tiff), png_chunk(b'IDAT', b'\x78\x9c' + b'\x00' * 64)
+    body = exif + idat if exif_first else idat + exif
+    return b'\x89PNG\r\n\x1a\n' + ihdr + body + png_chunk(b'IEND', b'')
+
+
+def write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+@pytest.mark.parametrize('endian', ['<', '>'])
+def test_jpeg_date_original(tmp_path, endian):
+    path = write(tmp_path, 'a.jpg', jpeg(tiff_block({TAG_DATETIME_ORIGINAL: '2019:07:04 12:34:56'}, endian)))
+    date, bytes_read = read_exif_date(path)
+    assert date == TAKEN
+    assert 0 < bytes_read <= EXIF_DATE_MAX_BYTES
+
+
+def test_unset_original_falls_back_to_digitized(tmp_path):
+    tiff = tiff_block({TAG_DATETIME_ORIGINAL: '0000:00:00 00:00:00', TAG_DATETIME_DIGITIZED: '2019:07:04 12:34:56'})
+    assert read_exif_date(write(tmp_path, 'a.jpeg', jpeg(tiff)))[0] == TAKEN
+
+
+def test_tiff_date(tmp_path):
+    path = write(tmp_path, 'a.tif', tiff_block({TAG_DATETIME_ORIGINAL: '2019:07:04 12:34:56'}, '>'))
+    assert read_exif_date(path)[0] == TAKEN
+
+
+def test_png_exif_chunk(tmp_path):
+    tiff = tiff_block({TAG_DATETIME_ORIGINAL: '2019:07:04 12:34:56'})
+    assert read_exif_date(write(tmp_path, 'a.png', png(tiff)))[0] == TAKEN
+    # eXIf after the image data is not valid PNG and isn't looked for
+    assert read_exif_date(write(tmp_path, 'b.png', png(tiff, exif_first=False)))[0] is None
+
+
+def test_formats_without_exif_are_not_opened(tmp_path):
+    assert read_exif_date(str(tmp_path / 'missing.gif')) == (None, 0)
+    assert read_exif_date(write(tmp_path, 'a.bmp', b'BM' + b'\x00' * 64)) == (None, 0)
+
+
+def test_large_segments_are_seeked_over(tmp_path):
+    tiff = tiff_block({TAG_DATETIME_ORIGINAL: '2019:07:04 12:34:56'})
+    date, bytes_read = read_exif_date(write(tmp_path, 'a.jpg', jpeg(tiff, filler_segments=2)))
+    assert date == TAKEN
+    assert bytes_read <= 4 * READ_CHUNK
+
+
+def test_read_stops_at_the_cap(tmp_path):
+    tiff = tiff_block({TAG_DATETIME_ORIGINAL: '2019:07:04 12:34:56'})
+    date, bytes_read = read_exif_date(write(tmp_path, 'a.jpg', jpeg(tiff)), max_bytes=16)
+    assert date is None
+    assert bytes_read <= 16
+
+
+@pytest.mark.parametrize('build', [jpeg, png, lambda t: t])
+def test_truncated_files(tmp_path, build):
+    data = build(tiff_block({TAG_DATETIME_ORIGINAL: '2019:07:04 12:34:56'}))
+    name = {b'\xff': 'cut.jpg', b'\x89': 'cut.png'}.get(data[:1], 'cut.tif')
+    for size in range(len(data)):
+        date, _ = read_exif_date(write(tmp_path, name, data[:size]))
+        # Cut before the end of the date value: no date, never a wrong one
+        assert date in (None, TAKEN)
+
+
+def test_corrupt_offsets_and_dates(tmp_path):
+    tiff = bytearray(tiff_block({TAG_DATETIME_ORIGINAL: '2019:07:04 12:34:56'}))
+    bad_exif_ifd = bytes(tiff[:18]) + struct.pack('<I', 0x7FFFFFF0) + bytes(tiff[22:])
+    assert read_exif_date(write(tmp_path, 'a.jpg', jpeg(bad_exif_ifd)))[0] is None
+    huge_count = bytes(tiff[:26]) + struct.pack('<H', 0xFFFF) + bytes(tiff[28:])
+    assert read_exif_date(write(tmp_path, 'b.jpg', jpeg(huge_count)))[0] is None
+    garbage = tiff_block({TAG_DATETIME_ORIGINAL: '2019:13:45 99:00:00'})
+    assert read_exif_date(write(tmp_path, 'c.jpg', jpeg(garbage)))[0] is None
+    assert read_exif_date(write(tmp_path, 'd.jpg', b'\xff\xd8\xff\xe1\xff\xff' + b'\x00' * 32))[0] is None
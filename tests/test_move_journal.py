@@ -0,0 +1,147 @@
+import json
+import os
+
+import pytest
+
+from core.move_journal import MoveJournal, _process_identity, interrupted_journals, last_undoable, list_journals
+from core.organizer import OrganizerEngine
+
+
+def read(path):
+    with open(path, 'rb') as fh:
+        return fh.read()
+
+
+def files_under(root):
+    return sorted(os.path.relpath(os.path.join(d, f), str(root)).replace(os.sep, '/')
+                  for d, _, names in os.walk(str(root)) for f in names)
+
+
+def planned(root, media, count=3):
+    """count files under root/in and their journal moves into root/out."""
+    moves = []
+    for i in range(count):
+        source = media(f'in/f{i}.jpg', b'file %d' % i)
+        st = os.stat(source)
+        moves.append((source, os.path.join(str(root), 'out', f'f{i}.jpg'), st.st_size, st.st_mtime_ns))
+    os.makedirs(os.path.join(str(root), 'out'))
+    return moves
+
+
+def interrupted_after(root, moves, confirmed, unconfirmed):
+    """A journal of moves whose first confirmed + unconfirmed files moved before the run died."""
+    journal = MoveJournal.begin('organize', str(root), moves)
+    for i in range(confirmed + unconfirmed):
+        os.rename(moves[i][0], moves[i][1])
+        if i < confirmed:
+            journal.moved(i)
+    journal.close()
+    return journal
+
+
+def rewrite_header(journal, **fields):
+    with open(journal.path, encoding='utf-8') as fh:
+        lines = fh.readlines()
+    header = json.loads(lines[0])
+    header.update(fields)
+    lines[0] = json.dumps(header) + '\n'
+    with open(journal.path, 'w', encoding='utf-8') as fh:
+        fh.writelines(lines)
+
+
+def test_undo_restores_an_organize_run(tmp_path, media):
+    media('cam/a.jpg', b'a')
+    media('cam/b.jpg', b'b')
+    before = files_under(tmp_path)
+    OrganizerEngine(lambda msg: None).organize(str(tmp_path), dry_run=False)
+    assert files_under(tmp_path) != before
+
+    journal = last_undoable(str(tmp_path), 'organize')
+    assert journal.moved_count == 2
+    assert journal.undo() == {'restored': 2, 'skipped': 0}
+    assert files_under(tmp_path) == before
+    assert not os.path.exists(tmp_path / '2019')  # Emptied date folders are removed
+    assert last_undoable(str(tmp_path), 'organize') is None
+
+
+def test_undo_leaves_changed_files(tmp_path, media):
+    moves = planned(tmp_path, media, 2)
+    journal = MoveJournal.begin('scan_move', str(tmp_path), moves)
+    for i, (source, destination, _, _) in enumerate(moves):
+        os.rename(source, destination)
+        journal.moved(i)
+    journal.finish()
+    with open(moves[1][1], 'ab') as fh:
+        fh.write(b' edited')
+
+    assert journal.undo() == {'restored': 1, 'skipped': 1}
+    assert read(moves[0][0]) == b'file 0'
+    assert read(moves[1][1]) == b'file 1 edited'
+
+
+def test_recover_finishes_an_interrupted_run(tmp_path, media):
+    moves = planned(tmp_path, media)
+    interrupted_after(tmp_path, moves, confirmed=1, unconfirmed=1)
+    journal, = interrupted_journals(str(tmp_path))
+
+    # The unconfirmed move is found on disk; only the last file still moves
+    assert journal.recover() == {'moved': 1, 'restored': 0, 'skipped': 0}
+    assert files_under(tmp_path) == ['out/f0.jpg', 'out/f1.jpg', 'out/f2.jpg']
+    assert interrupted_journals(str(tmp_path)) == []
+    finished = last_undoable(str(tmp_path))
+    assert finished.id == journal.id and finished.moved_count == 3
+
+
+def test_recover_rolls_back_an_interrupted_run(tmp_path, media):
+    moves = planned(tmp_path, media)
+    interrupted_after(tmp_path, moves, confirmed=1, unconfirmed=1)
+    journal, = interrupted_journals(str(tmp_path))
+
+    assert journal.recover(rollback=True) == {'moved': 0, 'restored': 2, 'skipped': 0}
+    assert files_under(tmp_path) == ['in/f0.jpg', 'in/f1.jpg', 'in/f2.jpg']
+    assert interrupted_journals(str(tmp_path)) == []
+    assert last_undoable(str(tmp_path)) is None
+
+
+def test_recover_skips_a_taken_destination(tmp_path, media):
+    moves = planned(tmp_path, media, 2)
+    interrupted_after(tmp_path, moves, confirmed=1, unconfirmed=0)
+    media('out/f1.jpg', b'someone else')
+    journal, = interrupted_journals(str(tmp_path))
+
+    assert journal.recover() == {'moved': 0, 'restored': 0, 'skipped': 1}
+    assert read(moves[1][0]) == b'file 1'
+    assert read(moves[1][1]) == b'someone else'
+
+
+def test_begin_refuses_taken_destinations(tmp_path, media):
+    moves = planned(tmp_path, media, 2)
+    media('out/f1.jpg', b'already here')
+    with pytest.raises(FileExistsError):
+        MoveJournal.begin('organize', str(tmp_path), moves)
+
+    twice = [moves[0], (moves[1][0], moves[0][1], moves[1][2], moves[1][3])]
+    with pytest.raises(FileExistsError):
+        MoveJournal.begin('organize', str(tmp_path), twice, checked=True)
+    assert list_journals() == []
+
+
+def test_running_journals_are_not_interrupted(tmp_path, media):
+    moves = planned(tmp_path, media, 1)
+    journal = MoveJournal.begin('organize', str(tmp_path), moves)
+    assert interrupted_journals() == []  # Still being written by this process
+    journal.close()
+    assert [j.id for j in interrupted_journals()] == [journal.id]
+
+
+@pytest.mark.skipif(_process_identity(os.getpid()) is None, reason="process identity needs Linux /proc")
+def test_reused_pid_does_not_hide_an_interrupted_run(tmp_path, media):
+    journal = interrupted_after(tmp_path, planned(tmp_path, media, 1), confirmed=0, unconfirmed=0)
+    parent = os.getppid()
+
+    # The parent process is alive, but it isn't the one that wrote the journal
+    rewrite_header(journal, pid=parent, process=_process_identity(parent).split(':')[0] + ':1')
+    assert [j.id for j in interrupted_journals()] == [journal.id]
+
+    rewrite_header(journal, process=_process_identity(parent))
+    assert interrupted_journals() == []
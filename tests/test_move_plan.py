@@ -0,0 +1,147 @@
+import json
+import os
+
+import pytest
+
+from core import move_plan
+from core.move_plan import COPY_SUFFIX, DeviceMap, MovePlan, copy_move
+from core.organizer import OrganizerEngine
+
+
+def plan_for(root, **kwargs):
+    engine = OrganizerEngine(lambda msg: None)
+    engine.organize(str(root), dry_run=True, **kwargs)
+    return engine, engine.last_plan
+
+
+def execute(engine, plan):
+    results = []
+    counts = engine.execute(plan, result_callback=results.append)
+    return counts, {os.path.basename(r['file']): r for r in results}
+
+
+def read(path):
+    with open(path, 'rb') as fh:
+        return fh.read()
+
+
+def files_under(root):
+    return sorted(os.path.relpath(os.path.join(d, f), str(root)).replace(os.sep, '/')
+                  for d, _, names in os.walk(str(root)) for f in names)
+
+
+def test_name_collisions_are_numbered_and_copies_skipped(tmp_path, media):
+    media('cam0/IMG.jpg', b'first')
+    media('cam1/IMG.jpg', b'second')
+    media('cam2/IMG.jpg', b'first')
+    media('2019/2019-07/2019-07-04_IMG_1.jpg', b'already here')
+
+    engine, plan = plan_for(tmp_path)
+    decided = {os.path.relpath(m.source, str(tmp_path)).replace(os.sep, '/'): m for m in plan.moves}
+    assert decided['cam0/IMG.jpg'].target.endswith('2019-07-04_IMG.jpg')
+    # _1 is taken on disk, so the next free number
+    assert decided['cam1/IMG.jpg'].target.endswith('2019-07-04_IMG_2.jpg')
+    assert decided['cam1/IMG.jpg'].renamed_from.endswith('2019-07-04_IMG.jpg')
+    assert decided['cam2/IMG.jpg'].action == 'duplicate'
+
+    counts, _ = execute(engine, plan)
+    assert counts['moved'] == 2
+    folder = tmp_path / '2019' / '2019-07'
+    assert read(folder / '2019-07-04_IMG.jpg') == b'first'
+    assert read(folder / '2019-07-04_IMG_2.jpg') == b'second'
+    assert read(folder / '2019-07-04_IMG_1.jpg') == b'already here'
+    assert os.path.exists(tmp_path / 'cam2' / 'IMG.jpg')
+
+
+def test_dry_run_and_real_run_agree(tmp_path, media):
+    for i in range(3):
+        media(f'cam{i}/IMG.jpg', b'content %d' % i)
+    _, plan = plan_for(tmp_path)
+    engine = OrganizerEngine(lambda msg: None)
+    engine.organize(str(tmp_path), dry_run=False)
+    assert [m.target for m in plan.pending()] == [m.target for m in engine.last_plan.pending()]
+    assert all(os.path.exists(m.target) for m in plan.pending())
+
+
+def test_saved_plan_round_trips_and_executes(tmp_path, media):
+    media('a.jpg', b'a')
+    media('b.jpg', b'b', when=0)
+    _, plan = plan_for(tmp_path)
+    saved = str(tmp_path.parent / 'plan.jsonl')
+    plan.save(saved)
+    loaded = MovePlan.load(saved)
+    assert loaded.moves == plan.moves
+    assert loaded.source_dir == plan.source_dir
+
+    counts, _ = execute(OrganizerEngine(lambda msg: None), loaded)
+    assert counts['moved'] == len(plan.pending())
+    for move in plan.pending():
+        assert os.path.exists(move.target) and not os.path.exists(move.source)
+
+
+def test_unknown_plan_version_is_rejected(tmp_path):
+    path = tmp_path / 'plan.jsonl'
+    path.write_text(json.dumps({'version': 999, 'source_dir': str(tmp_path)}) + '\n')
+    with pytest.raises(ValueError):
+        MovePlan.load(str(path))
+
+
+def test_target_taken_after_planning_is_never_overwritten(tmp_path, media):
+    media('a.jpg', b'mine')
+    engine, plan = plan_for(tmp_path)
+    (target,) = [m.target for m in plan.pending()]
+    media(os.path.relpath(target, str(tmp_path)).replace(os.sep, '/'), b'someone else')
+
+    counts, results = execute(engine, plan)
+    assert counts['moved'] == 0
+    assert results['a.jpg']['action'] == 'error'
+    assert read(target) == b'someone else'
+    assert read(tmp_path / 'a.jpg') == b'mine'
+
+
+def test_target_taken_in_other_case_counts_as_taken(tmp_path, media, monkeypatch):
+    # As on Windows, where names differing only in case are the same file
+    monkeypatch.setattr(os.path, 'normcase', str.lower)
+    media('a.jpg', b'mine')
+    engine, plan = plan_for(tmp_path)
+    (target,) = [m.target for m in plan.pending()]
+    folder, name = os.path.split(target)
+    media(os.path.relpath(os.path.join(folder, name.upper()), str(tmp_path)).replace(os.sep, '/'), b'someone else')
+
+    counts, results = execute(engine, plan)
+    assert counts['moved'] == 0
+    assert results['a.jpg']['action'] == 'error'
+    assert read(tmp_path / 'a.jpg') == b'mine'
+
+
+def test_moves_across_devices_copy_then_remove(tmp_path, media, monkeypatch):
+    source = media('a.jpg', b'x' * 100_000)
+    mtime = os.stat(source).st_mtime_ns
+    monkeypatch.setattr(DeviceMap, 'same', lambda self, a, b: False)
+    engine, plan = plan_for(tmp_path)
+    engine.copy_workers = 2
+
+    counts, _ = execute(engine, plan)
+    (target,) = [m.target for m in plan.pending()]
+    assert counts['moved'] == 1
+    assert not os.path.exists(source)
+    assert read(target) == b'x' * 100_000
+    assert os.stat(target).st_mtime_ns == mtime
+    assert not any(name.endswith(COPY_SUFFIX) for name in files_under(tmp_path))
+
+
+def test_failed_copy_leaves_the_source_and_no_partial_file(tmp_path, media, monkeypatch):
+    source = media('a.jpg', b'x' * 1000)
+    target = str(tmp_path / 'out' / 'a.jpg')
+    os.makedirs(os.path.dirname(target))
+
+    def broken_copy(src, dst):
+        with open(dst, 'wb') as fh:
+            fh.write(b'x' * 10)
+        raise OSError(28, 'No space left on device')
+
+    monkeypatch.setattr(move_plan.shutil, 'copy2', broken_copy)
+    with pytest.raises(OSError):
+        copy_move(source, target)
+    assert read(source) == b'x' * 1000
+    assert os.listdir(os.path.dirname(target)) == []
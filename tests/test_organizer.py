@@ -0,0 +1,55 @@
+import os
+
+from core.organizer import OrganizerEngine
+
+
+def organize(root, dry_run=True, **kwargs):
+    """(engine, counts, {relative source: (action, relative target)}) of an organize run."""
+    engine = OrganizerEngine(lambda msg: None)
+    results = {}
+    counts = engine.organize(str(root), dry_run=dry_run, result_callback=lambda r: results.update({
+        os.path.relpath(r['file'], str(root)).replace(os.sep, '/'):
+            (r['action'], r['target'] and os.path.relpath(r['target'], str(root)).replace(os.sep, '/'))}), **kwargs)
+    return engine, counts, results
+
+
+def test_copy_walked_before_the_organized_original_is_a_duplicate(tmp_path, media):
+    # The walk lists the loose files at the top before the date folders
+    media('2019/2019-07/2019-07-04_a.jpg', b'same bytes' * 100)
+    media('copy.jpg', b'same bytes' * 100)
+    media('2019/other.jpg', b'same bytes' * 100)
+    media('new.jpg', b'other bytes' * 100)
+
+    _, counts, results = organize(tmp_path)
+    assert results == {
+        'copy.jpg': ('duplicate', '2019/2019-07/2019-07-04_a.jpg'),
+        '2019/other.jpg': ('duplicate', '2019/2019-07/2019-07-04_a.jpg'),
+        '2019/2019-07/2019-07-04_a.jpg': ('in_place', '2019/2019-07/2019-07-04_a.jpg'),
+        'new.jpg': ('dry_run', '2019/2019-07/2019-07-04_new.jpg'),
+    }
+    assert counts['duplicates'] == 2
+
+
+def test_flat_date_folders_count_as_organized(tmp_path, media):
+    media('2019-07/2019-07-04_a.jpg', b'same bytes' * 100)
+    media('copy.jpg', b'same bytes' * 100)
+
+    _, _, results = organize(tmp_path, use_flat_folders=True)
+    assert results['copy.jpg'] == ('duplicate', '2019-07/2019-07-04_a.jpg')
+
+
+def test_rerun_from_a_relative_path_finds_files_in_place(tmp_path, media, monkeypatch):
+    media('photos/a.jpg', b'a bytes')
+    media('photos/b.jpg', b'b bytes')
+    monkeypatch.chdir(tmp_path)
+
+    _, counts, first = organize('photos', dry_run=False)
+    assert counts['moved'] == 2
+    assert first['a.jpg'] == ('move', '2019/2019-07/2019-07-04_a.jpg')
+
+    _, counts, second = organize('photos', dry_run=False)
+    assert counts['moved'] == counts['duplicates'] == 0
+    assert second == {
+        '2019/2019-07/2019-07-04_a.jpg': ('in_place', '2019/2019-07/2019-07-04_a.jpg'),
+        '2019/2019-07/2019-07-04_b.jpg': ('in_place', '2019/2019-07/2019-07-04_b.jpg'),
+    }
@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+
+import pytest
+
+from core.watcher import MediaWatcher, _Settler, is_partial_name
+
+SETTLE = 0.3
+POLL = 0.1
+
+
+def write(root, name, content=b'photo bytes', when=None):
+    path = os.path.join(str(root), name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as fh:
+        fh.write(content)
+    if when is not None:
+        os.utime(path, (when, when))
+    return path
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+@pytest.fixture
+def watch(tmp_path):
+    """watch(**kwargs): a polling MediaWatcher of tmp_path running on a thread; returns (watcher, reported paths)."""
+    started = []
+
+    def start(**kwargs):
+        reported = []
+        watcher = MediaWatcher(str(tmp_path), {'.jpg', '.part', '.crdownload'}, reported.extend,
+                               logger=lambda msg: None, settle_seconds=SETTLE, poll_interval=POLL,
+                               use_inotify=False, **kwargs)
+        thread = threading.Thread(target=watcher.run, daemon=True)
+        thread.start()
+        assert wait_for(lambda: watcher.mode == 'polling')
+        time.sleep(POLL)  # Let the first snapshot be taken
+        started.append((watcher, thread))
+        return watcher, reported
+
+    yield start
+    for watcher, thread in started:
+        watcher.stop()
+        thread.join(5)
+
+
+def test_partial_names():
+    for name in ('IMG_1.jpg.part', 'IMG_1.JPG.crdownload', 'IMG_1.jpg.tmp', '.IMG_1.jpg', 'IMG_1.jpg~'):
+        assert is_partial_name(name)
+    assert not is_partial_name('IMG_1.jpg')
+
+
+def test_settler_waits_for_quiet_files(tmp_path):
+    path = write(tmp_path, 'a.jpg')
+    settler = _Settler(SETTLE)
+    settler.add(path)
+    assert settler.ready() == []  # First look only records the size and mtime
+    time.sleep(SETTLE / 2)
+    with open(path, 'ab') as fh:
+        fh.write(b' more')
+    assert settler.ready() == []  # Changed: the quiet period starts over
+    time.sleep(SETTLE / 2 + 0.05)
+    assert settler.ready() == []
+    time.sleep(SETTLE / 2)
+    assert settler.ready() == [path]
+    assert settler.ready() == []
+
+
+def test_settler_holds_empty_files_and_drops_deleted_ones(tmp_path):
+    empty = write(tmp_path, 'empty.jpg', b'')
+    gone = write(tmp_path, 'gone.jpg')
+    settler = _Settler(0)
+    settler.add(empty)
+    settler.add(gone)
+    os.remove(gone)
+    settler.ready()
+    assert settler.ready() == []
+    assert list(settler.pending) == [empty]
+
+
+def test_new_files_are_reported_once_settled(tmp_path, watch):
+    write(tmp_path, 'before.jpg')
+    watcher, reported = watch()
+    path = write(tmp_path, 'sub/new.jpg')
+    write(tmp_path, 'notes.txt')
+
+    assert wait_for(lambda: reported)
+    time.sleep(SETTLE)
+    assert reported == [path]
+
+
+def test_growing_file_is_not_handed_on(tmp_path, watch):
+    watcher, reported = watch()
+    path = write(tmp_path, 'growing.jpg')
+    for _ in range(10):
+        time.sleep(SETTLE / 4)
+        with open(path, 'ab') as fh:
+            fh.write(b' more')
+        assert reported == []
+    assert wait_for(lambda: reported == [path])
+
+
+def test_partial_downloads_are_ignored(tmp_path, watch):
+    watcher, reported = watch()
+    write(tmp_path, 'a.jpg.part')
+    write(tmp_path, 'b.jpg.crdownload')
+    done = write(tmp_path, 'c.jpg')
+
+    assert wait_for(lambda: reported)
+    time.sleep(SETTLE)
+    assert reported == [done]
+
+
+def test_ignored_paths_are_not_reported(tmp_path, watch):
+    watcher, reported = watch()
+    ours = os.path.join(str(tmp_path), 'organized.jpg')
+    watcher.ignore([ours])
+    write(tmp_path, 'organized.jpg')
+    theirs = write(tmp_path, 'arrived.jpg')
+
+    assert wait_for(lambda: reported)
+    time.sleep(SETTLE)
+    assert reported == [theirs]
+
+
+class _OverflowingNotifier:
+    """Stands in for inotify: no events, and one queue overflow once triggered."""
+
+    def __init__(self):
+        self.trigger = threading.Event()
+        self.overflowed = False
+
+    def read(self, timeout):
+        time.sleep(min(timeout, 0.05))
+        if self.trigger.is_set() and not self.overflowed:
+            self.overflowed = True
+            return [], True
+        return [], False
+
+
+def test_overflow_sweep_reports_unseen_files(tmp_path):
+    # Files copied from a camera keep their old mtimes, so only the snapshot comparison finds them
+    old = time.time() - 86400 * 365
+    write(tmp_path, 'before.jpg', when=old)
+    reported = []
+    watcher = MediaWatcher(str(tmp_path), {'.jpg'}, reported.extend, logger=lambda msg: None,
+                           settle_seconds=SETTLE)
+    notifier = _OverflowingNotifier()
+    thread = threading.Thread(target=watcher._run_inotify, args=(notifier,), daemon=True)
+    thread.start()
+    try:
+        assert wait_for(lambda: watcher._seen)  # The files present at the start
+        copied = write(tmp_path, 'copied.jpg', when=old)
+        ours = write(tmp_path, 'moved_by_us.jpg', when=old)
+        watcher.ignore([ours])
+        notifier.trigger.set()
+
+        assert wait_for(lambda: reported)
+        time.sleep(SETTLE)
+        assert reported == [copied]
+    finally:
+        watcher.stop()
+        thread.join(5)